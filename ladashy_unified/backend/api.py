@@ -2,13 +2,14 @@
 LaDashy REST API - Complete Implementation
 Backend service with all features from the desktop version
 """
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, Response, request, jsonify, send_file, send_from_directory, stream_with_context
 from flask_cors import CORS
 import sys
 import os
 import json
 import threading
 import tempfile
+import shutil
 import zipfile
 from pathlib import Path
 from datetime import datetime
@@ -18,25 +19,55 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
 
 # Import all our modules
-from homelab_wizard.core.scanner import NetworkScanner
+from homelab_wizard.core.scanner import NetworkScanner, ScanCancelled
+from homelab_wizard.core.scan_checkpoint import ScanCheckpoint
+from homelab_wizard.core.address_space import networks_overlap
+from homelab_wizard.core.docker_inventory import DockerInventory
+from homelab_wizard.core.reverse_dns import HostnameCache
+from homelab_wizard.core.port_profiles import DEFAULT_PROFILE, PORT_PROFILES, load_hits, merge_hits
+from homelab_wizard.core.scan_state import ScanState, diff_services
+from homelab_wizard.core.fingerprint_cache import FingerprintCache
+from homelab_wizard.core.metrics_store import MetricsStore
+from homelab_wizard.core.inventory import Inventory
+from homelab_wizard.core.events import SharedEventBroker, format_sse
+from homelab_wizard.core.shared_store import SharedStore, LeaderLock
+from homelab_wizard.utils.paths import data_path
+from homelab_wizard.core.jobs import JobQueue, JobCancelled, JobConflict, ThrottledReporter
 from homelab_wizard.generators.documentation_generator import DocumentationGenerator
 from homelab_wizard.collectors.manager import CollectorManager
-from homelab_wizard.services.definitions import get_all_services
+from homelab_wizard.collectors.scheduler import CollectionScheduler
+from homelab_wizard.services.definitions import get_all_services, get_service_by_name
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['ETag', 'X-Inventory-Version'])
 
-# Global storage
-app.discovered_services = {}
-app.service_configs = {}
-app.collected_data = {}
-app.scan_status = {"scanning": False, "progress": "", "error": None}
+# Global storage. Under a multi-worker server every worker is a separate
+# process, so anything a request in another worker must see (inventory,
+# scan and collection status, pushed events) lives in the shared store.
+# Discovered hosts, configs and collected data live in the inventory; read
+# them through app.inventory.snapshot()
+app.store = SharedStore()
+app.inventory = Inventory(store=app.store)
+app.events = SharedEventBroker(app.store)
+app.fingerprint_cache = FingerprintCache()
+app.hostname_cache = HostnameCache()
+app.metrics_store = MetricsStore()
+# Daemons named by scans stay watched, so container changes show up between scans
+app.docker_inventory = DockerInventory(watch=True, on_change=lambda ip, entry: _docker_changed(ip, entry))
+app.scheduler_lock = LeaderLock(data_path("scheduler.lock"))
+app.shutting_down = threading.Event()
+# Scans, bulk collections and documentation builds
+app.jobs = JobQueue(workers=int(os.environ.get("LADASHY_JOB_WORKERS", 4)), on_change=lambda job: _job_changed(job),
+                    on_prune=ScanCheckpoint.remove)
+
+EXPORTS_DIR = data_path("exports")
 
 # Load saved configs if they exist
-config_file = os.path.expanduser("~/.ladashy/service_configs.json")
+config_file = data_path("service_configs.json")
 if os.path.exists(config_file):
     with open(config_file, 'r') as f:
-        app.service_configs = json.load(f)
+        for key, saved_config in json.load(f).items():
+            app.inventory.set_config(key, saved_config)
 
 from flask import send_from_directory
 import os
@@ -64,58 +95,308 @@ def health():
 
 @app.route('/api/scan', methods=['POST'])
 def scan_network():
-    """Start network scan"""
-    if app.scan_status["scanning"]:
-        return jsonify({"error": "Scan already in progress"}), 400
-    
+    """Queue a network scan; returns the job id to poll or stream"""
     data = request.json
     networks = data.get('networks', ['192.168.1.0/24'])
+    port_profile = data.get('port_profile', DEFAULT_PROFILE)
+    if port_profile not in PORT_PROFILES:
+        return jsonify({"error": f"Unknown port profile: {port_profile}"}), 400
     
-    def scan_worker():
-        app.scan_status["scanning"] = True
-        app.scan_status["error"] = None
-        scanner = NetworkScanner()
-        
-        try:
-            # Add networks
-            for network in networks:
-                scanner.add_network(network)
-            
-            # Progress callback
-            def progress_callback(msg):
-                app.scan_status["progress"] = msg
-            
-            # Scan
-            app.discovered_services = scanner.discover_all_services(progress_callback)
-            app.scan_status["progress"] = "Scan complete!"
-            
-        except Exception as e:
-            app.scan_status["error"] = str(e)
-        finally:
-            app.scan_status["scanning"] = False
+    # Scans of separate subnets run in parallel; overlapping ones don't
+    try:
+        job = app.jobs.submit(
+            "scan", {"networks": networks, "incremental": bool(data.get('incremental')),
+                     "docker_hosts": data.get('docker_hosts', []),
+                     "full_sweep": bool(data.get('full_sweep', True)),
+                     "port_profile": port_profile},
+            conflicts=lambda active: networks_overlap(active.params["networks"], networks)
+        )
+    except JobConflict as e:
+        return jsonify({"error": "Scan already in progress", "job_id": e.job.id}), 400
+    return jsonify({
+        "status": "Scan queued",
+        "job_id": job.id,
+        "networks": networks,
+        "incremental": job.params["incremental"]
+    })
+
+# Hosts each port was found open on, over every scan; orders the sweep
+PORT_HITS_KEY = "scan.port_hits"
+
+def run_scan(job):
+    """Scan job: discover services on the job's networks
+
+    Progress is checkpointed, so a scan that was cancelled, failed or had
+    its process die picks up where it stopped when the job runs again.
+    """
+    networks = job.params["networks"]
+    previous_state = ScanState.load()
+    incremental = job.params.get("incremental") and previous_state is not None
+    
+    scanner = NetworkScanner()
+    scanner.fingerprint_cache = app.fingerprint_cache
+    scanner.hostname_cache = app.hostname_cache
+    scanner.docker_hosts = job.params.get("docker_hosts", [])
+    scanner.docker_inventory = app.docker_inventory
+    scanner.full_sweep = job.params.get("full_sweep", True)
+    scanner.port_profile = job.params.get("port_profile", DEFAULT_PROFILE)
+    scanner.port_hits = load_hits(app.store.get(PORT_HITS_KEY))
+    scanner.should_cancel = lambda: job.cancelled
+    for network in networks:
+        scanner.add_network(network)
+    checkpoint = ScanCheckpoint.for_job(job.job_id, scanner.get_networks())
+    
+    # Progress is stored and published from a thread of its own, at most
+    # four times a second, so the scan's event loop never waits on SQLite
+    def report_progress(msg, stats):
+        job.progress(message=msg, **stats)
+        app.events.publish("progress", _scan_progress(job.job))
+    
+    progress = ThrottledReporter(report_progress)
+    
+    # Progress callback; also where a cancelled scan is told to stop
+    def progress_callback(msg):
+        if job.cancelled:
+            scanner.cancel()
+        progress(msg, scanner.stats.as_dict())
+    
+    # Publish each host as soon as it has services
+    def result_callback(ip, host_entry):
+        app.inventory.update_host(ip, host_entry)
+        app.events.publish("host", {"job_id": job.job_id, "ip": ip, "host": host_entry})
+    
+    # Incremental scans keep showing the previous results until they are
+    # replaced, and only re-fingerprint what changed. A partial scan (no
+    # full sweep) only adds to them: hosts it didn't see may just be quiet
+    previous_services = previous_state.services if previous_state else {}
+    partial = scanner.partial
+    if not checkpoint.resumed and not partial:
+        app.inventory.replace_hosts(dict(previous_services) if incremental else {}, networks=networks)
+    app.events.publish("scan_started", {
+        "job_id": job.job_id, "networks": networks, "incremental": incremental, "resumed": checkpoint.resumed
+    })
+    
+    try:
+        services = scanner.discover_all_services(
+            progress_callback, result_callback,
+            previous_state=previous_state if incremental else None,
+            checkpoint=checkpoint
+        )
+    except ScanCancelled:
+        raise JobCancelled()
+    finally:
+        progress.close()
+    if partial:
+        for ip, entry in services.items():
+            app.inventory.update_host(ip, entry)
+        # Only hosts it saw can have changed
+        seen = {ip: entry for ip, entry in previous_services.items() if ip in services}
+        scan_diff = diff_services(seen, services)
+    else:
+        app.inventory.replace_hosts(services, networks=networks)
+        scan_diff = diff_services(previous_services, services, networks)
+    app.store.set("scan.diff", scan_diff)
+    # Fold in the newest saved state, which parallel scans may have updated
+    with app.store.transaction():
+        latest_state = ScanState.load()
+        if latest_state:
+            scanner.last_state.carry_over(latest_state, partial=partial)
+        scanner.last_state.save()
+    app.store.update(PORT_HITS_KEY, lambda hits: merge_hits(hits, scanner.last_port_hits), {})
+    checkpoint.discard()
+    job.progress(message="Scan complete!", **scanner.stats.as_dict())
+    return {"hosts": len(services), "diff": scan_diff}
+
+def _scan_progress(job=None):
+    """Status and counters of a scan job, by default the newest one"""
+    scanning = job.active if job else False
+    if job is None:
+        scans = app.jobs.list(kind="scan", limit=20)
+        active = [scan for scan in scans if scan.active]
+        job = active[0] if active else (scans[0] if scans else None)
+        scanning = bool(active)
     
-    thread = threading.Thread(target=scan_worker, daemon=True)
-    thread.start()
+    inventory = app.inventory.snapshot()
+    progress = job.progress if job else {}
+    if job and job.state == "cancelled":
+        message = "Scan cancelled"
+    else:
+        message = progress.get("message") or ("Waiting to start" if job and job.state == "queued" else "")
     
-    return jsonify({"status": "Scan started", "networks": networks})
+    return {
+        "job_id": job.id if job else None,
+        "state": job.state if job else None,
+        "scanning": scanning,
+        "progress": message,
+        "error": job.error if job else None,
+        "hosts_found": inventory.host_count,
+        "services_found": inventory.service_count,
+        "ports_scanned": progress.get("ports_scanned", 0),
+        "ports_per_sec": progress.get("ports_per_sec", 0.0),
+        "fingerprints_reused": progress.get("fingerprints_reused", 0)
+    }
+
+def _job_changed(job):
+    """Tell every client when a job is queued, starts or finishes"""
+    app.events.publish("job", {
+        "id": job.id, "kind": job.kind, "state": job.state, "error": job.error
+    })
+    if job.kind == "scan" and not job.active:
+        app.events.publish("scan_complete", {
+            **_scan_progress(job),
+            "diff": job.result["diff"] if job.state == "succeeded" else None
+        })
+
+def _docker_changed(ip, entry):
+    """A watched Docker daemon started, stopped or removed containers"""
+    # What a scan found beside the containers (e.g. SSH on the daemon's
+    # host) stays; only the container services are replaced
+    current = app.inventory.snapshot().hosts.get(ip) or {}
+    kept = [service for service in current.get("services", []) if "container" not in service]
+    if entry is None and not kept:
+        # No services left on this address
+        app.inventory.replace_hosts({}, networks=[ip])
+        entry = {"hostname": "Unknown", "services": []}
+    else:
+        entry = {
+            "hostname": current.get("hostname") or (entry or {}).get("hostname", "Unknown"),
+            "services": (entry or {}).get("services", []) + kept,
+        }
+        app.inventory.update_host(ip, entry)
+    app.events.publish("host", {"job_id": None, "ip": ip, "host": entry})
 
 @app.route('/api/scan/status')
 def get_scan_status():
-    """Get scan status"""
-    total_services = sum(len(h.get('services', [])) for h in app.discovered_services.values())
+    """Get scan status, of the newest scan or of ?job_id="""
+    job_id = request.args.get('job_id')
+    if job_id:
+        job = app.jobs.get(job_id)
+        if not job or job.kind != "scan":
+            return jsonify({"error": "No such scan"}), 404
+        return jsonify(_scan_progress(job))
+    return jsonify(_scan_progress())
+
+@app.route('/api/events')
+def scan_events():
+    """Server-sent event stream of scan progress and newly found hosts
+
+    Sends the current status first, then ``scan_started``, ``progress``,
+    ``host`` (one per host as it is found), ``scan_complete``, ``job`` for
+    every job state change and, if the client fell behind or reconnected
+    too late to replay, ``reset``. Scan events carry their ``job_id``.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscription = app.events.subscribe(int(last_event_id) if last_event_id else None)
+    
+    def stream():
+        yield format_sse((None, "status", _scan_progress()))
+        yield from app.events.stream(subscription)
+    
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/scan/diff')
+def get_scan_diff():
+    """Services added, removed and changed by the last scan"""
+    scan_diff = app.store.get("scan.diff")
+    if scan_diff is None:
+        return jsonify({"error": "No scan has completed yet"}), 404
     
     return jsonify({
-        "scanning": app.scan_status["scanning"],
-        "progress": app.scan_status["progress"],
-        "error": app.scan_status["error"],
-        "hosts_found": len(app.discovered_services),
-        "services_found": total_services
+        **scan_diff,
+        "summary": {key: len(value) for key, value in scan_diff.items()}
     })
 
+@app.route('/api/jobs')
+def list_jobs():
+    """Recent jobs, optionally filtered by ?kind= and ?state="""
+    jobs = app.jobs.list(
+        kind=request.args.get('kind'),
+        state=request.args.get('state'),
+        limit=request.args.get('limit', 50, type=int)
+    )
+    return jsonify([job.as_dict() for job in jobs])
+
+@app.route('/api/jobs/<job_id>', methods=['GET', 'DELETE'])
+def job_detail(job_id):
+    """One job's state, progress and result; DELETE cancels it"""
+    job = app.jobs.cancel(job_id) if request.method == 'DELETE' else app.jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "No such job"}), 404
+    return jsonify(job.as_dict())
+
+@app.route('/api/jobs/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    """Queue a cancelled or failed job again; scans continue from their checkpoint"""
+    job = app.jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "No such job"}), 404
+    if job.state not in ("cancelled", "failed"):
+        return jsonify({"error": f"Job is {job.state}"}), 409
+    # Same rule as new scans: overlapping ones don't run together
+    conflicts = None
+    if job.kind == "scan":
+        conflicts = lambda active: networks_overlap(active.params["networks"], job.params["networks"])
+    try:
+        return jsonify(app.jobs.requeue(job_id, conflicts=conflicts).as_dict())
+    except JobConflict as e:
+        return jsonify({"error": "Scan already in progress", "job_id": e.job.id}), 409
+
+@app.route('/api/jobs/<job_id>/download')
+def download_job_output(job_id):
+    """File produced by a finished documentation job"""
+    job = app.jobs.get(job_id)
+    if not job or job.kind != "generate":
+        return jsonify({"error": "No such documentation job"}), 404
+    if job.state != "succeeded":
+        return jsonify({"error": f"Job is {job.state}"}), 409
+    return send_file(job.result["path"], as_attachment=True,
+                     download_name=job.result["filename"], mimetype='application/zip')
+
+@app.route('/api/cache/stats')
+def get_cache_stats():
+    """Fingerprint cache hit and miss counters"""
+    return jsonify(app.fingerprint_cache.stats())
+
+@app.route('/api/cache', methods=['DELETE'])
+def clear_cache():
+    """Drop all cached fingerprints"""
+    app.fingerprint_cache.clear()
+    return jsonify({"status": "Fingerprint cache cleared"})
+
 @app.route('/api/services')
 def get_services():
-    """Get discovered services"""
-    return jsonify(app.discovered_services)
+    """Get discovered services
+
+    Supports If-None-Match against the inventory version's ETag. With
+    ``?since=<version>`` only hosts changed or removed after that version
+    are returned, along with the new version.
+    """
+    inventory = app.inventory.snapshot()
+    if inventory.etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        since = request.args.get('since', type=int)
+        if since is not None:
+            response = jsonify(inventory.changes_since(since))
+        else:
+            response = Response(inventory.hosts_json(), mimetype='application/json')
+    response.set_etag(inventory.etag)
+    response.headers['X-Inventory-Version'] = str(inventory.version)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/services/search')
+def search_services():
+    """Discovered services filtered by name, host, port and/or category"""
+    return jsonify(app.inventory.snapshot().services(
+        name=request.args.get('name'),
+        host=request.args.get('host'),
+        port=request.args.get('port', type=int),
+        category=request.args.get('category')
+    ))
 
 @app.route('/api/services/<service_name>/<host>/config', methods=['GET', 'POST'])
 def service_config(service_name, host):
@@ -123,47 +404,210 @@ def service_config(service_name, host):
     service_key = f"{service_name}_{host}"
     
     if request.method == 'GET':
-        return jsonify(app.service_configs.get(service_key, {}))
+        return jsonify(app.inventory.snapshot().configs.get(service_key, {}))
     else:
         config = request.json
-        app.service_configs[service_key] = config
+        app.inventory.set_config(service_key, config)
         
         # Save to file
         os.makedirs(os.path.dirname(config_file), exist_ok=True)
         with open(config_file, 'w') as f:
-            json.dump(app.service_configs, f, indent=2)
+            json.dump(dict(app.inventory.snapshot().configs), f, indent=2)
         
         # Try to collect data
-        manager = CollectorManager()
-        service_info = next(
-            (s for h in app.discovered_services.values() 
-             for s in h.get('services', []) 
-             if s['name'] == service_name and h.get('ip') == host),
-            None
-        )
+        service_info = _find_discovered_service(service_name, host)
         
         if service_info:
-            collector = manager.get_collector(service_name, config)  # Don't lowercase - manager handles it
-            if collector:
-                port = service_info['ports'][0] if service_info.get('ports') else 8080
-                
-                if collector.test_connection(host, port, config):
-                    basic = collector.collect_basic_info(host, port, config)
-                    detailed = collector.collect_detailed_info(host, port, config)
-                    
-                    app.collected_data[service_key] = {
-                        **basic,
-                        **detailed,
-                        'last_updated': datetime.now().isoformat()
-                    }
-                    
-                    return jsonify({
-                        "status": "Configuration saved and data collected",
-                        "data": app.collected_data[service_key]
-                    })
+            port = service_info['ports'][0] if service_info.get('ports') else 8080
+            try:
+                data = CollectorManager().collect_one(service_name, host, port, config)
+            except (LookupError, ConnectionError):
+                data = None
+            except Exception as e:
+                app.logger.error(f"Collection failed for {service_key}: {e}")
+                data = None
+            
+            if data is not None:
+                _store_collected(service_key, data)
+                return jsonify({
+                    "status": "Configuration saved and data collected",
+                    "data": data
+                })
         
         return jsonify({"status": "Configuration saved"})
 
+def _find_discovered_service(service_name, host):
+    """Look up a discovered service entry on a host"""
+    return app.inventory.snapshot().find_service(service_name, host)
+
+def _collection_targets():
+    """One collection target per configured service"""
+    targets = []
+    for service_key, config in app.inventory.snapshot().configs.items():
+        service_name, _, host = service_key.rpartition('_')
+        if not service_name:
+            continue
+        
+        port = config.get('port')
+        if not port:
+            service_info = _find_discovered_service(service_name, host)
+            if service_info and service_info.get('ports'):
+                port = service_info['ports'][0]
+            else:
+                service_def = get_service_by_name(service_name) or {}
+                port = (service_def.get('ports') or [8080])[0]
+        
+        targets.append({
+            "key": service_key,
+            "service": service_name,
+            "host": host,
+            "port": int(port),
+            "config": config,
+        })
+    return targets
+
+@app.route('/api/collect', methods=['POST'])
+def collect_all():
+    """Queue a concurrent collection from every configured service"""
+    for job in app.jobs.list(kind="collect", limit=5):
+        if job.active:
+            return jsonify({"error": "Collection already in progress", "job_id": job.id}), 400
+    
+    options = request.json or {}
+    job = app.jobs.submit("collect", {
+        "timeout": float(options.get('timeout', 30)),
+        "workers": int(options.get('workers', 16))
+    })
+    return jsonify({"status": "Collection queued", "job_id": job.id})
+
+def run_collection(job):
+    """Collect job: collect from every configured service concurrently"""
+    targets = _collection_targets()
+    counts = {"total": len(targets), "completed": 0, "succeeded": 0, "failed": 0, "timed_out": 0}
+    results = {}
+    job.progress(**counts, results=results)
+    
+    def on_progress(service_key, outcome):
+        if outcome["status"] == "success":
+            _store_collected(service_key, outcome["data"])
+        counts["completed"] += 1
+        counts[{"success": "succeeded", "timeout": "timed_out"}.get(outcome["status"], "failed")] += 1
+        results[service_key] = {
+            k: v for k, v in outcome.items() if k != "data"
+        }
+        job.progress(**counts, results=results)
+        job.check_cancelled()
+    
+    CollectorManager().collect_many(targets, job.params["workers"], job.params["timeout"], on_progress)
+    return counts
+
+@app.route('/api/collect/status')
+def get_collect_status():
+    """Progress of the newest bulk collection job"""
+    jobs = app.jobs.list(kind="collect", limit=1)
+    if not jobs:
+        return jsonify({"running": False, "total": 0, "completed": 0, "results": {}})
+    job = jobs[0]
+    return jsonify({
+        "total": 0, "completed": 0, "results": {},
+        **job.progress,
+        "job_id": job.id,
+        "state": job.state,
+        "running": job.active,
+        "error": job.error,
+        "started": _isoformat(job.started),
+        "finished": _isoformat(job.finished)
+    })
+
+def _isoformat(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+@app.route('/api/collected')
+def get_collected_data():
+    """Latest collected data snapshot for every service"""
+    return jsonify(dict(app.inventory.snapshot().collected))
+
+@app.route('/api/collect/schedule', methods=['GET', 'POST'])
+def collect_schedule():
+    """Background collection state, or trigger an immediate run"""
+    if request.method == 'POST':
+        options = request.json or {}
+        app.collection_scheduler.trigger(options.get('service_key'))
+        return jsonify({"status": "Collection triggered"})
+    return jsonify(app.collection_scheduler.state())
+
+def _store_collected(service_key, data):
+    """Publish a fresh collection result as a new snapshot"""
+    app.inventory.set_collected(service_key, data)
+    try:
+        app.metrics_store.record(service_key, data)
+    except Exception as e:
+        app.logger.error(f"Recording metrics for {service_key} failed: {e}")
+
+app.collection_scheduler = CollectionScheduler(_collection_targets, _store_collected, store=app.store)
+
+def start_background_services(retry_interval=30):
+    """Run the job workers and collection scheduler in exactly one server process
+
+    Every worker calls this; the one that takes the leader lock runs them
+    and the rest keep retrying, so another worker takes over if the leader
+    exits. The new leader requeues jobs the old one was running.
+    """
+    def lead():
+        while not app.scheduler_lock.acquire():
+            if app.shutting_down.wait(retry_interval):
+                return
+        app.jobs.start()
+        _discard_stale_checkpoints()
+        app.collection_scheduler.start()
+
+    threading.Thread(target=lead, name="scheduler-leader", daemon=True).start()
+
+def _discard_stale_checkpoints():
+    """Checkpoints of scan jobs that no longer exist can never be resumed"""
+    for job_id in ScanCheckpoint.saved_jobs():
+        if app.jobs.get(job_id) is None:
+            ScanCheckpoint.remove(job_id)
+
+def stop_background_services():
+    """Stop background work before this process exits
+
+    Jobs still running are left as they are and requeued by the next leader.
+    """
+    app.shutting_down.set()
+    if app.scheduler_lock.held:
+        app.jobs.stop(wait=False)
+        app.collection_scheduler.stop(wait=False)
+        app.scheduler_lock.release()
+    app.docker_inventory.close()
+    app.events.close()
+
+@app.route('/api/metrics')
+def list_metrics():
+    """Recorded metric series, optionally for one service"""
+    return jsonify(app.metrics_store.list_series(request.args.get('service')))
+
+@app.route('/api/metrics/<service_key>/<path:metric>')
+def get_metric(service_key, metric):
+    """Points or a summary of one metric over a time range
+
+    Query args: start and end (epoch seconds, default the last 24h),
+    resolution (raw, 1m, 1h or 1d; picked from the range if omitted) and
+    summary=1 for count/min/max/avg/last instead of points.
+    """
+    start = request.args.get('start', type=float)
+    end = request.args.get('end', type=float)
+    if request.args.get('summary'):
+        return jsonify(app.metrics_store.aggregate(service_key, metric, start, end))
+    try:
+        return jsonify(app.metrics_store.query(
+            service_key, metric, start, end,
+            resolution=request.args.get('resolution'),
+            max_points=request.args.get('max_points', 500, type=int)
+        ))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
 @app.route('/api/services/<service_name>/<host>/test', methods=['POST'])
 def test_service(service_name, host):
     """Test service connection"""
@@ -178,12 +622,9 @@ def test_service(service_name, host):
         if 'port' not in config:
             # Try to find port from discovered services
             port = None
-            for h_ip, h_info in app.discovered_services.items():
-                if h_ip == host:
-                    for svc in h_info.get('services', []):
-                        if svc['name'].lower() == service_name.lower():
-                            port = svc['ports'][0] if svc.get('ports') else None
-                            break
+            svc = _find_discovered_service(service_name, host)
+            if svc and svc.get('ports'):
+                port = svc['ports'][0]
             
             # If not found in discovered, use service defaults
             if port is None:
@@ -207,7 +648,8 @@ def test_service(service_name, host):
         
         # Test the connection
         # test_connection() takes no arguments - the collector already has the config
-        success = collector.test_connection()
+        with collector:
+            success = collector.test_connection()
         
         if success:
             return jsonify({
@@ -233,69 +675,101 @@ def get_service_definitions():
 
 @app.route('/api/generate', methods=['POST'])
 def generate_documentation():
-    """Generate documentation"""
-    data = request.json
+    """Generate documentation
+
+    Returns the zip directly, or with ``"async": true`` queues a job whose
+    zip is fetched from /api/jobs/<job_id>/download when it finishes.
+    """
+    data = request.json or {}
     options = data.get('options', {})
     
+    if data.get('async'):
+        job = app.jobs.submit("generate", {"options": options})
+        return jsonify({"status": "Documentation queued", "job_id": job.id}), 202
+    
     # Create temporary directory
     with tempfile.TemporaryDirectory() as temp_dir:
         try:
-            # Generate documentation
-            generator = DocumentationGenerator(temp_dir)
-            results = generator.generate_all(
-                app.discovered_services,
-                app.service_configs,
-                app.collected_data
-            )
-            
-            # Export additional formats
-            if options.get('json', True):
-                generator.export_to_json(
-                    app.discovered_services,
-                    app.service_configs,
-                    app.collected_data
-                )
-            
-            if options.get('html', True):
-                generator.export_to_html_dashboard(
-                    app.discovered_services,
-                    app.service_configs
-                )
-            
-            # Create zip file
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            zip_filename = f"ladashy_docs_{timestamp}.zip"
-            zip_path = Path(temp_dir) / zip_filename
-            
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        if file != zip_filename:
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(file_path, temp_dir)
-                            zipf.write(file_path, arcname)
-            
+            zip_path = _build_documentation(options, temp_dir)
             return send_file(
                 zip_path,
                 as_attachment=True,
-                download_name=zip_filename,
+                download_name=zip_path.name,
                 mimetype='application/zip'
             )
             
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
+def run_generate(job):
+    """Generate job: build the documentation zip into the exports directory"""
+    os.makedirs(EXPORTS_DIR, exist_ok=True)
+    # Zips outlive their jobs' retention otherwise
+    cutoff = datetime.now().timestamp() - app.jobs.retention_days * 86400
+    for name in os.listdir(EXPORTS_DIR):
+        path = os.path.join(EXPORTS_DIR, name)
+        if os.path.getmtime(path) < cutoff:
+            os.remove(path)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        zip_path = _build_documentation(job.params.get("options", {}), temp_dir)
+        destination = os.path.join(EXPORTS_DIR, f"{job.job_id}.zip")
+        shutil.move(str(zip_path), destination)
+    return {"path": destination, "filename": zip_path.name}
+
+def _build_documentation(options, temp_dir):
+    """Generate documentation into ``temp_dir`` and zip it; returns the zip's path"""
+    # Generate from one consistent snapshot
+    inventory = app.inventory.snapshot()
+    discovered_services = dict(inventory.hosts)
+    service_configs = dict(inventory.configs)
+    collected_data = dict(inventory.collected)
+    
+    # Generate documentation
+    generator = DocumentationGenerator(temp_dir)
+    generator.generate_all(
+        discovered_services,
+        service_configs,
+        collected_data
+    )
+    
+    # Export additional formats
+    if options.get('json', True):
+        generator.export_to_json(
+            discovered_services,
+            service_configs,
+            collected_data
+        )
+    
+    if options.get('html', True):
+        generator.export_to_html_dashboard(
+            discovered_services,
+            service_configs
+        )
+    
+    # Create zip file
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    zip_filename = f"ladashy_docs_{timestamp}.zip"
+    zip_path = Path(temp_dir) / zip_filename
+    
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for root, dirs, files in os.walk(temp_dir):
+            for file in files:
+                if file != zip_filename:
+                    file_path = os.path.join(root, file)
+                    arcname = os.path.relpath(file_path, temp_dir)
+                    zipf.write(file_path, arcname)
+    return zip_path
+
 @app.route('/api/state/save', methods=['POST'])
 def save_state():
     """Save current state"""
     state = {
-        'discovered_services': app.discovered_services,
-        'service_configs': app.service_configs,
-        'collected_data': app.collected_data,
+        **app.inventory.snapshot().as_dict(),
         'timestamp': datetime.now().isoformat()
     }
     
-    state_file = os.path.expanduser("~/.ladashy/state_backup.json")
+    state_file = data_path("state_backup.json")
     os.makedirs(os.path.dirname(state_file), exist_ok=True)
     
     with open(state_file, 'w') as f:
@@ -306,24 +780,27 @@ def save_state():
 @app.route('/api/state/load', methods=['POST'])
 def load_state():
     """Load saved state"""
-    state_file = os.path.expanduser("~/.ladashy/state_backup.json")
+    state_file = data_path("state_backup.json")
     
     if os.path.exists(state_file):
         with open(state_file, 'r') as f:
             state = json.load(f)
         
-        app.discovered_services = state.get('discovered_services', {})
-        app.service_configs = state.get('service_configs', {})
-        app.collected_data = state.get('collected_data', {})
+        app.inventory.load(state)
         
         return jsonify({
             "status": "State loaded",
             "timestamp": state.get('timestamp'),
-            "services": sum(len(h.get('services', [])) for h in app.discovered_services.values())
+            "services": app.inventory.snapshot().service_count
         })
     else:
         return jsonify({"error": "No saved state found"}), 404
 
+# Job handlers; the queue only runs them in the leader process
+app.jobs.register("scan", run_scan)
+app.jobs.register("collect", run_collection)
+app.jobs.register("generate", run_generate)
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("🚀 LaDashy API Server Starting...")
@@ -332,4 +809,8 @@ if __name__ == '__main__':
     print(f"🌐 Web UI: http://localhost:8080/")
     print("="*50 + "\n")
     
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    start_background_services()
+    try:
+        app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+    finally:
+        stop_background_services()
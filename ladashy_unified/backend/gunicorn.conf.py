@@ -0,0 +1,53 @@
+"""
+Gunicorn settings for serving the LaDashy API in production
+
+    gunicorn -c backend/gunicorn.conf.py
+
+Workers are separate processes sharing state through state.db in the data
+directory (``LADASHY_DATA_DIR``, by default ~/.ladashy), and each runs a
+pool of threads so long-lived event streams don't tie up a whole worker.
+Bind address and pool sizes can be set from the environment.
+"""
+import multiprocessing
+import os
+import signal
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+wsgi_app = "api:app"
+
+bind = os.environ.get("LADASHY_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("LADASHY_WORKERS", min(multiprocessing.cpu_count(), 4)))
+worker_class = "gthread"
+# Each open /api/events stream holds a thread for as long as the page is open
+threads = int(os.environ.get("LADASHY_THREADS", 32))
+keepalive = 5
+timeout = 60
+graceful_timeout = 30
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("LADASHY_LOG_LEVEL", "info")
+
+
+def post_worker_init(worker):
+    """Start the scheduler election and stop background work on shutdown"""
+    import api
+
+    api.start_background_services()
+
+    # Gunicorn's own SIGTERM handler only stops accepting requests; end the
+    # event streams first so the graceful shutdown doesn't wait on them
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(signum, frame):
+        api.stop_background_services()
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
+
+
+def worker_exit(server, worker):
+    import api
+
+    api.stop_background_services()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Address iteration benchmark
+
+Compares peak memory and time of the old way of preparing a sweep - counting
+``net.hosts()`` and materialising every address - with arithmetic generation,
+then feeds a large prefix through the discovery engine's bounded window with
+an instant fake probe to show memory stays flat during the sweep itself.
+
+Usage: python benchmarks/bench_address_iteration.py [--network 10.0.0.0/12]
+"""
+import argparse
+import asyncio
+import ipaddress
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from homelab_wizard.core.address_space import host_span, iter_hosts
+from homelab_wizard.core.host_discovery import HostDiscovery
+
+
+class _InstantDiscovery(HostDiscovery):
+    """Addresses ending in .7 answer, without touching the network"""
+
+    async def is_alive(self, ip):
+        await asyncio.sleep(0)
+        return ip.endswith(".7")
+
+
+def _measure(label, func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<28} {elapsed:8.2f}s  peak {peak / 2**20:8.1f} MiB  ({result})")
+
+
+def _legacy(network):
+    net = ipaddress.ip_network(network)
+    total = sum(1 for _ in net.hosts())
+    addresses = [str(ip) for ip in net.hosts()]
+    return f"{total} hosts, {len(addresses)} queued"
+
+
+def _arithmetic(network):
+    _, total = host_span(network)
+    queued = sum(1 for _ in iter_hosts(network))
+    return f"{total} hosts, {queued} generated"
+
+
+def _windowed_sweep(network):
+    discovery = _InstantDiscovery(probe_ports=[80], use_icmp=False, max_concurrency=1024)
+
+    async def run():
+        found = 0
+        async for _ in discovery.iter_alive(iter_hosts(network)):
+            found += 1
+        return found
+
+    return f"{asyncio.run(run())} live"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--network", default="10.0.0.0/12")
+    parser.add_argument("--sweep-network", default="10.0.0.0/16",
+                        help="prefix for the windowed sweep (a /12 takes minutes)")
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    print(f"Preparing {args.network}:")
+    if not args.skip_legacy:
+        _measure("net.hosts() count + list", lambda: _legacy(args.network))
+    _measure("arithmetic generation", lambda: _arithmetic(args.network))
+
+    print(f"Windowed sweep of {args.sweep_network}:")
+    _measure("iter_alive + iter_hosts", lambda: _windowed_sweep(args.sweep_network))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Radarr collector memory benchmark
+
+Serves a large /api/v3/movie fixture from a local fake Radarr and compares
+peak Python memory and wall time of loading the whole list with .json()
+against the streaming RadarrCollector. Pass --fixture to replay a recorded
+response instead of the generated one.
+
+Usage: python benchmarks/bench_arr_collectors.py [--movies N] [--fixture movie.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from homelab_wizard.collectors.radarr_collector import RadarrCollector
+
+
+def _movie(i):
+    """A movie shaped like Radarr's v3 resource, padded to a realistic size"""
+    return {
+        "id": i,
+        "title": f"Movie {i}",
+        "originalTitle": f"Movie {i}",
+        "alternateTitles": [{"sourceType": "tmdb", "title": f"Alt {i}-{n}"} for n in range(5)],
+        "sortTitle": f"movie {i}",
+        "sizeOnDisk": 4_000_000_000 + i,
+        "status": "released",
+        "overview": "A film about benchmarks. " * 20,
+        "images": [{"coverType": kind, "url": f"/MediaCover/{i}/{kind}.jpg",
+                    "remoteUrl": f"https://image.tmdb.org/t/p/original/{i}{kind}.jpg"}
+                   for kind in ("poster", "fanart")],
+        "year": 1950 + i % 75,
+        "path": f"/movies/Movie {i} ({1950 + i % 75})",
+        "qualityProfileId": 1,
+        "monitored": i % 3 != 0,
+        "hasFile": i % 2 == 0,
+        "tmdbId": 100000 + i,
+        "imdbId": f"tt{1000000 + i}",
+        "genres": ["Drama", "Thriller"],
+        "tags": [],
+        "ratings": {"imdb": {"votes": i, "value": 7.1}, "tmdb": {"votes": i, "value": 6.9}},
+        "movieFile": {
+            "relativePath": f"Movie {i}.mkv",
+            "size": 4_000_000_000 + i,
+            "mediaInfo": {"videoCodec": "x265", "audioCodec": "EAC3", "resolution": "3840x2160"},
+            "quality": {"quality": {"id": 19, "name": "Bluray-2160p"}},
+        } if i % 2 == 0 else None,
+    }
+
+
+def _write_fixture(path, count):
+    with open(path, "w") as f:
+        f.write("[")
+        for i in range(count):
+            if i:
+                f.write(",")
+            json.dump(_movie(i), f)
+        f.write("]")
+
+
+def _serve(fixture):
+    class FakeRadarr(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/api/v3/movie":
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(os.path.getsize(fixture)))
+                self.end_headers()
+                with open(fixture, "rb") as f:
+                    shutil.copyfileobj(f, self.wfile)
+                return
+            body = {"/api/v3/rootfolder": [], "/api/v3/queue": {"totalRecords": 0}}.get(path, {})
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeRadarr)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {elapsed:7.2f}s  peak {peak / 1024 / 1024:8.1f} MiB  -> {result}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--movies", type=int, default=20000)
+    parser.add_argument("--fixture", help="Recorded /api/v3/movie response to replay")
+    args = parser.parse_args()
+
+    tmpdir = None
+    fixture = args.fixture
+    if not fixture:
+        tmpdir = tempfile.mkdtemp()
+        fixture = os.path.join(tmpdir, "movie.json")
+        _write_fixture(fixture, args.movies)
+    print(f"Fixture: {fixture} ({os.path.getsize(fixture) / 1024 / 1024:.1f} MiB)")
+
+    server = _serve(fixture)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    def load_all():
+        movies = requests.get(f"{base_url}/api/v3/movie", timeout=60).json()
+        return {
+            "total_movies": len(movies),
+            "monitored_movies": sum(1 for m in movies if m.get("monitored")),
+            "downloaded_movies": sum(1 for m in movies if m.get("hasFile")),
+        }
+
+    def stream():
+        collector = RadarrCollector({"host": "127.0.0.1", "port": server.server_port, "timeout": 60})
+        detailed = collector.collect_detailed_info()
+        return {key: detailed.get(key) for key in ("total_movies", "monitored_movies", "downloaded_movies")}
+
+    try:
+        _measure("load whole list", load_all)
+        _measure("streaming collector", stream)
+    finally:
+        server.shutdown()
+        if tmpdir:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Host discovery benchmark
+
+Times the asyncio discovery engine against the legacy ping-per-address sweep
+on a /24 and a /20 of loopback addresses. A local fake-host responder listens
+on every Nth address so the engine has real hosts to find.
+
+Usage: python benchmarks/bench_host_discovery.py [--skip-legacy] [--every N]
+"""
+import argparse
+import asyncio
+import ipaddress
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from homelab_wizard.core.host_discovery import HostDiscovery
+from homelab_wizard.core.scanner import NetworkScanner
+
+PROBE_PORT = 18080
+NETWORKS = ["127.77.0.0/24", "127.78.0.0/20"]
+
+
+async def _start_responders(addresses):
+    """Bind one tiny TCP server per fake host"""
+    async def handle(reader, writer):
+        writer.close()
+
+    servers = []
+    for ip in addresses:
+        servers.append(await asyncio.start_server(handle, ip, PROBE_PORT))
+    return servers
+
+
+async def _bench_engine(network, every):
+    hosts = [str(ip) for ip in ipaddress.ip_network(network).hosts()]
+    fake_hosts = hosts[::every]
+    servers = await _start_responders(fake_hosts)
+    try:
+        # Loopback answers every address with a RST, so only count real
+        # handshakes as live hosts here.
+        discovery = HostDiscovery(probe_ports=[PROBE_PORT], timeout=1.0,
+                                  use_icmp=False, refused_is_alive=False)
+        start = time.perf_counter()
+        found = await discovery.sweep(hosts)
+        elapsed = time.perf_counter() - start
+    finally:
+        for server in servers:
+            server.close()
+    return len(hosts), len(fake_hosts), len(found), elapsed
+
+
+def _bench_legacy(network):
+    scanner = NetworkScanner()
+    hosts = [str(ip) for ip in ipaddress.ip_network(network).hosts()]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=scanner.max_threads) as executor:
+        found = [ip for ip, alive in zip(hosts, executor.map(scanner._ping_host, hosts)) if alive]
+    return len(found), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the asyncio engine")
+    parser.add_argument("--every", type=int, default=16, help="Run a fake host on every Nth address")
+    args = parser.parse_args()
+
+    run_legacy = not args.skip_legacy and shutil.which("ping")
+
+    print(f"{'network':<18}{'engine':<10}{'hosts':>8}{'found':>8}{'seconds':>10}{'hosts/s':>10}")
+    for network in NETWORKS:
+        total, expected, found, elapsed = asyncio.run(_bench_engine(network, args.every))
+        print(f"{network:<18}{'asyncio':<10}{total:>8}{found:>8}{elapsed:>10.2f}{total / elapsed:>10.0f}")
+        if found != expected:
+            print(f"  ! expected {expected} live hosts")
+
+        if run_legacy:
+            found, elapsed = _bench_legacy(network)
+            print(f"{network:<18}{'ping':<10}{total:>8}{found:>8}{elapsed:>10.2f}{total / elapsed:>10.0f}")
+
+    if not run_legacy and not args.skip_legacy:
+        print("\nLegacy ping sweep skipped: 'ping' is not installed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Metrics store benchmark
+
+Backfills a year of collections for 50 services into a fresh MetricsStore
+and times range queries and aggregates at every span the dashboard uses.
+
+Usage: python benchmarks/bench_metrics_store.py [--services N] [--days N] [--interval SECONDS]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from homelab_wizard.core.metrics_store import MetricsStore
+
+DAY = 86400
+
+
+def _collection(step):
+    return {
+        "queue_count": random.randint(0, 20),
+        "dns_queries_today": step % 288 * 40,
+        "root_folders": [{"path": "/media", "free_space": 4e12 - step * 1e6, "total_space": 8e12}],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--services", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--interval", type=int, default=3600, help="Seconds between collections")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    store = MetricsStore(os.path.join(tmpdir, "metrics.db"))
+    now = int(time.time())
+    start = now - args.days * DAY
+    services = [f"Service{i}_10.0.0.{i}" for i in range(args.services)]
+
+    began = time.perf_counter()
+    samples = 0
+    for step, ts in enumerate(range(start, now, args.interval)):
+        for service in services:
+            samples += store.record(service, _collection(step), ts)
+    elapsed = time.perf_counter() - began
+    size = os.path.getsize(os.path.join(tmpdir, "metrics.db")) / 1024 / 1024
+    print(f"Backfilled {samples} samples in {elapsed:.1f}s ({samples / elapsed:.0f}/s), {size:.1f} MiB on disk")
+
+    for label, span in [("1 hour", 3600), ("1 day", DAY), ("1 week", 7 * DAY),
+                        ("30 days", 30 * DAY), ("1 year", 365 * DAY)]:
+        began = time.perf_counter()
+        for service in services:
+            result = store.query(service, "dns_queries_today", now - span, now)
+            store.aggregate(service, "root_folders[/media].free_space", now - span, now)
+        per_query = (time.perf_counter() - began) / len(services) / 2 * 1000
+        print(f"{label:<8} {result['resolution']:>4} {len(result['points']):>4} points  {per_query:6.2f} ms/query")
+
+    store.close()
+    shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Load test for /api/services
+
+Hammers the endpoint from many keep-alive connections for a fixed time and
+reports requests/sec, latency percentiles and status codes. Point it at a
+running server, or let it start one (development server or gunicorn) on a
+throwaway home directory seeded with a synthetic inventory.
+
+Usage: python benchmarks/load_test_services.py [--url URL] [--spawn dev|gunicorn]
+           [--hosts N] [--concurrency N] [--duration SECONDS] [--etag]
+"""
+import argparse
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _seed(home, hosts):
+    """Write a synthetic inventory into the shared store under ``home``"""
+    from homelab_wizard.core.inventory import Inventory
+    from homelab_wizard.core.shared_store import SharedStore
+
+    hosts_by_ip = {}
+    for n in range(hosts):
+        ip = f"10.{n // 65536}.{n // 256 % 256}.{n % 256}"
+        hosts_by_ip[ip] = {"ip": ip, "hostname": f"host-{n}", "services": [
+            {"name": "Plex", "host": ip, "ports": [32400]},
+            {"name": "Sonarr", "host": ip, "ports": [8989]},
+        ]}
+    store = SharedStore(os.path.join(home, ".ladashy", "state.db"))
+    Inventory(store=store).replace_hosts(hosts_by_ip)
+    store.close()
+
+
+def _spawn(kind, home, port, workers):
+    env = {**os.environ, "HOME": home, "LADASHY_DATA_DIR": os.path.join(home, ".ladashy"),
+           "LADASHY_BIND": f"127.0.0.1:{port}",
+           "LADASHY_WORKERS": str(workers), "LADASHY_LOG_LEVEL": "warning"}
+    if kind == "gunicorn":
+        command = [sys.executable, "-m", "gunicorn", "-c", "backend/gunicorn.conf.py",
+                   "--access-logfile", "/dev/null"]
+    else:
+        command = [sys.executable, "-c",
+                   f"import api; api.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    return subprocess.Popen(command, cwd=ROOT if kind == "gunicorn" else os.path.join(ROOT, "backend"),
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+
+def _wait_ready(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=5)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def _client(url, deadline, use_etag, latencies, statuses, lock):
+    session = requests.Session()
+    etag = None
+    mine, codes = [], Counter()
+    while time.perf_counter() < deadline:
+        headers = {"If-None-Match": etag} if etag else {}
+        start = time.perf_counter()
+        try:
+            response = session.get(url, headers=headers, timeout=30)
+            response.content
+            codes[response.status_code] += 1
+            if use_etag:
+                etag = response.headers.get("ETag", etag)
+        except requests.RequestException as e:
+            codes[type(e).__name__] += 1
+            continue
+        mine.append(time.perf_counter() - start)
+    with lock:
+        latencies.extend(mine)
+        statuses.update(codes)
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--url", default="http://127.0.0.1:5000/api/services")
+    parser.add_argument("--spawn", choices=["dev", "gunicorn"], help="Start a server to test against")
+    parser.add_argument("--workers", type=int, default=4, help="Gunicorn workers when spawning")
+    parser.add_argument("--hosts", type=int, default=200, help="Hosts to seed when spawning")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--etag", action="store_true", help="Send If-None-Match like a polling browser")
+    args = parser.parse_args()
+
+    server = home = None
+    url = args.url
+    if args.spawn:
+        home = tempfile.mkdtemp()
+        _seed(home, args.hosts)
+        port = 5077
+        url = f"http://127.0.0.1:{port}/api/services"
+        server = _spawn(args.spawn, home, port, args.workers)
+
+    try:
+        _wait_ready(url)
+        latencies, statuses, lock = [], Counter(), threading.Lock()
+        deadline = time.perf_counter() + args.duration
+        clients = [
+            threading.Thread(target=_client, args=(url, deadline, args.etag, latencies, statuses, lock))
+            for _ in range(args.concurrency)
+        ]
+        started = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        if server:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait(timeout=30)
+            shutil.rmtree(home, ignore_errors=True)
+
+    latencies.sort()
+    label = f"{args.spawn} ({args.workers} workers)" if args.spawn == "gunicorn" else (args.spawn or url)
+    print(f"Server: {label}, concurrency {args.concurrency}, {'conditional' if args.etag else 'full'} GETs")
+    print(f"  {len(latencies)} requests in {elapsed:.1f}s: {len(latencies) / elapsed:,.0f} req/s")
+    print(f"  latency p50 {_percentile(latencies, 0.5) * 1000:.1f} ms, "
+          f"p95 {_percentile(latencies, 0.95) * 1000:.1f} ms, "
+          f"p99 {_percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"  status: {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,24 @@ Base collector class for all services
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional, Tuple
 import logging
+import requests
 
 class BaseCollector(ABC):
-    def __init__(self, config: Dict[str, str]):
-        self.config = config
+    def __init__(self, config: Optional[Dict[str, str]] = None):
+        self.config = config or {}
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.timeout = float(self.config.get('timeout', 10))
+        self.session = requests.Session()
+        
+    def close(self):
+        """Close the session's pooled connections"""
+        self.session.close()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc_info):
+        self.close()
         
     @abstractmethod
     def test_connection(self) -> Tuple[bool, str]:
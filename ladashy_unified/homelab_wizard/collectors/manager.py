@@ -1,7 +1,11 @@
 """
 Data collection manager
 """
-from typing import Dict, Any, Optional, Tuple
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from .plex_collector import PlexCollector
 from .radarr_collector import RadarrCollector
 from .sonarr_collector import SonarrCollector
@@ -34,14 +38,18 @@ class CollectorManager:
                     break
         
         if collector_class:
-            return collector_class(config)
+            # Older collectors take host/port/config per call instead
+            if len(inspect.signature(collector_class.__init__).parameters) > 1:
+                return collector_class(config)
+            return collector_class()
         return None
         
     def test_service(self, service_name: str, config: Dict[str, str]) -> Tuple[bool, str]:
         """Test connection to a service"""
         collector = self.get_collector(service_name, config)
         if collector:
-            return collector.test_connection()
+            with collector:
+                return collector.test_connection()
         else:
             # Fallback to generic test
             from ..core.connection_tester import ConnectionTester
@@ -52,9 +60,88 @@ class CollectorManager:
         """Collect all data from a service"""
         collector = self.get_collector(service_name, config)
         if collector:
-            return collector.collect_all()
+            with collector:
+                return collector.collect_all()
         else:
             return {
                 "status": "error",
                 "error": f"No collector available for {service_name}"
             }
+
+    def collect_one(self, service_name: str, host: str, port: int, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Test a service and collect its basic and detailed info
+        
+        Raises LookupError when there is no collector for the service and
+        ConnectionError when the connection test fails.
+        """
+        config = {**config, 'host': host, 'port': port}
+        collector = self.get_collector(service_name, config)
+        if not collector:
+            raise LookupError(f"No collector available for {service_name}")
+        
+        per_call = len(inspect.signature(collector.test_connection).parameters) > 0
+        args = (host, port, config) if per_call else ()
+        
+        # Each collection gets a fresh collector; its connections go with it
+        with collector:
+            connected = collector.test_connection(*args)
+            ok, message = connected if isinstance(connected, tuple) else (connected, "")
+            if not ok:
+                raise ConnectionError(message or f"Could not connect to {service_name}")
+            
+            basic = collector.collect_basic_info(*args)
+            detailed = collector.collect_detailed_info(*args)
+        return {
+            **basic,
+            **detailed,
+            'last_updated': datetime.now().isoformat()
+        }
+    
+    def collect_many(self, targets: List[Dict[str, Any]], max_workers: int = 16,
+                     timeout: float = 30.0,
+                     progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None
+                     ) -> Dict[str, Dict[str, Any]]:
+        """Run many collectors concurrently, each with its own deadline
+        
+        ``targets`` are dicts with key, service, host, port and config; a
+        ``timeout`` in a target's config overrides the default. Every target
+        ends up with an outcome of success, error or timeout, and a failure
+        or hang in one collector never affects the others. Timed-out
+        collectors are abandoned, not waited for.
+        """
+        outcomes = {}
+        started = {}
+        
+        def run(target):
+            started[target['key']] = time.monotonic()
+            return self.collect_one(target['service'], target['host'], target['port'], target['config'])
+        
+        def finish(key, outcome):
+            outcome['duration'] = round(time.monotonic() - started.get(key, time.monotonic()), 3)
+            outcomes[key] = outcome
+            if progress_callback:
+                progress_callback(key, outcome)
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            pending = {executor.submit(run, target): target for target in targets}
+            
+            while pending:
+                done, _ = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                for future in done:
+                    target = pending.pop(future)
+                    try:
+                        finish(target['key'], {"status": "success", "data": future.result()})
+                    except Exception as e:
+                        finish(target['key'], {"status": "error", "error": str(e)})
+                
+                now = time.monotonic()
+                for future, target in list(pending.items()):
+                    deadline = float(target['config'].get('timeout', timeout))
+                    if target['key'] in started and now - started[target['key']] > deadline:
+                        pending.pop(future)
+                        finish(target['key'], {"status": "timeout", "error": f"No response within {deadline:g}s"})
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return outcomes
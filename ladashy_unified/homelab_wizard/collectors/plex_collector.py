@@ -2,26 +2,49 @@
 Plex data collector
 """
 import requests
-from typing import Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
 from .base_collector import BaseCollector
+from ..utils.http import create_session
 
 class PlexCollector(BaseCollector):
+    # Library counts fetched at once; Plex handles a handful of parallel requests well
+    MAX_PARALLEL_REQUESTS = 8
+
     def __init__(self, config: Dict[str, str]):
         super().__init__(config)
         self.base_url = f"http://{config['host']}:{config.get('port', '32400')}"
-        self.headers = {}
+        self.headers = {'Accept': 'application/json'}
         if 'token' in config:
             self.headers['X-Plex-Token'] = config['token']
-    
+
+        # Keep-alive connections to the one server, shared by all requests
+        self.session = create_session(
+            max_hosts=1,
+            per_host_connections=self.MAX_PARALLEL_REQUESTS,
+            verify=True
+        )
+        self.session.headers.update(self.headers)
+        self._identity = None
+
+    def _get(self, path: str, **params) -> requests.Response:
+        return self.session.get(f"{self.base_url}{path}", params=params or None, timeout=self.timeout)
+
+    def _fetch_identity(self) -> Optional[Dict[str, Any]]:
+        """Server identity, fetched once per collection cycle"""
+        if self._identity is None:
+            response = self._get("/identity")
+            if response.status_code != 200:
+                return None
+            self._identity = response.json()
+        return self._identity
+
     def test_connection(self) -> Tuple[bool, str]:
         """Test Plex connection"""
         try:
-            response = requests.get(
-                f"{self.base_url}/identity",
-                headers=self.headers,
-                timeout=5
-            )
+            response = self._get("/identity")
             if response.status_code == 200:
+                self._identity = response.json()
                 return True, "Connected to Plex"
             elif response.status_code == 401:
                 return False, "Authentication failed - check token"
@@ -29,22 +52,16 @@ class PlexCollector(BaseCollector):
                 return False, f"HTTP {response.status_code}"
         except Exception as e:
             return False, str(e)
-    
+
     def collect_basic_info(self) -> Dict[str, Any]:
         """Collect basic Plex information"""
         try:
             # Server identity
-            identity = requests.get(
-                f"{self.base_url}/identity",
-                headers=self.headers
-            ).json()
-            
+            identity = self._fetch_identity() or {}
+
             # Server preferences
-            prefs = requests.get(
-                f"{self.base_url}/:/prefs",
-                headers=self.headers
-            ).json()
-            
+            prefs = self._get("/:/prefs").json()
+
             return {
                 "server_name": identity.get("MediaContainer", {}).get("machineIdentifier"),
                 "version": identity.get("MediaContainer", {}).get("version"),
@@ -53,50 +70,59 @@ class PlexCollector(BaseCollector):
             }
         except Exception as e:
             return {"error": str(e)}
-    
+
+    def _library_item_count(self, key: str) -> Optional[int]:
+        """Item count of one library without downloading its items"""
+        try:
+            response = self._get(
+                f"/library/sections/{key}/all",
+                **{"X-Plex-Container-Start": 0, "X-Plex-Container-Size": 0}
+            )
+            if response.status_code == 200:
+                return response.json().get("MediaContainer", {}).get("totalSize", 0)
+        except Exception as e:
+            self.logger.warning(f"Could not count Plex library {key}: {e}")
+        return None
+
     def collect_detailed_info(self) -> Dict[str, Any]:
         """Collect detailed Plex information"""
         try:
             detailed = {}
-            
+
             # Libraries
-            libraries_resp = requests.get(
-                f"{self.base_url}/library/sections",
-                headers=self.headers
-            )
+            libraries_resp = self._get("/library/sections")
             if libraries_resp.status_code == 200:
                 libraries_data = libraries_resp.json()
+                libraries = libraries_data.get("MediaContainer", {}).get("Directory", [])
                 detailed['libraries'] = []
-                
-                for lib in libraries_data.get("MediaContainer", {}).get("Directory", []):
+
+                # Get library stats for all libraries at once
+                counts = []
+                if libraries:
+                    workers = min(self.MAX_PARALLEL_REQUESTS, len(libraries))
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        counts = list(executor.map(
+                            self._library_item_count, [lib['key'] for lib in libraries]
+                        ))
+
+                for lib, item_count in zip(libraries, counts):
                     lib_info = {
                         "title": lib.get("title"),
                         "type": lib.get("type"),
                         "key": lib.get("key"),
                         "locations": lib.get("Location", [])
                     }
-                    
-                    # Get library stats
-                    stats_resp = requests.get(
-                        f"{self.base_url}/library/sections/{lib['key']}/all",
-                        headers=self.headers,
-                        params={"X-Plex-Container-Size": 0}
-                    )
-                    if stats_resp.status_code == 200:
-                        stats_data = stats_resp.json()
-                        lib_info['item_count'] = stats_data.get("MediaContainer", {}).get("totalSize", 0)
-                    
+                    if item_count is not None:
+                        lib_info['item_count'] = item_count
+
                     detailed['libraries'].append(lib_info)
-            
+
             # Active sessions
-            sessions_resp = requests.get(
-                f"{self.base_url}/status/sessions",
-                headers=self.headers
-            )
+            sessions_resp = self._get("/status/sessions")
             if sessions_resp.status_code == 200:
                 sessions_data = sessions_resp.json()
                 detailed['active_sessions'] = sessions_data.get("MediaContainer", {}).get("size", 0)
-            
+
             return detailed
         except Exception as e:
             return {"error": str(e)}
@@ -2,8 +2,9 @@
 Radarr data collector
 """
 import requests
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Iterator, Tuple
 from .base_collector import BaseCollector
+from ..utils.json_stream import stream_json_array
 
 class RadarrCollector(BaseCollector):
     def __init__(self, config: Dict[str, str]):
@@ -14,14 +15,33 @@ class RadarrCollector(BaseCollector):
         self.headers = {}
         if 'api_key' in config:
             self.headers['X-Api-Key'] = config['api_key']
+        self.session.headers.update(self.headers)
+
+    def _get(self, path: str, **params) -> requests.Response:
+        response = self.session.get(f"{self.base_url}{path}", params=params or None, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def _iter_items(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Stream the items of a list endpoint without holding the whole body"""
+        response = self.session.get(f"{self.base_url}{path}", stream=True, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+        return stream_json_array(response)
+
+    def _queue_count(self) -> int:
+        """Queue size from the paged endpoint's total, fetching a single record"""
+        return self._get("/api/v3/queue", page=1, pageSize=1).json().get('totalRecords', 0)
     
     def test_connection(self) -> Tuple[bool, str]:
         """Test Radarr connection"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v3/system/status",
-                headers=self.headers,
-                timeout=5
+                timeout=min(self.timeout, 5)
             )
             if response.status_code == 200:
                 return True, "Connected to Radarr"
@@ -36,10 +56,7 @@ class RadarrCollector(BaseCollector):
         """Collect basic Radarr information"""
         try:
             # System status
-            status = requests.get(
-                f"{self.base_url}/api/v3/system/status",
-                headers=self.headers
-            ).json()
+            status = self._get("/api/v3/system/status").json()
             
             return {
                 "version": status.get("version"),
@@ -55,21 +72,19 @@ class RadarrCollector(BaseCollector):
         try:
             detailed = {}
             
-            # Movie statistics
-            movies = requests.get(
-                f"{self.base_url}/api/v3/movie",
-                headers=self.headers
-            ).json()
-            
-            detailed['total_movies'] = len(movies)
-            detailed['monitored_movies'] = sum(1 for m in movies if m.get('monitored'))
-            detailed['downloaded_movies'] = sum(1 for m in movies if m.get('hasFile'))
+            # Movie statistics, counted one movie at a time as the list streams in
+            total = monitored = downloaded = 0
+            for movie in self._iter_items("/api/v3/movie"):
+                total += 1
+                monitored += bool(movie.get('monitored'))
+                downloaded += bool(movie.get('hasFile'))
+
+            detailed['total_movies'] = total
+            detailed['monitored_movies'] = monitored
+            detailed['downloaded_movies'] = downloaded
             
             # Root folders
-            root_folders = requests.get(
-                f"{self.base_url}/api/v3/rootfolder",
-                headers=self.headers
-            ).json()
+            root_folders = self._get("/api/v3/rootfolder").json()
             
             detailed['root_folders'] = [
                 {
@@ -81,12 +96,7 @@ class RadarrCollector(BaseCollector):
             ]
             
             # Queue info
-            queue = requests.get(
-                f"{self.base_url}/api/v3/queue",
-                headers=self.headers
-            ).json()
-            
-            detailed['queue_count'] = queue.get('totalRecords', 0)
+            detailed['queue_count'] = self._queue_count()
             
             return detailed
         except Exception as e:
@@ -0,0 +1,253 @@
+"""
+Background collection scheduler
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+from .manager import CollectorManager
+
+SCHEDULE_KEY = "collect.schedule"
+TRIGGERS_KEY = "collect.triggers"
+
+DEFAULT_INTERVAL = 300.0
+MAX_BACKOFF = 3600.0
+
+
+@dataclass
+class ScheduleEntry:
+    """Scheduling state of one collection target"""
+    key: str
+    service: str
+    host: str
+    interval: float
+    next_run: float
+    last_run: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_success: Optional[float] = None
+    last_error: Optional[str] = None
+    failures: int = 0
+    running: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        for field in ('next_run', 'last_run', 'last_success'):
+            if data[field] is not None:
+                data[field] = datetime.fromtimestamp(data[field]).isoformat()
+        return data
+
+
+class CollectionScheduler:
+    """Periodically re-runs collectors so readers always get a recent snapshot
+
+    Targets come from ``targets_provider`` (the same dicts as
+    ``CollectorManager.collect_many``) and are re-read every loop, so newly
+    configured services are picked up without a restart. A target's config
+    may set ``interval`` in seconds. Failing services back off exponentially
+    up to ``max_backoff``, and every delay is spread by ``jitter`` so
+    services configured together don't all fire at once.
+
+    With a shared ``store`` the running scheduler publishes its state there
+    and picks up triggers from it, so server workers that don't run the
+    scheduler can still report and trigger collections.
+    """
+
+    def __init__(self, targets_provider: Callable[[], List[Dict[str, Any]]],
+                 on_result: Callable[[str, Dict[str, Any]], None],
+                 manager: Optional[CollectorManager] = None,
+                 default_interval: float = DEFAULT_INTERVAL, jitter: float = 0.1,
+                 max_backoff: float = MAX_BACKOFF, max_workers: int = 8,
+                 store=None, poll_interval: float = 1.0):
+        self.targets_provider = targets_provider
+        self.on_result = on_result
+        self.manager = manager or CollectorManager()
+        self.default_interval = default_interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.max_workers = max_workers
+        self.store = store
+        # How often the running scheduler checks the store for triggers
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._entries: Dict[str, ScheduleEntry] = {}
+        self._targets: Dict[str, Dict[str, Any]] = {}
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self._executor = None
+        self._published = None
+        self._trigger_revision = 0
+
+    def start(self):
+        """Start the scheduler thread; safe to call more than once"""
+        with self._wakeup:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="collector")
+            self._thread = threading.Thread(target=self._loop, name="collection-scheduler",
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """Stop scheduling; collections already running are allowed to finish"""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        if self._thread and wait:
+            self._thread.join()
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def trigger(self, key: Optional[str] = None):
+        """Make one target (or all of them) due immediately"""
+        if self.store is not None and not self.running:
+            # Left for whichever process runs the scheduler
+            self.store.update(TRIGGERS_KEY, lambda keys: (keys or []) + [key])
+            return
+        with self._wakeup:
+            self._sync_targets()
+            self._make_due(key)
+            self._wakeup.notify_all()
+
+    def state(self) -> Dict[str, Dict[str, Any]]:
+        """Schedule state of every target"""
+        if self.store is not None and not self.running:
+            published = self.store.get(SCHEDULE_KEY, {})
+            return {key: ScheduleEntry(**entry).as_dict() for key, entry in published.items()}
+        with self._wakeup:
+            self._sync_targets()
+            return {key: entry.as_dict() for key, entry in self._entries.items()}
+
+    def _make_due(self, key: Optional[str]):
+        for entry in self._entries.values():
+            if key is None or entry.key == key:
+                entry.next_run = time.time()
+
+    def _take_triggers(self):
+        """Apply triggers other processes left in the store"""
+        revision = self.store.revisions([TRIGGERS_KEY])[TRIGGERS_KEY]
+        if revision == self._trigger_revision:
+            return
+        with self.store.transaction():
+            keys = self.store.get(TRIGGERS_KEY) or []
+            if keys:
+                self.store.set(TRIGGERS_KEY, [])
+            self._trigger_revision = self.store.revisions([TRIGGERS_KEY])[TRIGGERS_KEY]
+        for key in keys:
+            self._make_due(key)
+
+    def _publish(self):
+        """Share the schedule state with other processes when it changed"""
+        state = {key: asdict(entry) for key, entry in self._entries.items()}
+        if state != self._published:
+            self.store.set(SCHEDULE_KEY, state)
+            self._published = state
+
+    def _delay(self, base: float) -> float:
+        return base * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _interval_for(self, target: Dict[str, Any]) -> float:
+        return float(target['config'].get('interval', self.default_interval))
+
+    def _sync_targets(self):
+        """Add new targets, drop removed ones and pick up interval changes"""
+        targets = {t['key']: t for t in self.targets_provider()}
+        now = time.time()
+        for key in list(self._entries):
+            if key not in targets:
+                del self._entries[key]
+        for key, target in targets.items():
+            interval = self._interval_for(target)
+            entry = self._entries.get(key)
+            if entry is None:
+                # Spread the first runs over a short window
+                self._entries[key] = ScheduleEntry(
+                    key=key, service=target['service'], host=target['host'],
+                    interval=interval, next_run=now + random.uniform(0, min(interval, 5.0) * self.jitter)
+                )
+            elif entry.interval != interval:
+                entry.interval = interval
+                if not entry.failures:
+                    entry.next_run = min(entry.next_run, now + self._delay(interval))
+        self._targets = targets
+
+    def _loop(self):
+        while True:
+            with self._wakeup:
+                if self._stopping:
+                    return
+                try:
+                    self._sync_targets()
+                except Exception as e:
+                    self.logger.error(f"Could not read collection targets: {e}")
+                if self.store is not None:
+                    try:
+                        self._take_triggers()
+                    except Exception as e:
+                        self.logger.error(f"Could not read collection triggers: {e}")
+
+                now = time.time()
+                for entry in self._entries.values():
+                    if not entry.running and entry.next_run <= now:
+                        entry.running = True
+                        self._executor.submit(self._run, self._targets[entry.key])
+
+                if self.store is not None:
+                    try:
+                        self._publish()
+                    except Exception as e:
+                        self.logger.error(f"Could not publish the collection schedule: {e}")
+
+                upcoming = [e.next_run for e in self._entries.values() if not e.running]
+                timeout = min(upcoming, default=now + 5.0) - now
+                # Re-check targets at least every few seconds, and the store
+                # for triggers more often than that
+                longest = self.poll_interval if self.store is not None else 5.0
+                self._wakeup.wait(max(0.05, min(timeout, longest)))
+
+    def _run(self, target: Dict[str, Any]):
+        key = target['key']
+        started = time.time()
+        error = None
+        try:
+            data = self.manager.collect_one(target['service'], target['host'],
+                                            target['port'], target['config'])
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+
+        if error is None:
+            try:
+                self.on_result(key, data)
+            except Exception as e:
+                self.logger.error(f"Storing collected data for {key} failed: {e}")
+
+        finished = time.time()
+        with self._wakeup:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.running = False
+            entry.last_run = started
+            entry.last_duration = round(finished - started, 3)
+            if error is None:
+                entry.failures = 0
+                entry.last_error = None
+                entry.last_success = finished
+                entry.next_run = finished + self._delay(entry.interval)
+            else:
+                entry.failures += 1
+                entry.last_error = error
+                backoff = min(entry.interval * 2 ** entry.failures, self.max_backoff)
+                entry.next_run = finished + self._delay(max(backoff, entry.interval))
+            self._wakeup.notify_all()
@@ -2,8 +2,9 @@
 Sonarr data collector
 """
 import requests
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Iterator, Tuple
 from .base_collector import BaseCollector
+from ..utils.json_stream import stream_json_array
 
 class SonarrCollector(BaseCollector):
     def __init__(self, config: Dict[str, str]):
@@ -14,14 +15,33 @@ class SonarrCollector(BaseCollector):
         self.headers = {}
         if 'api_key' in config:
             self.headers['X-Api-Key'] = config['api_key']
+        self.session.headers.update(self.headers)
+
+    def _get(self, path: str, **params) -> requests.Response:
+        response = self.session.get(f"{self.base_url}{path}", params=params or None, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def _iter_items(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Stream the items of a list endpoint without holding the whole body"""
+        response = self.session.get(f"{self.base_url}{path}", stream=True, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+        return stream_json_array(response)
+
+    def _queue_count(self) -> int:
+        """Queue size from the paged endpoint's total, fetching a single record"""
+        return self._get("/api/v3/queue", page=1, pageSize=1).json().get('totalRecords', 0)
     
     def test_connection(self) -> Tuple[bool, str]:
         """Test Sonarr connection"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v3/system/status",
-                headers=self.headers,
-                timeout=5
+                timeout=min(self.timeout, 5)
             )
             if response.status_code == 200:
                 return True, "Connected to Sonarr"
@@ -35,10 +55,7 @@ class SonarrCollector(BaseCollector):
     def collect_basic_info(self) -> Dict[str, Any]:
         """Collect basic Sonarr information"""
         try:
-            status = requests.get(
-                f"{self.base_url}/api/v3/system/status",
-                headers=self.headers
-            ).json()
+            status = self._get("/api/v3/system/status").json()
             
             return {
                 "version": status.get("version"),
@@ -53,40 +70,29 @@ class SonarrCollector(BaseCollector):
         try:
             detailed = {}
             
-            # Series statistics
-            series = requests.get(
-                f"{self.base_url}/api/v3/series",
-                headers=self.headers
-            ).json()
-            
-            detailed['total_series'] = len(series)
-            detailed['monitored_series'] = sum(1 for s in series if s.get('monitored'))
-            
-            # Episode statistics
+            # Series and episode statistics, counted as the list streams in
+            total_series = 0
+            monitored_series = 0
             total_episodes = 0
             downloaded_episodes = 0
-            
-            for show in series:
+
+            for show in self._iter_items("/api/v3/series"):
+                total_series += 1
+                monitored_series += bool(show.get('monitored'))
                 stats = show.get('statistics', {})
                 total_episodes += stats.get('totalEpisodeCount', 0)
                 downloaded_episodes += stats.get('episodeFileCount', 0)
-                
+
+            detailed['total_series'] = total_series
+            detailed['monitored_series'] = monitored_series
             detailed['total_episodes'] = total_episodes
             detailed['downloaded_episodes'] = downloaded_episodes
             
             # Queue info
-            queue = requests.get(
-                f"{self.base_url}/api/v3/queue",
-                headers=self.headers
-            ).json()
-            
-            detailed['queue_count'] = queue.get('totalRecords', 0)
+            detailed['queue_count'] = self._queue_count()
             
             # Root folders
-            root_folders = requests.get(
-                f"{self.base_url}/api/v3/rootfolder",
-                headers=self.headers
-            ).json()
+            root_folders = self._get("/api/v3/rootfolder").json()
             
             detailed['root_folders'] = [
                 {
@@ -0,0 +1,67 @@
+"""
+Arithmetic host address generation
+
+Works out a network's host range from its prefix and produces addresses
+from integer offsets, so counting hosts is O(1) and iterating them holds
+one address at a time - no ``IPv4Address`` object per host, and nothing
+that grows with the size of the network.
+"""
+import ipaddress
+from typing import Iterable, Iterator, Optional, Tuple
+
+
+def host_span(network: str) -> Tuple[int, int]:
+    """(first host address as an int, number of hosts) of a network
+
+    Follows ``ip_network(...).hosts()``: the network and broadcast addresses
+    are skipped except in /31 and /32 (and IPv6 only skips the network
+    address), without walking the addresses.
+    """
+    net = ipaddress.ip_network(network)
+    first = int(net.network_address)
+    if net.num_addresses <= 2:
+        return first, net.num_addresses
+    if net.version == 4:
+        return first + 1, net.num_addresses - 2
+    return first + 1, net.num_addresses - 1
+
+
+def networks_overlap(first: Iterable[str], second: Iterable[str]) -> bool:
+    """Whether any network of ``first`` shares addresses with any of ``second``"""
+    def parse(networks):
+        parsed = []
+        for network in networks:
+            try:
+                parsed.append(ipaddress.ip_network(network, strict=False))
+            except ValueError:
+                continue
+        return parsed
+
+    second = parse(second)
+    return any(a.version == b.version and a.overlaps(b) for a in parse(first) for b in second)
+
+
+def format_ipv4(value: int) -> str:
+    return f"{value >> 24}.{value >> 16 & 255}.{value >> 8 & 255}.{value & 255}"
+
+
+def parse_ipv4(address: str) -> int:
+    a, b, c, d = address.split(".")
+    return int(a) << 24 | int(b) << 16 | int(c) << 8 | int(d)
+
+
+def address_codec(network: str):
+    """(to string, from string) converters between addresses and ints"""
+    if ipaddress.ip_network(network).version == 4:
+        return format_ipv4, parse_ipv4
+    return (lambda value: str(ipaddress.IPv6Address(value)),
+            lambda address: int(ipaddress.IPv6Address(address)))
+
+
+def iter_hosts(network: str, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    """Host addresses of a network from offset ``start`` up to ``stop``"""
+    first, count = host_span(network)
+    to_string, _ = address_codec(network)
+    stop = count if stop is None else min(stop, count)
+    for value in range(first + start, first + stop):
+        yield to_string(value)
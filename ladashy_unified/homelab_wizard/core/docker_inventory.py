@@ -0,0 +1,218 @@
+"""
+Live container inventory across Docker daemons
+
+Keeps one persistent API client per daemon (``tcp://`` or ``unix://``),
+whose HTTP connections are pooled and reused, and lists the daemons
+concurrently. When watching, each daemon's events stream keeps its
+containers current: a container that starts, stops or is removed is
+re-read or dropped on its own instead of the daemon being listed again.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+try:
+    import docker
+except ImportError:  # Docker discovery is optional
+    docker = None
+
+from .docker_scanner import container_host_entries, daemon_address, docker_base_url, list_containers
+
+logger = logging.getLogger(__name__)
+
+# Container events after which what it serves may have changed
+CONTAINER_EVENTS = ["create", "start", "restart", "stop", "die", "kill",
+                    "pause", "unpause", "rename", "update", "destroy"]
+
+
+class DockerDaemon:
+    """One daemon's client and the containers last read from it"""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.base_url = docker_base_url(host)
+        self.hostname = urlsplit(self.base_url).hostname or host
+        self.address: Optional[str] = None
+        self.client = None
+        self.containers: Dict[str, Dict] = {}
+        self.error: Optional[str] = None
+        self.synced = threading.Event()
+        self.stream = None
+
+
+class DockerInventory:
+    """Containers of many Docker daemons, optionally kept current from their events
+
+    ``on_change(ip, entry)`` is called from a watcher thread with the new
+    scan-result entry of every address whose container services changed,
+    or ``None`` once an address has none left.
+    """
+
+    def __init__(self, timeout: float = 5.0, max_workers: int = 8, pool_size: int = 4,
+                 watch: bool = False, reconnect_interval: float = 5.0,
+                 on_change: Optional[Callable[[str, Optional[Dict]], None]] = None,
+                 client_factory: Optional[Callable[[str], Any]] = None):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.watch = watch
+        self.reconnect_interval = reconnect_interval
+        self.on_change = on_change
+        self.client_factory = client_factory or self._create_client
+        self._daemons: Dict[str, DockerDaemon] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="docker-inventory")
+
+    def _create_client(self, base_url: str):
+        if docker is None:
+            raise RuntimeError("the docker package is not installed")
+        return docker.APIClient(base_url=base_url, timeout=self.timeout, max_pool_size=self.pool_size)
+
+    @property
+    def hosts(self) -> List[str]:
+        with self._lock:
+            return list(self._daemons)
+
+    def add_hosts(self, hosts: Iterable[str]):
+        """Start tracking daemons, returning once each has been listed (or failed)
+
+        Daemons already tracked are left alone: they are either watched,
+        and so current, or listed again with ``refresh()``.
+        """
+        added = []
+        with self._lock:
+            for host in hosts:
+                if host not in self._daemons:
+                    self._daemons[host] = DockerDaemon(host)
+                    added.append(self._daemons[host])
+        if self.watch:
+            for daemon in added:
+                threading.Thread(target=self._watch, args=(daemon,),
+                                 name=f"docker-events-{daemon.hostname}", daemon=True).start()
+            for daemon in added:
+                daemon.synced.wait(self.timeout * 2)
+        else:
+            list(self._executor.map(self._sync, added))
+
+    def refresh(self, hosts: Optional[Iterable[str]] = None):
+        """List the given (default: all) daemons again, concurrently"""
+        with self._lock:
+            daemons = [self._daemons[host] for host in (hosts or self._daemons) if host in self._daemons]
+        list(self._executor.map(self._sync, daemons))
+
+    def containers(self, host: str) -> List[Dict]:
+        """Containers last read from one daemon"""
+        with self._lock:
+            daemon = self._daemons.get(host)
+            return list(daemon.containers.values()) if daemon else []
+
+    def errors(self) -> Dict[str, str]:
+        """Why each unreachable daemon is unreachable"""
+        with self._lock:
+            return {host: daemon.error for host, daemon in self._daemons.items() if daemon.error}
+
+    def address(self, host: str) -> Optional[str]:
+        """Address a daemon's published ports are reachable on, once connected"""
+        with self._lock:
+            daemon = self._daemons.get(host)
+            return daemon.address if daemon else None
+
+    def host_entries(self, host: str) -> Dict[str, Dict]:
+        """Scan-result entries for one daemon's container services"""
+        with self._lock:
+            daemon = self._daemons.get(host)
+            if daemon is None or daemon.address is None:
+                return {}
+            return container_host_entries(daemon.address, daemon.hostname, list(daemon.containers.values()))
+
+    def services(self) -> Dict[str, Dict]:
+        """Scan-result entries for every daemon's container services"""
+        entries = {}
+        for host in self.hosts:
+            for ip, entry in self.host_entries(host).items():
+                merged = entries.setdefault(ip, {"hostname": entry["hostname"], "services": []})
+                merged["services"].extend(entry["services"])
+        return entries
+
+    def _connect(self, daemon: DockerDaemon):
+        if daemon.client is None:
+            daemon.client = self.client_factory(daemon.base_url)
+            daemon.address = daemon_address(daemon.base_url)
+        return daemon.client
+
+    def _sync(self, daemon: DockerDaemon):
+        """Replace a daemon's containers with a fresh listing"""
+        try:
+            containers = list_containers(self._connect(daemon))
+        except Exception as e:
+            logger.warning("Listing containers on %s failed: %s", daemon.host, e)
+            daemon.error = str(e)
+            return
+        finally:
+            daemon.synced.set()
+        with self._lock:
+            daemon.containers = {container["id"]: container for container in containers}
+            daemon.error = None
+
+    def _watch(self, daemon: DockerDaemon):
+        """Follow a daemon's events until ``close()``, reconnecting after failures"""
+        while not self._stopped.is_set():
+            try:
+                client = self._connect(daemon)
+                # Subscribed before listing, so nothing that happens in
+                # between is missed; replaying an event is harmless
+                daemon.stream = client.events(decode=True, filters={"type": "container", "event": CONTAINER_EVENTS})
+                before = self.host_entries(daemon.host)
+                self._sync(daemon)
+                self._notify(before, self.host_entries(daemon.host))
+                for event in daemon.stream:
+                    self._apply_event(daemon, event)
+            except Exception as e:
+                if not self._stopped.is_set():
+                    logger.warning("Docker events from %s failed: %s", daemon.host, e)
+                    daemon.error = str(e)
+            finally:
+                daemon.synced.set()
+            self._stopped.wait(self.reconnect_interval)
+
+    def _apply_event(self, daemon: DockerDaemon, event: Dict[str, Any]):
+        """Re-read or drop the one container an event is about"""
+        container_id = (event.get("id") or event.get("Actor", {}).get("ID", ""))[:12]
+        if not container_id:
+            return
+        if event.get("Action", event.get("status")) == "destroy":
+            containers = []
+        else:
+            containers = list_containers(daemon.client, filters={"id": [container_id]})
+        before = self.host_entries(daemon.host)
+        with self._lock:
+            daemon.containers.pop(container_id, None)
+            for container in containers:
+                daemon.containers[container["id"]] = container
+        self._notify(before, self.host_entries(daemon.host))
+
+    def _notify(self, before: Dict[str, Dict], after: Dict[str, Dict]):
+        if not self.on_change:
+            return
+        for ip in before.keys() | after.keys():
+            if before.get(ip) != after.get(ip):
+                try:
+                    self.on_change(ip, after.get(ip))
+                except Exception:
+                    logger.exception("Docker inventory change handler failed")
+
+    def close(self):
+        """Stop watching and close every client"""
+        self._stopped.set()
+        with self._lock:
+            daemons = list(self._daemons.values())
+        for daemon in daemons:
+            for closable in (daemon.stream, daemon.client):
+                if closable is not None:
+                    try:
+                        closable.close()
+                    except Exception:
+                        pass
+        self._executor.shutdown(wait=False)
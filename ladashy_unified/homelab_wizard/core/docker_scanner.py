@@ -1,101 +1,247 @@
 """
 Docker-aware network scanner
+
+Reads containers straight from Docker daemons: one bulk listing per host
+returns every container with its image, state, port bindings and
+networks, so a container host is inventoried without being port-swept.
 """
-import docker
-import requests
-from typing import Dict, List, Optional
+import socket
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+try:
+    import docker
+except ImportError:  # Docker discovery is optional
+    docker = None
+
+from ..services.definitions import get_service_by_name
+
+DEFAULT_DOCKER_PORT = 2375
+
+# Image name fragment -> service name
+IMAGE_SERVICES = {
+    'plex': 'Plex',
+    'jellyfin': 'Jellyfin',
+    'radarr': 'Radarr',
+    'sonarr': 'Sonarr',
+    'prowlarr': 'Prowlarr',
+    'bazarr': 'Bazarr',
+    'lidarr': 'Lidarr',
+    'overseerr': 'Overseerr',
+    'tautulli': 'Tautulli',
+    'portainer': 'Portainer',
+    'nginx-proxy': 'Nginx Proxy Manager',
+    'traefik': 'Traefik',
+    'pihole': 'Pi-hole',
+    'grafana': 'Grafana',
+    'prometheus': 'Prometheus',
+    'influxdb': 'InfluxDB',
+    'homeassistant': 'Home Assistant',
+    'mosquitto': 'Mosquitto',
+    'mariadb': 'MariaDB',
+    'postgres': 'PostgreSQL',
+    'redis': 'Redis',
+    'mongo': 'MongoDB',
+}
+
+
+def docker_base_url(host: str, port: int = DEFAULT_DOCKER_PORT) -> str:
+    """Daemon URL for a host name or address, or a full tcp:// / unix:// URL"""
+    return host if "://" in host else f"tcp://{host}:{port}"
+
+
+def image_service(image: str) -> Optional[str]:
+    """Service name an image runs, from its name"""
+    image = image.lower()
+    for key, service_name in IMAGE_SERVICES.items():
+        if key in image:
+            return service_name
+    return None
+
+
+def _local_address() -> str:
+    """This machine's address on the LAN, for daemons reached over a unix socket"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            # No packet is sent; this only picks the outgoing interface
+            sock.connect(("10.255.255.255", 1))
+            return sock.getsockname()[0]
+        except OSError:
+            return "127.0.0.1"
+
+
+def daemon_address(base_url: str) -> str:
+    """Address the published ports of a daemon's containers are reachable on"""
+    parts = urlsplit(base_url)
+    if parts.scheme in ("unix", "npipe") or not parts.hostname:
+        return _local_address()
+    try:
+        return socket.gethostbyname(parts.hostname)
+    except OSError:
+        return parts.hostname
+
+
+def parse_containers(containers: List[Dict[str, Any]], image_tags: Dict[str, str]) -> List[Dict]:
+    """Container summaries from a ``GET /containers/json`` listing"""
+    container_info = []
+    for container in containers:
+        image = container.get('Image', '')
+        if image.startswith('sha256:'):
+            image = image_tags.get(image, 'unknown')
+        networks = (container.get('NetworkSettings') or {}).get('Networks') or {}
+        info = {
+            'name': (container.get('Names') or ['/unknown'])[0].lstrip('/'),
+            'id': container.get('Id', '')[:12],
+            'image': image,
+            'status': container.get('State', ''),
+            'ports': [
+                {
+                    'private': binding.get('PrivatePort'),
+                    'public': binding.get('PublicPort'),
+                    'protocol': binding.get('Type', 'tcp'),
+                    'host_ip': binding.get('IP'),
+                }
+                for binding in container.get('Ports') or []
+            ],
+            'networks': list(networks),
+            'network_mode': (container.get('HostConfig') or {}).get('NetworkMode', ''),
+            'ip_address': None
+        }
+        for config in networks.values():
+            if config.get('IPAddress'):
+                info['ip_address'] = config['IPAddress']
+                break
+        container_info.append(info)
+    return container_info
+
+
+def list_containers(api, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+    """Container summaries from a low-level API client, in one listing
+
+    Images are listed too, once, only if some container's image is untagged.
+    """
+    containers = api.containers(all=True, filters=filters)
+    image_tags = {}
+    if any(c.get('Image', '').startswith('sha256:') for c in containers):
+        image_tags = {
+            image['Id']: (image.get('RepoTags') or ['unknown'])[0]
+            for image in api.images()
+        }
+    return parse_containers(containers, image_tags)
+
+
+def container_host_entries(address: str, hostname: str, containers: List[Dict]) -> Dict[str, Dict]:
+    """Scan-result host entries for the running containers of one daemon
+
+    Services with published ports (or on the host network) are listed on
+    the daemon's address; others on the container's own address.
+    Containers whose image isn't recognised are listed under their own name
+    if they publish ports, since something answers there.
+    """
+    entries: Dict[str, Dict] = {}
+    for container in containers:
+        if container.get('status') != 'running':
+            continue
+        service_name = image_service(container.get('image', ''))
+        published = sorted({
+            binding['public'] for binding in container['ports']
+            if binding['public'] and binding['protocol'] == 'tcp'
+        })
+        if not service_name and not published:
+            continue
+        definition = (get_service_by_name(service_name) or {}) if service_name else {}
+        if published:
+            ip, ports = address, published
+        elif container.get('network_mode') == 'host':
+            ip, ports = address, list(definition.get('ports', []))
+        elif container.get('ip_address'):
+            ip = container['ip_address']
+            ports = sorted({b['private'] for b in container['ports'] if b['protocol'] == 'tcp'}) \
+                or list(definition.get('ports', []))
+        else:
+            continue
+
+        entry = entries.setdefault(ip, {
+            "hostname": hostname if ip == address else container['name'],
+            "services": []
+        })
+        entry["services"].append({
+            "name": service_name or container['name'],
+            "host": ip,
+            "ports": ports,
+            "description": definition.get("description", "") if service_name else f"Container running {container['image']}",
+            "confidence": 0.95 if service_name else 0.5,
+            "device_type": "docker",
+            "container": container['name'],
+            "image": container['image'],
+        })
+    return entries
+
 
 class DockerScanner:
-    def __init__(self):
+    def __init__(self, timeout: float = 5):
         self.docker_clients = {}
-        
-    def connect_to_docker_host(self, host: str, port: int = 2375) -> bool:
-        """Connect to Docker daemon on remote host"""
+        self.timeout = timeout
+
+    def connect_to_docker_host(self, host: str, port: int = DEFAULT_DOCKER_PORT) -> bool:
+        """Connect to the Docker daemon on a host, or at a tcp:// or unix:// URL"""
+        if docker is None:
+            return False
         try:
-            # Try to connect to Docker
-            client = docker.DockerClient(base_url=f"tcp://{host}:{port}")
+            client = docker.DockerClient(base_url=docker_base_url(host, port), timeout=self.timeout)
             client.ping()
             self.docker_clients[host] = client
             return True
-        except:
+        except Exception:
             return False
-    
+
     def get_docker_containers(self, host: str) -> List[Dict]:
-        """Get list of containers from Docker host"""
+        """Get list of containers from Docker host
+
+        One ``containers(all=True)`` listing carries names, state, port
+        bindings and networks for every container, instead of two more
+        requests per container.
+        """
         if host not in self.docker_clients:
             return []
-        
+
         try:
-            client = self.docker_clients[host]
-            containers = client.containers.list(all=True)
-            
-            container_info = []
-            for container in containers:
-                # Get container details
-                info = {
-                    'name': container.name,
-                    'id': container.short_id,
-                    'image': container.image.tags[0] if container.image.tags else 'unknown',
-                    'status': container.status,
-                    'ports': container.ports,
-                    'networks': list(container.attrs['NetworkSettings']['Networks'].keys()),
-                    'ip_address': None
-                }
-                
-                # Get IP address
-                for network, config in container.attrs['NetworkSettings']['Networks'].items():
-                    if config.get('IPAddress'):
-                        info['ip_address'] = config['IPAddress']
-                        break
-                
-                container_info.append(info)
-            
-            return container_info
-        except Exception as e:
+            return list_containers(self.docker_clients[host].api)
+        except Exception:
             return []
-    
+
+    def discover_services(self, host: str) -> Dict[str, Dict]:
+        """Scan-result entries for a Docker host's containers, without probing the network"""
+        if host not in self.docker_clients and not self.connect_to_docker_host(host):
+            return {}
+        base_url = docker_base_url(host)
+        return container_host_entries(daemon_address(base_url), urlsplit(base_url).hostname or host,
+                                      self.get_docker_containers(host))
+
     def identify_container_services(self, containers: List[Dict]) -> Dict[str, str]:
         """Map container IPs to service names"""
         ip_to_service = {}
-        
+
         for container in containers:
             if not container.get('ip_address'):
                 continue
-            
+
             # Identify service based on image name
-            image = container.get('image', '').lower()
-            service_mappings = {
-                'plex': 'Plex',
-                'jellyfin': 'Jellyfin',
-                'radarr': 'Radarr',
-                'sonarr': 'Sonarr',
-                'prowlarr': 'Prowlarr',
-                'bazarr': 'Bazarr',
-                'lidarr': 'Lidarr',
-                'overseerr': 'Overseerr',
-                'tautulli': 'Tautulli',
-                'portainer': 'Portainer',
-                'nginx-proxy': 'Nginx Proxy Manager',
-                'traefik': 'Traefik',
-                'pihole': 'Pi-hole',
-                'grafana': 'Grafana',
-                'prometheus': 'Prometheus',
-                'influxdb': 'InfluxDB',
-                'homeassistant': 'Home Assistant',
-                'mosquitto': 'Mosquitto',
-                'mariadb': 'MariaDB',
-                'postgres': 'PostgreSQL',
-                'redis': 'Redis',
-                'mongo': 'MongoDB',
-            }
-            
-            for key, service_name in service_mappings.items():
-                if key in image:
-                    ip_to_service[container['ip_address']] = {
-                        'service': service_name,
-                        'container': container['name'],
-                        'image': container['image']
-                    }
-                    break
-        
+            service_name = image_service(container.get('image', ''))
+            if service_name:
+                ip_to_service[container['ip_address']] = {
+                    'service': service_name,
+                    'container': container['name'],
+                    'image': container['image']
+                }
+
         return ip_to_service
+
+    def close(self):
+        """Close connections to every daemon"""
+        for client in self.docker_clients.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+        self.docker_clients.clear()
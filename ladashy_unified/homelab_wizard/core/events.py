@@ -0,0 +1,225 @@
+"""
+In-process event broker for pushing scan progress to clients
+
+Publishers hand an event to every subscriber's queue as it happens, so any
+number of open streams (browser tabs, the status script) add no polling
+load. Recent events are kept so a client that reconnects with its last
+event id gets what it missed. ``SharedEventBroker`` does the same across
+server worker processes through the shared store.
+"""
+import json
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .shared_store import SharedStore
+
+Event = Tuple[Optional[int], str, Any]  # (id, event type, data)
+
+
+class Subscription:
+    """One subscriber's bounded queue of pending events"""
+
+    def __init__(self, max_pending: int):
+        self._queue: "queue.Queue[Event]" = queue.Queue(max_pending)
+        # Set when the subscriber fell too far behind and events were dropped
+        self.overflowed = False
+        # Id of the newest event already queued for this subscriber
+        self.last_id = 0
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Next event, or None if nothing arrived within ``timeout``"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def empty(self) -> bool:
+        return self._queue.empty()
+
+    def _offer(self, event: Event) -> bool:
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+            return False
+        if event[0] is not None:
+            self.last_id = max(self.last_id, event[0])
+        return True
+
+    def _wake(self):
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class EventBroker:
+    """Fan-out of published events to any number of subscribers"""
+
+    def __init__(self, history: int = 512, max_pending: int = 1024):
+        self.max_pending = max_pending
+        self._history: deque = deque(maxlen=history)
+        self._subscribers = set()
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def publish(self, event: str, data: Any) -> int:
+        """Send an event to every subscriber; returns its id"""
+        with self._lock:
+            record = (self._next_id, event, data)
+            self._next_id += 1
+            self._history.append(record)
+            for subscription in list(self._subscribers):
+                # A subscriber that can't keep up is dropped; it reconnects
+                # and is told to reload instead of stalling the publisher
+                if not subscription._offer(record):
+                    self._subscribers.discard(subscription)
+            return record[0]
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        """Start receiving events, first replaying any after ``last_event_id``
+
+        If the requested events have already left the history, the
+        subscription starts with a ``reset`` event telling the client to
+        reload full state.
+        """
+        subscription = Subscription(self.max_pending)
+        with self._lock:
+            if last_event_id is not None:
+                oldest = self._history[0][0] if self._history else self._next_id
+                if last_event_id < oldest - 1:
+                    subscription._offer((self._next_id - 1, "reset", {}))
+                else:
+                    for record in self._history:
+                        if record[0] > last_event_id:
+                            subscription._offer(record)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def close(self):
+        """End every open stream, e.g. when the server is shutting down"""
+        with self._lock:
+            self._closed = True
+            for subscription in self._subscribers:
+                subscription._wake()
+
+    def _last_event_id(self) -> int:
+        return self._next_id - 1
+
+    def stream(self, subscription: Subscription, keepalive: float = 15.0) -> Iterator[str]:
+        """Server-sent events text for a subscription, until it overflows"""
+        try:
+            while True:
+                record = subscription.get(timeout=keepalive)
+                if self._closed:
+                    return
+                if record is not None:
+                    yield format_sse(record)
+                elif not subscription.overflowed:
+                    yield ": keepalive\n\n"
+                if subscription.overflowed and subscription.empty():
+                    yield format_sse((self._last_event_id(), "reset", {}))
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+
+class SharedEventBroker(EventBroker):
+    """Event broker whose events reach subscribers in every worker process
+
+    Events are appended to the shared store's log. One thread per process
+    tails the log and hands new events to that process's subscribers, so
+    the cost is one indexed query per poll interval however many clients
+    are connected.
+    """
+
+    def __init__(self, store: SharedStore, poll_interval: float = 0.1, max_pending: int = 1024):
+        super().__init__(history=0, max_pending=max_pending)
+        self.store = store
+        self.poll_interval = poll_interval
+        self._cursor = store.event_bounds()[1]
+        self._poller = None
+
+    def publish(self, event: str, data: Any) -> int:
+        return self.store.append_event(event, data)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        subscription = Subscription(self.max_pending)
+        with self._lock:
+            oldest, newest = self.store.event_bounds()
+            subscription.last_id = newest
+            if last_event_id is not None:
+                if last_event_id < oldest - 1:
+                    subscription._offer((newest, "reset", {}))
+                else:
+                    subscription.last_id = last_event_id
+                    for record in self.store.events_after(last_event_id):
+                        subscription._offer(record)
+            self._subscribers.add(subscription)
+            self._start_poller()
+        return subscription
+
+    def _last_event_id(self) -> int:
+        return self.store.event_bounds()[1]
+
+    def _start_poller(self):
+        if self._poller is None or not self._poller.is_alive():
+            self._poller = threading.Thread(target=self._poll, name="event-poller", daemon=True)
+            self._poller.start()
+
+    def _poll(self):
+        while not self._closed:
+            records = self.store.events_after(self._cursor)
+            if records:
+                self._cursor = records[-1][0]
+                with self._lock:
+                    for subscription in list(self._subscribers):
+                        for record in records:
+                            if record[0] > subscription.last_id and not subscription._offer(record):
+                                self._subscribers.discard(subscription)
+                                break
+            if len(records) < 1000:
+                time.sleep(self.poll_interval)
+
+
+def format_sse(record: Event) -> str:
+    """Encode an event in the text/event-stream wire format"""
+    event_id, event, data = record
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def parse_sse(lines: Iterator[str]) -> Iterator[Dict[str, Any]]:
+    """Decode a text/event-stream into dicts with id, event and data"""
+    message: Dict[str, Any] = {}
+    data_lines = []
+    for line in lines:
+        if not line:
+            if data_lines:
+                message["data"] = json.loads("\n".join(data_lines))
+                message.setdefault("event", "message")
+                yield message
+            message, data_lines = {}, []
+        elif line.startswith(":"):
+            continue
+        else:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "data":
+                data_lines.append(value)
+            elif field == "id":
+                message["id"] = int(value)
+            elif field == "event":
+                message["event"] = value
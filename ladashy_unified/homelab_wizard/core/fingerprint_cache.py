@@ -0,0 +1,146 @@
+"""
+Persistent fingerprint cache
+
+Maps (ip, port, banner hash) to the detected service so repeated scans of
+a stable network skip the HTTP fingerprinting probes. Entries expire after
+a TTL and the least recently used ones are evicted past ``max_entries``.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from ..utils.paths import data_path
+
+FINGERPRINT_CACHE_FILE = data_path("fingerprint_cache.db")
+
+
+class FingerprintCache:
+    """SQLite-backed TTL + LRU cache of detector results"""
+
+    def __init__(self, path: str = FINGERPRINT_CACHE_FILE, ttl: float = 7 * 24 * 3600,
+                 max_entries: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                ip TEXT NOT NULL,
+                port INTEGER NOT NULL,
+                banner TEXT NOT NULL,
+                service TEXT,
+                confidence REAL NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (ip, port, banner)
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_fingerprints_last_used ON fingerprints (last_used)")
+        # Kept in the database so every server worker reports the same numbers
+        self._db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.commit()
+
+    def _bump(self, *names: str):
+        for name in names:
+            self._db.execute(
+                "INSERT INTO counters VALUES (?, 1) ON CONFLICT (name) DO UPDATE SET value = value + 1",
+                (name,)
+            )
+
+    def _counters(self) -> Dict[str, int]:
+        counters = dict(self._db.execute("SELECT name, value FROM counters").fetchall())
+        return {name: counters.get(name, 0) for name in ("hits", "misses", "expired")}
+
+    @property
+    def hits(self) -> int:
+        with self._lock:
+            return self._counters()["hits"]
+
+    @property
+    def misses(self) -> int:
+        with self._lock:
+            return self._counters()["misses"]
+
+    def get(self, ip: str, port: int, banner: str) -> Optional[Tuple[Optional[str], float]]:
+        """Cached (service, confidence), or None on a miss
+
+        A hit can carry ``service=None``: the port was fingerprinted before
+        and nothing was recognised, which is worth remembering too.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT service, confidence, created FROM fingerprints WHERE ip = ? AND port = ? AND banner = ?",
+                (ip, port, banner)
+            ).fetchone()
+
+            if row is None:
+                self._bump("misses")
+                self._db.commit()
+                return None
+
+            service, confidence, created = row
+            if now - created > self.ttl:
+                self._db.execute(
+                    "DELETE FROM fingerprints WHERE ip = ? AND port = ? AND banner = ?", (ip, port, banner)
+                )
+                self._bump("expired", "misses")
+                self._db.commit()
+                return None
+
+            self._db.execute(
+                "UPDATE fingerprints SET last_used = ? WHERE ip = ? AND port = ? AND banner = ?",
+                (now, ip, port, banner)
+            )
+            self._bump("hits")
+            self._db.commit()
+            return service, confidence
+
+    def put(self, ip: str, port: int, banner: str, service: Optional[str], confidence: float):
+        """Store a detector result, evicting the least recently used entries"""
+        now = time.time()
+        with self._lock:
+            # A new banner on the same port replaces whatever was there
+            self._db.execute("DELETE FROM fingerprints WHERE ip = ? AND port = ?", (ip, port))
+            self._db.execute(
+                "INSERT INTO fingerprints VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (ip, port, banner, service, confidence, now, now)
+            )
+            count = self._db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM fingerprints WHERE rowid IN "
+                    "(SELECT rowid FROM fingerprints ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM fingerprints")
+            self._db.execute("DELETE FROM counters")
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters since the cache was last cleared, plus its size"""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+            counters = self._counters()
+            lookups = counters["hits"] + counters["misses"]
+            return {
+                **counters,
+                "hit_rate": round(counters["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+            }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,183 @@
+"""
+Declarative fingerprint database for HTTP service identification
+
+Signatures live in ``services/fingerprints.json``. They are compiled once
+into indexes keyed by port and header name, plus one combined regex each
+for page titles and bodies, so scoring a response is a single pass no
+matter how many services are defined.
+"""
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Pattern, Set, Tuple
+
+FINGERPRINTS_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "services", "fingerprints.json"
+)
+
+TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+
+@dataclass
+class Signature:
+    name: str
+    confidence: float
+    ports: List[int] = field(default_factory=list)
+    rule_count: int = 0
+
+
+@dataclass
+class EndpointRule:
+    service: str
+    path: str
+    status: int = 200
+    body: Optional[Pattern] = None
+    confidence: float = 0.95
+
+    def matches(self, status_code: int, text: str) -> bool:
+        if status_code != self.status:
+            return False
+        return self.body is None or bool(self.body.search(text))
+
+
+def favicon_hash(content: bytes) -> str:
+    """Hash used by favicon rules"""
+    return hashlib.md5(content).hexdigest()
+
+
+def _any_of(rules: List[Tuple[str, int, Pattern]]) -> Optional[Pattern]:
+    """One pattern matching wherever any of the rules' patterns does"""
+    if not rules:
+        return None
+    return re.compile("|".join(f"(?:{pattern.pattern})" for _, _, pattern in rules), re.IGNORECASE)
+
+
+class FingerprintDatabase:
+    """Compiled signature indexes"""
+
+    def __init__(self, definitions: Mapping):
+        self.signatures: List[Signature] = []
+        self.by_port: Dict[int, List[int]] = {}
+        self.by_header: Dict[str, List[Tuple[int, str, Optional[Pattern]]]] = {}
+        self.favicons: Dict[str, List[int]] = {}
+        self.endpoints_by_port: Dict[int, List[EndpointRule]] = {}
+
+        title_patterns = []
+        body_patterns = []
+
+        for idx, spec in enumerate(definitions.get("services", [])):
+            signature = Signature(
+                name=spec["name"],
+                confidence=spec.get("confidence", 0.9),
+                ports=list(spec.get("ports", [])),
+            )
+            rules = len(signature.ports)
+
+            for port in signature.ports:
+                self.by_port.setdefault(port, []).append(idx)
+
+            for n, header in enumerate(spec.get("headers", [])):
+                pattern = header.get("pattern")
+                compiled = re.compile(pattern, re.IGNORECASE) if pattern else None
+                self.by_header.setdefault(header["name"].lower(), []).append((idx, f"h{n}", compiled))
+                rules += 1
+
+            for kind, patterns in (("t", title_patterns), ("b", body_patterns)):
+                key = "title" if kind == "t" else "body"
+                for n, pattern in enumerate(spec.get(key, [])):
+                    patterns.append((f"{kind}{idx}_{n}", idx, re.compile(pattern, re.IGNORECASE)))
+                    rules += 1
+
+            for digest in spec.get("favicon", []):
+                self.favicons.setdefault(digest.lower(), []).append(idx)
+                rules += 1
+
+            for endpoint in spec.get("endpoints", []):
+                rule = EndpointRule(
+                    service=signature.name,
+                    path=endpoint["path"],
+                    status=endpoint.get("status", 200),
+                    body=re.compile(endpoint["body"], re.IGNORECASE) if endpoint.get("body") else None,
+                    confidence=endpoint.get("confidence", 0.95),
+                )
+                for port in signature.ports:
+                    self.endpoints_by_port.setdefault(port, []).append(rule)
+
+            signature.rule_count = max(rules, 1)
+            self.signatures.append(signature)
+
+        # Each pattern is searched on its own, so overlapping patterns of
+        # different services all count; one combined pass first skips
+        # responses that match none of them
+        self._title_rules = title_patterns
+        self._body_rules = body_patterns
+        self._title_re = _any_of(title_patterns)
+        self._body_re = _any_of(body_patterns)
+
+    @staticmethod
+    def _match_rules(any_re, rules, text: str, hits: Dict[int, Set[str]], matched_text: Dict[int, int]):
+        if not any_re.search(text):
+            return
+        for rule_id, idx, pattern in rules:
+            match = pattern.search(text)
+            if match:
+                hits.setdefault(idx, set()).add(rule_id)
+                matched_text[idx] = matched_text.get(idx, 0) + len(match.group(0))
+
+    @classmethod
+    def from_file(cls, path: str) -> "FingerprintDatabase":
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def match(self, port: int, headers: Mapping[str, str], body: str,
+              favicon: Optional[str] = None) -> Tuple[Optional[str], float]:
+        """Score a response against every signature and return the best one
+
+        Port rules only add to services that matched on headers, title, body
+        or favicon, so a bare open port never produces an HTTP fingerprint.
+        """
+        hits: Dict[int, Set[str]] = {}
+        # Characters matched by each signature's title and body patterns;
+        # between equal scores the more specific signature wins
+        matched_text: Dict[int, int] = {}
+
+        for name, value in headers.items():
+            for idx, rule_id, pattern in self.by_header.get(name.lower(), ()):
+                if pattern is None or pattern.search(value):
+                    hits.setdefault(idx, set()).add(rule_id)
+
+        if self._title_re:
+            title = TITLE_RE.search(body)
+            if title:
+                self._match_rules(self._title_re, self._title_rules, title.group(1).strip(), hits, matched_text)
+
+        if self._body_re:
+            self._match_rules(self._body_re, self._body_rules, body, hits, matched_text)
+
+        if favicon:
+            for idx in self.favicons.get(favicon.lower(), ()):
+                hits.setdefault(idx, set()).add("favicon")
+
+        best_name, best_rank = None, (0.0, 0, 0)
+        port_signatures = set(self.by_port.get(port, ()))
+        for idx, rules in hits.items():
+            signature = self.signatures[idx]
+            matched = len(rules) + (1 if idx in port_signatures else 0)
+            score = signature.confidence * (matched / signature.rule_count)
+            rank = (score, matched, matched_text.get(idx, 0))
+            if rank > best_rank:
+                best_name, best_rank = signature.name, rank
+
+        return best_name, best_rank[0]
+
+    def endpoints_for_port(self, port: int) -> List[EndpointRule]:
+        return self.endpoints_by_port.get(port, [])
+
+
+@lru_cache(maxsize=None)
+def load_fingerprints(path: str = FINGERPRINTS_FILE) -> FingerprintDatabase:
+    """Load and compile the signature file once per process"""
+    return FingerprintDatabase.from_file(path)
@@ -0,0 +1,194 @@
+"""
+Asyncio host discovery engine
+
+Replaces one ``ping`` subprocess per address with non-blocking TCP connect
+probes (and unprivileged ICMP echo where the OS allows it), so thousands of
+probes can be in flight from a single thread. Timeouts and the in-flight
+limit come from a ``ScanTiming``, which adapts them as answers come in when
+the scanner shares an adaptive one.
+"""
+import asyncio
+import itertools
+import os
+import socket
+import struct
+import time
+from typing import AsyncIterator, Callable, Iterable, List, Optional
+
+from .scan_timing import ScanTiming
+
+# Ports used to decide whether a host is up. Any answer - a completed
+# handshake or a RST - proves something lives at the address.
+DEFAULT_PROBE_PORTS = [80, 443, 22, 445, 139, 53, 8080, 3389]
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+
+def default_concurrency() -> int:
+    """Pick an in-flight probe limit that stays below the open file limit"""
+    try:
+        import resource
+        soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ImportError, ValueError, OSError):
+        return 512
+    if soft_limit == resource.RLIM_INFINITY:
+        return 4096
+    return max(64, min(4096, soft_limit - 128))
+
+
+def _icmp_checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+class HostDiscovery:
+    """Find live hosts with concurrent, non-blocking probes"""
+
+    def __init__(self, probe_ports: Optional[List[int]] = None, timeout: float = 1.0,
+                 max_concurrency: Optional[int] = None, use_icmp: bool = True,
+                 refused_is_alive: bool = True, timing: Optional[ScanTiming] = None):
+        self.probe_ports = list(probe_ports or DEFAULT_PROBE_PORTS)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency or default_concurrency()
+        # A RST means the host answered; turn this off on networks where a
+        # firewall sends resets on behalf of addresses that do not exist.
+        self.refused_is_alive = refused_is_alive
+        self.icmp_available = use_icmp and self.icmp_supported()
+        # Fixed timeout and limit unless the caller shares adaptive timing
+        self.timing = timing or ScanTiming(self.max_concurrency, timeout, adaptive=False)
+
+    @staticmethod
+    def icmp_supported() -> bool:
+        """Check whether unprivileged ICMP datagram sockets are allowed"""
+        if not hasattr(socket, "IPPROTO_ICMP"):
+            return False
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        except (OSError, PermissionError):
+            return False
+        sock.close()
+        return True
+
+    def discover(self, addresses: Iterable[str],
+                 on_result: Optional[Callable[[str, bool], None]] = None) -> List[str]:
+        """Probe every address and return the ones that answered"""
+        return asyncio.run(self.sweep(addresses, on_result))
+
+    async def sweep(self, addresses: Iterable[str],
+                    on_result: Optional[Callable[[str, bool], None]] = None) -> List[str]:
+        """Probe addresses concurrently, bounded by the timing's in-flight limit"""
+        return [ip async for ip in self.iter_alive(addresses, on_result)]
+
+    async def iter_alive(self, addresses: Iterable[str],
+                         on_result: Optional[Callable[[str, bool], None]] = None,
+                         window: Optional[int] = None) -> AsyncIterator[str]:
+        """Yield live hosts as soon as they answer
+
+        Addresses are pulled from the iterable only as earlier checks finish,
+        with at most ``window`` hosts being checked at once, so memory stays
+        flat however many addresses there are. The default window keeps
+        about as many probes in flight as there are sockets to run them.
+        """
+        probes_per_host = len(self.probe_ports) + (1 if self.icmp_available else 0)
+        window = window or max(16, self.max_concurrency // probes_per_host)
+        addresses = iter(addresses)
+
+        async def check(ip: str) -> Optional[str]:
+            alive = await self.is_alive(ip)
+            if on_result:
+                on_result(ip, alive)
+            return ip if alive else None
+
+        in_flight = set()
+        try:
+            while True:
+                for ip in itertools.islice(addresses, window - len(in_flight)):
+                    in_flight.add(asyncio.ensure_future(check(ip)))
+                if not in_flight:
+                    return
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    ip = task.result()
+                    if ip:
+                        yield ip
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def is_alive(self, ip: str) -> bool:
+        """Race all probes for one host; the first positive answer wins"""
+        probes = [asyncio.ensure_future(self._tcp_probe(ip, port)) for port in self.probe_ports]
+        if self.icmp_available:
+            probes.append(asyncio.ensure_future(self._icmp_probe(ip)))
+
+        try:
+            for probe in asyncio.as_completed(probes):
+                if await probe:
+                    return True
+            return False
+        finally:
+            for probe in probes:
+                probe.cancel()
+
+    async def _tcp_probe(self, ip: str, port: int) -> bool:
+        """Non-blocking connect; success or RST both mean the host is up"""
+        loop = asyncio.get_running_loop()
+        async with self.timing.slot():
+            family = socket.AF_INET6 if ":" in ip else socket.AF_INET
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(loop.sock_connect(sock, (ip, port)), self.timing.timeout_for(ip))
+                self.timing.record_rtt(ip, time.monotonic() - started)
+                return True
+            except ConnectionRefusedError:
+                self.timing.record_rtt(ip, time.monotonic() - started)
+                return self.refused_is_alive
+            except asyncio.TimeoutError:
+                self.timing.record_timeout()
+                return False
+            except OSError as e:
+                self.timing.record_error(e)
+                return False
+            finally:
+                sock.close()
+
+    async def _icmp_probe(self, ip: str) -> bool:
+        """Send one echo request over an unprivileged ICMP socket"""
+        if ":" in ip:
+            return False
+        loop = asyncio.get_running_loop()
+        async with self.timing.slot():
+            try:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+            except OSError:
+                return False
+            sock.setblocking(False)
+            try:
+                # The kernel rewrites the identifier for datagram ICMP sockets
+                # and only delivers replies addressed to this socket.
+                sequence = os.getpid() & 0xFFFF
+                header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, 0, sequence)
+                payload = b"ladashy"
+                checksum = _icmp_checksum(header + payload)
+                packet = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, 0, sequence) + payload
+                started = time.monotonic()
+                sock.sendto(packet, (ip, 0))
+                reply = await asyncio.wait_for(loop.sock_recv(sock, 1024), self.timing.timeout_for(ip))
+                if not reply or reply[0] != ICMP_ECHO_REPLY:
+                    return False
+                self.timing.record_rtt(ip, time.monotonic() - started)
+                return True
+            except asyncio.TimeoutError:
+                self.timing.record_timeout()
+                return False
+            except OSError:
+                return False
+            finally:
+                sock.close()
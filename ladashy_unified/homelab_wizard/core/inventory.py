@@ -0,0 +1,454 @@
+"""
+Thread-safe inventory of discovered services, configs and collected data
+
+Writers build a new immutable snapshot under a lock and swap it in, so a
+reader holding a snapshot never sees a half-applied scan. Each snapshot
+keeps secondary indexes by service name, host, port and category so
+lookups don't walk every host, and a version that moves whenever a host
+changes so clients can ask for only what changed since their last copy.
+
+With a ``SharedStore`` the inventory is also kept in sync between server
+worker processes: writes go through the store, and readers pick up other
+workers' writes when the store's revisions move. Hosts are stored one row
+each with the version they changed at, so a write stores only the hosts
+it touched and a reader loads and re-indexes only those.
+"""
+import ipaddress
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .shared_store import SharedStore
+from ..services.definitions import SERVICES
+
+# Service name (lowercase) -> category from the service definitions
+_CATEGORIES = {
+    service["name"].lower(): category
+    for category, services in SERVICES.items()
+    for service in services
+}
+
+ServiceRef = Tuple[str, str]  # (host, lowercase service name)
+
+# Shared store key of each part of the inventory. The hosts key holds just
+# the version and base; the hosts are items of HOSTS_COLLECTION.
+STORE_KEYS = {
+    "hosts": "inventory.hosts",
+    "configs": "inventory.configs",
+    "collected": "inventory.collected",
+}
+HOSTS_COLLECTION = "inventory.hosts"
+
+# Removed hosts remembered for deltas; older removals fall back to full copies
+MAX_REMOVED = 1000
+
+
+@dataclass(frozen=True)
+class HostVersions:
+    """Version of the host set and the version at which each host last changed
+
+    ``base`` is where change tracking starts; deltas from before it can't be
+    computed and fall back to a full copy.
+    """
+    version: int
+    base: int
+    changed: Mapping[str, int] = field(default_factory=dict)
+    removed: Mapping[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def start(cls) -> "HostVersions":
+        # Start from the clock so versions keep increasing across restarts
+        version = int(time.time() * 1000)
+        return cls(version, version)
+
+    def pruned(self) -> "HostVersions":
+        """Forget the oldest removals past ``MAX_REMOVED``, moving ``base`` past them"""
+        if len(self.removed) <= MAX_REMOVED:
+            return self
+        ordered = sorted(self.removed.items(), key=lambda item: item[1])
+        dropped = len(ordered) - MAX_REMOVED
+        base = max(self.base, ordered[dropped - 1][1])
+        return HostVersions(self.version, base, self.changed, dict(ordered[dropped:]))
+
+
+def service_category(name: str) -> Optional[str]:
+    """Category of a service from its definition, if it has one"""
+    return _CATEGORIES.get(name.lower())
+
+
+class InventorySnapshot:
+    """Immutable, indexed view of the inventory at one point in time"""
+
+    def __init__(self, hosts: Dict[str, Dict[str, Any]], configs: Dict[str, Dict[str, Any]],
+                 collected: Dict[str, Dict[str, Any]], indexes: Dict[str, Dict[Any, Dict[ServiceRef, Dict]]],
+                 service_count: int, versions: HostVersions):
+        self.hosts: Mapping[str, Dict[str, Any]] = MappingProxyType(hosts)
+        self.configs: Mapping[str, Dict[str, Any]] = MappingProxyType(configs)
+        self.collected: Mapping[str, Dict[str, Any]] = MappingProxyType(collected)
+        self._indexes = indexes
+        self.service_count = service_count
+        self.versions = versions
+        self._hosts_json = None
+
+    @property
+    def version(self) -> int:
+        return self.versions.version
+
+    @property
+    def etag(self) -> str:
+        """Entity tag (unquoted) of the host set, for conditional GETs"""
+        return f"v{self.versions.version}"
+
+    def hosts_json(self) -> str:
+        """All hosts serialized once per snapshot and reused by every reader"""
+        if self._hosts_json is None:
+            self._hosts_json = json.dumps(dict(self.hosts))
+        return self._hosts_json
+
+    def changes_since(self, version: int) -> Dict[str, Any]:
+        """Hosts added or changed and hosts removed after ``version``
+
+        ``full`` is true when the version predates change tracking (a
+        restart or a state load), in which case every host is returned.
+        """
+        versions = self.versions
+        if version < versions.base or version > versions.version:
+            return {"version": versions.version, "full": True, "hosts": dict(self.hosts), "removed": []}
+        return {
+            "version": versions.version,
+            "full": False,
+            "hosts": {ip: self.hosts[ip] for ip, v in versions.changed.items() if v > version},
+            "removed": [ip for ip, v in versions.removed.items() if v > version],
+        }
+
+    @property
+    def host_count(self) -> int:
+        return len(self.hosts)
+
+    def find_service(self, name: str, host: str) -> Optional[Dict[str, Any]]:
+        """The service called ``name`` (case-insensitive) on ``host``"""
+        return self._indexes["name"].get(name.lower(), {}).get((host, name.lower()))
+
+    def services(self, name: Optional[str] = None, host: Optional[str] = None,
+                 port: Optional[int] = None, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Services matching every given filter
+
+        Starts from the smallest matching index bucket and checks the other
+        filters against it, so the cost follows the result size rather than
+        the size of the inventory.
+        """
+        filters = [
+            ("name", name.lower() if name else None),
+            ("host", host),
+            ("port", int(port) if port is not None else None),
+            ("category", category.lower() if category else None),
+        ]
+        buckets = [self._indexes[index].get(key, {}) for index, key in filters if key is not None]
+        if not buckets:
+            return [s for entry in self.hosts.values() for s in entry.get('services', [])]
+
+        smallest = min(buckets, key=len)
+        return [
+            service for ref, service in smallest.items()
+            if all(ref in bucket for bucket in buckets if bucket is not smallest)
+        ]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "discovered_services": dict(self.hosts),
+            "service_configs": dict(self.configs),
+            "collected_data": dict(self.collected),
+        }
+
+
+def _index_keys(ip: str, service: Dict[str, Any]) -> Iterable[Tuple[str, Any]]:
+    name = service.get('name', '')
+    yield "name", name.lower()
+    yield "host", ip
+    for port in service.get('ports', []):
+        yield "port", port
+    category = service.get('category') or service_category(name)
+    if category:
+        yield "category", category.lower()
+
+
+def _network_filter(networks: Iterable[str]):
+    """Predicate telling whether an address is in any of ``networks``"""
+    parsed = []
+    for network in networks:
+        try:
+            parsed.append(ipaddress.ip_network(network, strict=False))
+        except ValueError:
+            continue
+
+    def inside(ip: str) -> bool:
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        return any(address in network for network in parsed)
+    return inside
+
+
+class Inventory:
+    """Copy-on-write store behind the API's hosts, configs and collected data"""
+
+    def __init__(self, hosts: Optional[Dict[str, Dict[str, Any]]] = None,
+                 configs: Optional[Dict[str, Dict[str, Any]]] = None,
+                 collected: Optional[Dict[str, Dict[str, Any]]] = None,
+                 store: Optional[SharedStore] = None):
+        self._lock = threading.Lock()
+        self._store = store
+        self._revisions = {key: 0 for key in STORE_KEYS.values()}
+        # Hosts a write changed (None for removed), or None to store them all
+        self._dirty_hosts: Optional[Dict[str, Optional[Dict[str, Any]]]] = {}
+        self._snapshot = self._build(hosts or {}, dict(configs or {}), dict(collected or {}),
+                                     HostVersions.start())
+        if store:
+            # Whatever another worker already stored wins over the arguments
+            with self._writing():
+                self._dirty_hosts = None
+                self._persist(*[part for part, key in STORE_KEYS.items() if not self._revisions[key]])
+
+    def snapshot(self) -> InventorySnapshot:
+        """The current snapshot; it never changes once returned"""
+        if self._store and self._store.revisions(STORE_KEYS.values()) != self._revisions:
+            with self._lock:
+                self._sync()
+        return self._snapshot
+
+    @contextmanager
+    def _writing(self, *parts: str):
+        """Lock for a write, starting from the latest shared state, and store ``parts`` after"""
+        with self._lock, (self._store.transaction() if self._store else nullcontext()):
+            if self._store:
+                self._sync()
+            before = self._snapshot
+            self._dirty_hosts = {}
+            yield
+            if self._snapshot is not before:
+                self._persist(*parts)
+
+    def _sync(self):
+        """Load parts other workers changed since this process last saw them"""
+        revisions = self._store.revisions(STORE_KEYS.values())
+        if revisions == self._revisions:
+            return
+
+        current = self._snapshot
+        loaded = {}
+        for part, key in STORE_KEYS.items():
+            if revisions[key] != self._revisions[key]:
+                self._revisions[key], loaded[part] = self._store.get_with_revision(key)
+
+        configs = dict(loaded.get("configs", current.configs))
+        collected = dict(loaded.get("collected", current.collected))
+        if "hosts" not in loaded:
+            self._snapshot = InventorySnapshot(
+                dict(current.hosts), configs, collected,
+                current._indexes, current.service_count, current.versions
+            )
+            return
+
+        meta = {"version": 0, "base": None, **(loaded["hosts"] or {})}
+        if meta["base"] == current.versions.base and meta["version"] >= current.versions.version:
+            # Rows written after the version was read come with the next sync
+            rows = [row for row in self._store.items_since(HOSTS_COLLECTION, current.versions.version)
+                    if row[2] <= meta["version"]]
+            changed = dict(current.versions.changed)
+            removed = dict(current.versions.removed)
+            for ip, entry, version in rows:
+                if entry is None:
+                    changed.pop(ip, None)
+                    removed[ip] = version
+                else:
+                    changed[ip] = version
+                    removed.pop(ip, None)
+            versions = HostVersions(meta["version"], meta["base"], changed, removed)
+            self._snapshot = self._apply_hosts(
+                current, {ip: entry for ip, entry, _ in rows}, versions, configs, collected
+            )
+        else:
+            # Change tracking restarted elsewhere (a load or a fresh store)
+            hosts, changed, removed = {}, {}, {}
+            for ip, entry, version in self._store.items_since(HOSTS_COLLECTION):
+                if version > meta["version"]:
+                    continue
+                if entry is None:
+                    removed[ip] = version
+                else:
+                    hosts[ip] = entry
+                    changed[ip] = version
+            self._snapshot = self._build(hosts, configs, collected,
+                                         HostVersions(meta["version"], meta["base"], changed, removed))
+
+    def _persist(self, *parts: str):
+        if not self._store:
+            return
+        snapshot = self._snapshot
+        for part in parts:
+            if part == "hosts":
+                self._persist_hosts(snapshot)
+                value = {"version": snapshot.versions.version, "base": snapshot.versions.base}
+            else:
+                value = dict(getattr(snapshot, part))
+            self._revisions[STORE_KEYS[part]] = self._store.set(STORE_KEYS[part], value)
+
+    def _persist_hosts(self, snapshot: InventorySnapshot):
+        """Store the hosts this write changed, or all of them after a reset"""
+        versions = snapshot.versions
+        if self._dirty_hosts is None:
+            self._store.delete_items(HOSTS_COLLECTION)
+            rows = {ip: snapshot.hosts.get(ip) for ip in [*snapshot.hosts, *versions.removed]}
+        else:
+            rows = self._dirty_hosts
+        by_version = {}
+        for ip, entry in rows.items():
+            version = versions.changed.get(ip) if entry is not None else versions.removed.get(ip)
+            by_version.setdefault(version or versions.version, {})[ip] = entry
+        for version, items in by_version.items():
+            self._store.put_items(HOSTS_COLLECTION, items, version)
+        # Tombstones behind the base can't be asked for any more
+        self._store.delete_items(HOSTS_COLLECTION, removed_through=versions.base)
+
+    @staticmethod
+    def _build(hosts, configs, collected, versions) -> InventorySnapshot:
+        indexes = {"name": {}, "host": {}, "port": {}, "category": {}}
+        service_count = 0
+        for ip, entry in hosts.items():
+            service_count += Inventory._add_host(indexes, ip, entry)
+        return InventorySnapshot(dict(hosts), configs, collected, indexes, service_count, versions)
+
+    @staticmethod
+    def _add_host(indexes, ip, entry) -> int:
+        services = entry.get('services', [])
+        for service in services:
+            ref = (ip, service.get('name', '').lower())
+            for index, key in _index_keys(ip, service):
+                indexes[index].setdefault(key, {})[ref] = service
+        return len(services)
+
+    @staticmethod
+    def _apply_hosts(current: InventorySnapshot, updates: Dict[str, Optional[Dict[str, Any]]],
+                     versions: HostVersions, configs, collected) -> InventorySnapshot:
+        """New snapshot with some hosts replaced or removed (None), re-indexing only those"""
+        # Copy the outer index dicts and only the buckets these hosts touch
+        indexes = {index: dict(buckets) for index, buckets in current._indexes.items()}
+        touched = set()
+        hosts = dict(current.hosts)
+        service_count = current.service_count
+
+        def bucket(index, key):
+            if (index, key) not in touched:
+                indexes[index][key] = dict(indexes[index].get(key, {}))
+                touched.add((index, key))
+            return indexes[index][key]
+
+        for ip, entry in updates.items():
+            old = hosts.pop(ip, None)
+            if old:
+                for service in old.get('services', []):
+                    ref = (ip, service.get('name', '').lower())
+                    for index, key in _index_keys(ip, service):
+                        bucket(index, key).pop(ref, None)
+                        if not indexes[index][key]:
+                            del indexes[index][key]
+                            touched.discard((index, key))
+                service_count -= len(old.get('services', []))
+            if entry is not None:
+                hosts[ip] = entry
+                for service in entry.get('services', []):
+                    ref = (ip, service.get('name', '').lower())
+                    for index, key in _index_keys(ip, service):
+                        bucket(index, key)[ref] = service
+                service_count += len(entry.get('services', []))
+
+        return InventorySnapshot(hosts, configs, collected, indexes, service_count, versions)
+
+    def replace_hosts(self, hosts: Dict[str, Dict[str, Any]], networks: Optional[Iterable[str]] = None):
+        """Swap in a complete set of discovered hosts, e.g. a finished scan
+
+        With ``networks``, only hosts inside those networks are replaced and
+        hosts elsewhere are kept, so scans of different subnets don't
+        overwrite each other's results.
+        """
+        with self._writing("hosts"):
+            current = self._snapshot
+            if networks is not None:
+                inside = _network_filter(networks)
+                hosts = {
+                    **{ip: entry for ip, entry in current.hosts.items() if not inside(ip)},
+                    **{ip: entry for ip, entry in hosts.items() if inside(ip)},
+                }
+            old = current.versions
+            version = old.version + 1
+            changed = dict(old.changed)
+            removed = dict(old.removed)
+            for ip, entry in hosts.items():
+                if current.hosts.get(ip) != entry:
+                    changed[ip] = version
+                    removed.pop(ip, None)
+                    self._dirty_hosts[ip] = entry
+            for ip in current.hosts:
+                if ip not in hosts:
+                    changed.pop(ip, None)
+                    removed[ip] = version
+                    self._dirty_hosts[ip] = None
+            if self._dirty_hosts:
+                self._snapshot = self._build(hosts, dict(current.configs), dict(current.collected),
+                                             HostVersions(version, old.base, changed, removed).pruned())
+
+    def update_host(self, ip: str, entry: Dict[str, Any]):
+        """Add or replace one host, re-indexing only that host's services"""
+        with self._writing("hosts"):
+            current = self._snapshot
+            if current.hosts.get(ip) == entry:
+                return
+            old = current.versions
+            version = old.version + 1
+            versions = HostVersions(
+                version, old.base,
+                {**old.changed, ip: version},
+                {k: v for k, v in old.removed.items() if k != ip}
+            )
+            self._dirty_hosts[ip] = entry
+            self._snapshot = self._apply_hosts(current, {ip: entry}, versions,
+                                               dict(current.configs), dict(current.collected))
+
+    def _replace(self, configs=None, collected=None):
+        current = self._snapshot
+        self._snapshot = InventorySnapshot(
+            dict(current.hosts),
+            configs if configs is not None else dict(current.configs),
+            collected if collected is not None else dict(current.collected),
+            current._indexes, current.service_count, current.versions
+        )
+
+    def set_config(self, service_key: str, config: Dict[str, Any]):
+        with self._writing("configs"):
+            configs = dict(self._snapshot.configs)
+            configs[service_key] = config
+            self._replace(configs=configs)
+
+    def set_collected(self, service_key: str, data: Dict[str, Any]):
+        with self._writing("collected"):
+            collected = dict(self._snapshot.collected)
+            collected[service_key] = data
+            self._replace(collected=collected)
+
+    def load(self, state: Dict[str, Any]):
+        """Replace everything from a saved state (see ``InventorySnapshot.as_dict``)"""
+        with self._writing("hosts", "configs", "collected"):
+            # Deltas can't span a wholesale replacement, so tracking restarts here
+            self._dirty_hosts = None
+            version = self._snapshot.version + 1
+            self._snapshot = self._build(
+                state.get('discovered_services', {}),
+                dict(state.get('service_configs', {})),
+                dict(state.get('collected_data', {})),
+                HostVersions(version, version)
+            )
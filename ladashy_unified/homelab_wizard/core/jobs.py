@@ -0,0 +1,433 @@
+"""
+Durable background job queue
+
+Scans, bulk collections and documentation builds run as jobs: rows in a
+SQLite table with an id, a state, progress and a result, worked off by a
+configurable pool of threads. Jobs survive a restart - anything that was
+running when its process died is queued again - and can be cancelled
+while queued or running. Any server worker can submit, read or cancel a
+job; the process that starts the queue runs them.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+from ..utils.paths import data_path
+
+JOBS_DB_FILE = data_path("jobs.db")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler to stop a job that was cancelled"""
+
+
+class JobConflict(Exception):
+    """A job wasn't submitted because an active one conflicts with it"""
+
+    def __init__(self, job: "Job"):
+        super().__init__(f"Conflicts with job {job.id}")
+        self.job = job
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    state: str
+    progress: Dict[str, Any]
+    result: Any
+    error: Optional[str]
+    created: float
+    started: Optional[float]
+    finished: Optional[float]
+    attempts: int
+    cancel_requested: bool
+
+    @property
+    def active(self) -> bool:
+        return self.state not in FINISHED_STATES
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class JobContext:
+    """What a handler gets: its parameters, a progress reporter and a cancel flag"""
+
+    def __init__(self, queue: "JobQueue", job: Job):
+        self.queue = queue
+        self.job = job
+        self._checked = 0.0
+        self._cancelled = False
+
+    @property
+    def job_id(self) -> str:
+        return self.job.id
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return self.job.params
+
+    def progress(self, **fields):
+        """Merge fields into the job's stored progress"""
+        self.job.progress = {**self.job.progress, **fields}
+        self.queue._update(self.job.id, progress=self.job.progress)
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation was requested; reads the database at most twice a second"""
+        now = time.monotonic()
+        if not self._cancelled and now - self._checked >= 0.5:
+            self._checked = now
+            job = self.queue.get(self.job.id)
+            self._cancelled = bool(job and job.cancel_requested)
+        return self._cancelled
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+
+class ThrottledReporter:
+    """Calls ``report`` on its own thread with the newest update, at most every ``interval`` seconds
+
+    Updates that arrive in between are coalesced, so a caller on an event
+    loop can report as often as it likes without waiting on the database.
+    ``close()`` reports the last update, if it hasn't been, and waits.
+    """
+
+    def __init__(self, report: Callable[..., None], interval: float = 0.25):
+        self.report = report
+        self.interval = interval
+        self._latest: tuple = ()
+        self._pending = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="job-progress", daemon=True)
+        self._thread.start()
+
+    def __call__(self, *args):
+        with self._condition:
+            self._latest = args
+            self._pending = True
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                args, self._pending = self._latest, False
+            try:
+                self.report(*args)
+            except Exception:
+                pass
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed, self.interval)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+
+Handler = Callable[[JobContext], Any]
+
+
+class JobQueue:
+    """SQLite-backed job queue with a pool of worker threads"""
+
+    def __init__(self, path: str = JOBS_DB_FILE, workers: int = 4, poll_interval: float = 0.5,
+                 max_attempts: int = 3, retention_days: float = 30,
+                 on_change: Optional[Callable[[Job], None]] = None,
+                 on_prune: Optional[Callable[[str], None]] = None):
+        self.path = path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        # A job that keeps taking its process down is not retried forever
+        self.max_attempts = max_attempts
+        self.retention_days = retention_days
+        self.on_change = on_change
+        self.on_prune = on_prune  # Called with the id of every pruned job
+        self._handlers: Dict[str, Handler] = {}
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        # Marks the jobs this queue runs. PIDs get reused (a restarted
+        # container's workers often get the same ones), so they can't
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                state TEXT NOT NULL,
+                progress TEXT NOT NULL DEFAULT '{}',
+                result TEXT,
+                error TEXT,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                owner TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state, created);
+            CREATE INDEX IF NOT EXISTS idx_jobs_kind ON jobs (kind, created);
+        """)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def register(self, kind: str, handler: Handler):
+        """Run jobs of ``kind`` with ``handler(context)``; its return value is the result"""
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None,
+               conflicts: Optional[Callable[[Job], bool]] = None) -> Job:
+        """Queue a job, unless ``conflicts`` matches an active job of the same kind
+
+        That raises ``JobConflict``. The check and the insert are one
+        transaction, so two processes submitting clashing jobs at once can't
+        both succeed.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        with self._transaction():
+            if conflicts:
+                for job in self.list(kind=kind, state=QUEUED) + self.list(kind=kind, state=RUNNING):
+                    if conflicts(job):
+                        raise JobConflict(job)
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, params, state, created) VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params or {}), QUEUED, time.time())
+            )
+        with self._wakeup:
+            self._wakeup.notify()
+        return self._changed(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def list(self, kind: Optional[str] = None, state: Optional[str] = None, limit: int = 50) -> List[Job]:
+        """Most recent jobs first"""
+        clauses, args = [], []
+        if kind:
+            clauses.append("kind = ?")
+            args.append(kind)
+        if state:
+            clauses.append("state = ?")
+            args.append(state)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT * FROM jobs {where} ORDER BY created DESC LIMIT ?", (*args, limit)
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued job now, or ask a running one to stop"""
+        with self._transaction():
+            job = self.get(job_id)
+            if not job or not job.active:
+                return job
+            if job.state == QUEUED:
+                self._db.execute("UPDATE jobs SET state = ?, finished = ?, cancel_requested = 1 WHERE id = ?",
+                                 (CANCELLED, time.time(), job_id))
+            else:
+                self._db.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        return self._changed(job_id)
+
+    def requeue(self, job_id: str, conflicts: Optional[Callable[[Job], bool]] = None) -> Optional[Job]:
+        """Run a finished job again under the same id, e.g. to resume it
+
+        Like ``submit``, raises ``JobConflict`` if ``conflicts`` matches an
+        active job of the same kind, checked in the same transaction.
+        """
+        with self._transaction():
+            job = self.get(job_id)
+            if conflicts and job:
+                for active in self.list(kind=job.kind, state=QUEUED) + self.list(kind=job.kind, state=RUNNING):
+                    if conflicts(active):
+                        raise JobConflict(active)
+            self._db.execute(
+                "UPDATE jobs SET state = ?, error = NULL, result = NULL, finished = NULL, "
+                "cancel_requested = 0, attempts = 0, owner = NULL WHERE id = ? AND state IN (?, ?, ?)",
+                (QUEUED, job_id, *FINISHED_STATES)
+            )
+        with self._wakeup:
+            self._wakeup.notify()
+        return self._changed(job_id)
+
+    def start(self):
+        """Recover jobs orphaned by a previous process and start the workers"""
+        self._stopping = False
+        self.recover()
+        self.prune()
+        for n in range(self.workers - sum(t.is_alive() for t in self._threads)):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{n}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def stop(self, wait: bool = True):
+        """Stop taking new jobs; running ones carry on unless cancelled"""
+        self._stopping = True
+        with self._wakeup:
+            self._wakeup.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = [t for t in self._threads if t.is_alive()]
+
+    def recover(self) -> List[str]:
+        """Requeue running jobs whose process is gone; returns their ids
+
+        Only the process that runs the queue calls this, so a running job
+        owned by any other queue was interrupted.
+        """
+        with self._transaction():
+            rows = self._db.execute(
+                "SELECT id, attempts, cancel_requested FROM jobs WHERE state = ? AND owner IS NOT ?",
+                (RUNNING, self.owner)
+            ).fetchall()
+            for row in rows:
+                if row["cancel_requested"]:
+                    state, error = CANCELLED, None
+                elif row["attempts"] >= self.max_attempts:
+                    state, error = FAILED, f"Interrupted {row['attempts']} times"
+                else:
+                    state, error = QUEUED, None
+                self._db.execute(
+                    "UPDATE jobs SET state = ?, error = ?, owner = NULL, "
+                    "finished = CASE WHEN ? = 'queued' THEN NULL ELSE ? END WHERE id = ?",
+                    (state, error, state, time.time(), row["id"])
+                )
+        return [row["id"] for row in rows]
+
+    def prune(self) -> List[str]:
+        """Drop finished jobs older than the retention period; returns their ids"""
+        cutoff = time.time() - self.retention_days * 86400
+        with self._transaction():
+            pruned = [row["id"] for row in self._db.execute("SELECT id FROM jobs WHERE finished < ?", (cutoff,))]
+            self._db.execute("DELETE FROM jobs WHERE finished < ?", (cutoff,))
+        if self.on_prune:
+            for job_id in pruned:
+                try:
+                    self.on_prune(job_id)
+                except Exception:
+                    pass
+        return pruned
+
+    def close(self):
+        self.stop(wait=False)
+        with self._lock:
+            self._db.close()
+
+    def _work(self):
+        while not self._stopping:
+            job = self._claim()
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+            self._run(job)
+
+    def _claim(self) -> Optional[Job]:
+        """Atomically move the oldest runnable job to running"""
+        if not self._handlers:
+            return None
+        kinds = list(self._handlers)
+        with self._transaction():
+            row = self._db.execute(
+                f"SELECT id FROM jobs WHERE state = ? AND kind IN ({','.join('?' * len(kinds))}) "
+                "ORDER BY created LIMIT 1", (QUEUED, *kinds)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET state = ?, started = ?, owner = ?, attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, time.time(), self.owner, row["id"])
+            )
+        return self._changed(row["id"])
+
+    def _run(self, job: Job):
+        context = JobContext(self, job)
+        try:
+            result = self._handlers[job.kind](context)
+        except JobCancelled:
+            self._finish(job.id, CANCELLED)
+        except Exception as e:
+            self._finish(job.id, FAILED, error=str(e) or type(e).__name__)
+        else:
+            self._finish(job.id, SUCCEEDED, result=result)
+
+    def _finish(self, job_id: str, state: str, result: Any = None, error: Optional[str] = None):
+        self._update(job_id, state=state, result=result, error=error, finished=time.time(), owner=None)
+        self._changed(job_id)
+
+    def _update(self, job_id: str, **fields):
+        encoded = {k: json.dumps(v) if k in ("progress", "result") else v for k, v in fields.items()}
+        with self._lock:
+            self._db.execute(
+                f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in encoded)} WHERE id = ?",
+                (*encoded.values(), job_id)
+            )
+
+    def _changed(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job and self.on_change:
+            try:
+                self.on_change(job)
+            except Exception:
+                pass
+        return job
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Job:
+        return Job(
+            id=row["id"],
+            kind=row["kind"],
+            params=json.loads(row["params"]),
+            state=row["state"],
+            progress=json.loads(row["progress"]),
+            result=json.loads(row["result"]) if row["result"] is not None else None,
+            error=row["error"],
+            created=row["created"],
+            started=row["started"],
+            finished=row["finished"],
+            attempts=row["attempts"],
+            cancel_requested=bool(row["cancel_requested"]),
+        )
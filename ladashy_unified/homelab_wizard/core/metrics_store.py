@@ -0,0 +1,291 @@
+"""
+Time-series store for collected metrics
+
+Every numeric field of a collection result is appended as a sample of the
+series (service key, metric name). Samples are rolled up into 1m, 1h and 1d
+buckets (count, sum, min, max, last) as they are written, and each
+resolution is kept for its own retention period, so range queries over long
+spans read a few hundred pre-aggregated rows instead of raw samples.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..utils.paths import data_path
+
+METRICS_FILE = data_path("metrics.db")
+
+# Bucket width in seconds per resolution; "raw" is the samples themselves
+RESOLUTIONS = {"raw": 0, "1m": 60, "1h": 3600, "1d": 86400}
+
+DEFAULT_RETENTION = {
+    "raw": 2 * 86400,
+    "1m": 7 * 86400,
+    "1h": 180 * 86400,
+    "1d": 5 * 365 * 86400,
+}
+
+
+def flatten_metrics(data: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Yield (name, value) for every numeric field of a collection result
+
+    Nested dicts become dotted names and lists of dicts are keyed by the
+    item's path, name or title, e.g. ``root_folders[/movies].free_space``.
+    """
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            if math.isfinite(value):
+                yield name, float(value)
+        elif isinstance(value, dict):
+            yield from flatten_metrics(value, f"{name}.")
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                if isinstance(item, dict):
+                    label = item.get('path') or item.get('name') or item.get('title') or index
+                    yield from flatten_metrics(item, f"{name}[{label}].")
+
+
+class MetricsStore:
+    """Append-only SQLite store of metric samples with rollups and retention"""
+
+    def __init__(self, path: str = METRICS_FILE, retention: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.retention = {**DEFAULT_RETENTION, **(retention or {})}
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], int] = {}
+        self._last_retention = 0.0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS series (
+                id INTEGER PRIMARY KEY,
+                service TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                UNIQUE (service, metric)
+            );
+            CREATE TABLE IF NOT EXISTS samples (
+                series_id INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (series_id, ts)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS rollups (
+                series_id INTEGER NOT NULL,
+                resolution INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                total REAL NOT NULL,
+                low REAL NOT NULL,
+                high REAL NOT NULL,
+                last REAL NOT NULL,
+                PRIMARY KEY (series_id, resolution, bucket)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_samples_ts ON samples (ts);
+            CREATE INDEX IF NOT EXISTS idx_rollups_age ON rollups (resolution, bucket);
+        """)
+        for series_id, service, metric in self._db.execute("SELECT id, service, metric FROM series"):
+            self._series[(service, metric)] = series_id
+
+    def _series_id(self, service: str, metric: str) -> int:
+        key = (service, metric)
+        if key not in self._series:
+            self._db.execute("INSERT OR IGNORE INTO series (service, metric) VALUES (?, ?)", key)
+            self._series[key] = self._db.execute(
+                "SELECT id FROM series WHERE service = ? AND metric = ?", key
+            ).fetchone()[0]
+        return self._series[key]
+
+    def _find_series(self, service: str, metric: str) -> Optional[int]:
+        """Id of an existing series, including ones another process created"""
+        key = (service, metric)
+        if key not in self._series:
+            row = self._db.execute(
+                "SELECT id FROM series WHERE service = ? AND metric = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            self._series[key] = row[0]
+        return self._series[key]
+
+    def record(self, service: str, data: Dict[str, Any], timestamp: Optional[float] = None) -> int:
+        """Append every numeric field of ``data``; returns the number of samples"""
+        ts = int(timestamp if timestamp is not None else time.time())
+        metrics = list(flatten_metrics(data))
+        if not metrics:
+            return 0
+
+        with self._lock:
+            samples = [(self._series_id(service, name), ts, value) for name, value in metrics]
+            # A second record in the same second replaces its samples, so the
+            # rollups swap the old value for the new one instead of adding one
+            # (min and max can't forget the old value, but count and avg stay right)
+            replaced = dict(self._db.execute(
+                f"SELECT series_id, value FROM samples WHERE ts = ? "
+                f"AND series_id IN ({','.join('?' * len(samples))})",
+                (ts, *(series_id for series_id, _, _ in samples))
+            ).fetchall())
+            self._db.executemany("INSERT OR REPLACE INTO samples VALUES (?, ?, ?)", samples)
+            self._db.executemany(
+                """
+                INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (series_id, resolution, bucket) DO UPDATE SET
+                    count = count + excluded.count,
+                    total = total + excluded.total,
+                    low = min(low, excluded.low),
+                    high = max(high, excluded.high),
+                    last = excluded.last
+                """,
+                [
+                    (series_id, width, ts - ts % width,
+                     0 if series_id in replaced else 1,
+                     value - replaced.get(series_id, 0.0), value, value, value)
+                    for series_id, _, value in samples
+                    for width in RESOLUTIONS.values() if width
+                ]
+            )
+            self._db.commit()
+
+            # Retention deletes are indexed, but there is no need to run them on every write
+            if ts - self._last_retention > 3600:
+                self._apply_retention(ts)
+        return len(samples)
+
+    def apply_retention(self, now: Optional[float] = None):
+        """Delete samples and rollups older than their resolution's retention"""
+        with self._lock:
+            self._apply_retention(int(now if now is not None else time.time()))
+
+    def _apply_retention(self, now: int):
+        self._db.execute("DELETE FROM samples WHERE ts < ?", (now - self.retention["raw"],))
+        for name, width in RESOLUTIONS.items():
+            if width:
+                self._db.execute(
+                    "DELETE FROM rollups WHERE resolution = ? AND bucket < ?",
+                    (width, now - self.retention[name])
+                )
+        self._db.commit()
+        self._last_retention = now
+
+    def list_series(self, service: Optional[str] = None) -> List[Dict[str, str]]:
+        """Known (service, metric) pairs, optionally for one service"""
+        # Read from the database: other processes may have added series
+        with self._lock:
+            if service is None:
+                rows = self._db.execute("SELECT service, metric FROM series ORDER BY service, metric")
+            else:
+                rows = self._db.execute(
+                    "SELECT service, metric FROM series WHERE service = ? ORDER BY metric", (service,)
+                )
+            return [{"service": s, "metric": m} for s, m in rows]
+
+    def choose_resolution(self, start: float, end: float, max_points: int = 500,
+                          now: Optional[float] = None) -> str:
+        """Finest resolution that still covers ``start`` in at most ``max_points`` rows"""
+        now = now if now is not None else time.time()
+        span = max(end - start, 1)
+        for name, width in RESOLUTIONS.items():
+            if start < now - self.retention[name]:
+                continue
+            # Raw samples arrive at most about once a minute
+            if span / (width or 60) <= max_points:
+                return name
+        return "1d"
+
+    def query(self, service: str, metric: str, start: Optional[float] = None,
+              end: Optional[float] = None, resolution: Optional[str] = None,
+              max_points: int = 500) -> Dict[str, Any]:
+        """Points of one series between ``start`` and ``end`` (default: last 24h)
+
+        Raw points carry a single value; rollup points carry avg, min, max,
+        last and count for their bucket.
+        """
+        end = end if end is not None else time.time()
+        start = start if start is not None else end - 86400
+        resolution = resolution or self.choose_resolution(start, end, max_points)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        with self._lock:
+            series_id = self._find_series(service, metric)
+            if series_id is None:
+                points = []
+            elif resolution == "raw":
+                points = [
+                    {"ts": ts, "value": value}
+                    for ts, value in self._db.execute(
+                        "SELECT ts, value FROM samples WHERE series_id = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                        (series_id, int(start), int(end))
+                    )
+                ]
+            else:
+                width = RESOLUTIONS[resolution]
+                points = [
+                    {"ts": bucket, "avg": total / count, "min": low, "max": high, "last": last, "count": count}
+                    for bucket, count, total, low, high, last in self._db.execute(
+                        "SELECT bucket, count, total, low, high, last FROM rollups "
+                        "WHERE series_id = ? AND resolution = ? AND bucket BETWEEN ? AND ? ORDER BY bucket",
+                        (series_id, width, int(start) - int(start) % width, int(end))
+                    )
+                ]
+
+        return {
+            "service": service,
+            "metric": metric,
+            "resolution": resolution,
+            "start": int(start),
+            "end": int(end),
+            "points": points,
+        }
+
+    def aggregate(self, service: str, metric: str, start: Optional[float] = None,
+                  end: Optional[float] = None) -> Dict[str, Any]:
+        """Count, min, max, avg and last value of a series over a range"""
+        end = end if end is not None else time.time()
+        start = start if start is not None else end - 86400
+        resolution = self.choose_resolution(start, end)
+        width = RESOLUTIONS[resolution]
+
+        with self._lock:
+            series_id = self._find_series(service, metric)
+            row = None
+            if series_id is not None and resolution == "raw":
+                row = self._db.execute(
+                    "SELECT COUNT(*), SUM(value), MIN(value), MAX(value), "
+                    "(SELECT value FROM samples WHERE series_id = ?1 AND ts BETWEEN ?2 AND ?3 ORDER BY ts DESC LIMIT 1) "
+                    "FROM samples WHERE series_id = ?1 AND ts BETWEEN ?2 AND ?3",
+                    (series_id, int(start), int(end))
+                ).fetchone()
+            elif series_id is not None:
+                row = self._db.execute(
+                    "SELECT SUM(count), SUM(total), MIN(low), MAX(high), "
+                    "(SELECT last FROM rollups WHERE series_id = ?1 AND resolution = ?2 "
+                    " AND bucket BETWEEN ?3 AND ?4 ORDER BY bucket DESC LIMIT 1) "
+                    "FROM rollups WHERE series_id = ?1 AND resolution = ?2 AND bucket BETWEEN ?3 AND ?4",
+                    (series_id, width, int(start) - int(start) % width, int(end))
+                ).fetchone()
+
+        count, total, low, high, last = row if row and row[0] else (0, None, None, None, None)
+        return {
+            "service": service,
+            "metric": metric,
+            "resolution": resolution,
+            "count": count,
+            "avg": total / count if count else None,
+            "min": low,
+            "max": high,
+            "last": last,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
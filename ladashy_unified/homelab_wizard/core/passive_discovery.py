@@ -0,0 +1,143 @@
+"""
+Passive host discovery
+
+Finds live hosts without sweeping addresses: the kernel's neighbor (ARP)
+table lists every host this machine talked to recently, and one mDNS and
+one SSDP query, answered within a short window, turn up the devices that
+advertise themselves (printers, TVs, NAS boxes, media servers). The
+scanner sweeps these first; the full address sweep becomes a fallback.
+"""
+import asyncio
+import ipaddress
+import socket
+import struct
+from typing import Callable, Iterable, List, Set
+
+from .address_space import host_span
+
+ARP_TABLE = "/proc/net/arp"
+ATF_COM = 0x2  # Neighbor entry is complete (the host answered)
+
+MDNS_GROUP = ("224.0.0.251", 5353)
+SSDP_GROUP = ("239.255.255.250", 1900)
+
+SSDP_SEARCH = (
+    "M-SEARCH * HTTP/1.1\r\n"
+    "HOST: 239.255.255.250:1900\r\n"
+    'MAN: "ssdp:discover"\r\n'
+    "MX: 1\r\n"
+    "ST: ssdp:all\r\n"
+    "\r\n"
+).encode()
+
+
+def read_arp_table(path: str = ARP_TABLE) -> List[str]:
+    """Addresses of complete entries in the kernel's ARP table"""
+    try:
+        with open(path) as table:
+            lines = table.readlines()[1:]
+    except OSError:
+        return []
+    hosts = []
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 4:
+            continue
+        ip, flags, mac = fields[0], fields[2], fields[3]
+        if int(flags, 16) & ATF_COM and mac != "00:00:00:00:00:00":
+            hosts.append(ip)
+    return hosts
+
+
+def mdns_query(name: str = "_services._dns-sd._udp.local") -> bytes:
+    """A DNS-SD service enumeration query (PTR), asking for unicast answers"""
+    question = b"".join(bytes([len(label)]) + label.encode() for label in name.split(".")) + b"\0"
+    # id 0, no flags, one question; type PTR, class IN with the unicast-response bit
+    return struct.pack("!6H", 0, 0, 1, 0, 0, 0) + question + struct.pack("!2H", 12, 0x8001)
+
+
+def hosts_in(addresses: Iterable[str], networks: Iterable[str]) -> List[str]:
+    """The addresses that are hosts of any of ``networks``, in order, without duplicates"""
+    spans = []
+    for network in networks:
+        try:
+            first, count = host_span(network)
+        except ValueError:
+            continue
+        spans.append((ipaddress.ip_network(network).version, first, first + count))
+    found = {}
+    for address in addresses:
+        try:
+            parsed = ipaddress.ip_address(address)
+        except ValueError:
+            continue
+        value = int(parsed)
+        if any(version == parsed.version and first <= value < end for version, first, end in spans):
+            found.setdefault(address, None)
+    return list(found)
+
+
+class _Responders(asyncio.DatagramProtocol):
+    def __init__(self, on_host: Callable[[str], None]):
+        self.on_host = on_host
+
+    def datagram_received(self, data, addr):
+        self.on_host(addr[0])
+
+    def error_received(self, exc):
+        pass
+
+
+class PassiveDiscovery:
+    """Live hosts from the ARP table and from mDNS/SSDP responders"""
+
+    def __init__(self, listen_window: float = 2.0, arp_table: str = ARP_TABLE,
+                 use_mdns: bool = True, use_ssdp: bool = True):
+        self.listen_window = listen_window
+        self.arp_table = arp_table
+        self.use_mdns = use_mdns
+        self.use_ssdp = use_ssdp
+
+    def neighbors(self) -> List[str]:
+        """Hosts in the ARP table; instant, no packets sent"""
+        return read_arp_table(self.arp_table)
+
+    async def listen(self, on_host: Callable[[str], None]):
+        """Query mDNS and SSDP and report each responder as it answers
+
+        Devices only announce themselves every few minutes, so rather than
+        wait for announcements, one query each goes out and answers are
+        collected for ``listen_window`` seconds.
+        """
+        queries = []
+        if self.use_mdns:
+            queries.append((mdns_query(), MDNS_GROUP))
+        if self.use_ssdp:
+            queries.append((SSDP_SEARCH, SSDP_GROUP))
+        await asyncio.gather(*(self._query(message, group, on_host) for message, group in queries))
+
+    async def _query(self, message: bytes, group, on_host: Callable[[str], None]):
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+            sock.bind(("", 0))
+            transport, _ = await loop.create_datagram_endpoint(lambda: _Responders(on_host), sock=sock)
+        except OSError:
+            sock.close()
+            return
+        try:
+            transport.sendto(message, group)
+            await asyncio.sleep(self.listen_window)
+        except OSError:
+            # No multicast route; nothing will answer
+            pass
+        finally:
+            transport.close()
+
+    async def discover(self) -> Set[str]:
+        """Every host found passively, once the listen window has passed"""
+        hosts = set(self.neighbors())
+        await self.listen(hosts.add)
+        return hosts
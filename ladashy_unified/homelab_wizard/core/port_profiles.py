@@ -0,0 +1,101 @@
+"""
+Port profiles for the service sweep
+
+Named sets of ports, each a superset of the one before:
+
+- ``quick``: the ports of the services in ``services/definitions.py``,
+  plus the standard web ports
+- ``standard``: quick plus common homelab, infrastructure and database
+  ports
+- ``full``: every port, 1-65535, standard ones first
+
+Ports are swept in order of how often they were open in earlier scans, so
+the services a network actually runs are found first and the long tail of
+a profile comes after.
+"""
+from typing import Dict, Iterable, List, Union
+
+from ..services.definitions import get_all_services
+
+PORT_PROFILES = ("quick", "standard", "full")
+DEFAULT_PROFILE = "standard"
+
+WEB_PORTS = [80, 443, 8080, 8443]
+
+# Checked in the standard profile beyond the defined services' ports
+COMMON_PORTS = [
+    # Web services
+    8081, 8090, 8000, 3000, 5000, 5001,
+    # Media services
+    6767,   # Bazarr
+    8686,   # Lidarr
+    8787,   # Readarr
+    8181,   # Tautulli
+    5055,   # Overseerr
+    3579,   # Ombi
+    # Home automation
+    8123,   # Home Assistant
+    1880,   # Node-RED
+    # Monitoring
+    19999,  # Netdata
+    # Network services
+    53, 22, 21, 25, 110, 143, 445, 3389,
+    # Databases
+    3306, 5432, 27017, 6379,
+    # Other
+    8384,   # Syncthing
+    2342,   # PhotoPrism
+    8200,   # Duplicati
+    10000,  # Webmin
+]
+
+
+def _unique(ports: Iterable[int]) -> List[int]:
+    return list(dict.fromkeys(ports))
+
+
+def service_ports() -> List[int]:
+    """Ports of every defined service, in definition order"""
+    return _unique(port for service in get_all_services() for port in service["ports"])
+
+
+def profile_ports(profile: Union[str, Iterable[int]]) -> List[int]:
+    """Ports of a named profile, or an explicit list of ports, in profile order"""
+    if not isinstance(profile, str):
+        return _unique(int(port) for port in profile)
+    if profile == "quick":
+        return _unique(WEB_PORTS + service_ports())
+    if profile == "standard":
+        return _unique(profile_ports("quick") + COMMON_PORTS)
+    if profile == "full":
+        standard = profile_ports("standard")
+        listed = set(standard)
+        return standard + [port for port in range(1, 65536) if port not in listed]
+    raise ValueError(f"Unknown port profile: {profile}")
+
+
+def order_by_hits(ports: Iterable[int], hits: Dict[int, int]) -> List[int]:
+    """Most often open first; ties keep their profile order"""
+    return sorted(ports, key=lambda port: -hits.get(port, 0))
+
+
+def count_hits(open_ports: Iterable[Iterable[int]]) -> Dict[int, int]:
+    """Hosts each port was open on, from every host's open ports"""
+    hits: Dict[int, int] = {}
+    for ports in open_ports:
+        for port in ports:
+            hits[port] = hits.get(port, 0) + 1
+    return hits
+
+
+def merge_hits(stored: Dict[str, int], hits: Dict[int, int]) -> Dict[str, int]:
+    """Add one scan's hits to a JSON-stored history (ports as string keys)"""
+    merged = dict(stored or {})
+    for port, count in hits.items():
+        merged[str(port)] = merged.get(str(port), 0) + count
+    return merged
+
+
+def load_hits(stored: Dict[str, int]) -> Dict[int, int]:
+    """A JSON-stored history with its ports as ints again"""
+    return {int(port): count for port, count in (stored or {}).items()}
@@ -0,0 +1,121 @@
+"""
+Concurrent TCP port sweep
+
+Fans out every (host, port) pair at once, bounded by a global in-flight cap
+and a per-host cap, and yields open ports as soon as they are found.
+Probes that time out can optionally be retried with a doubled timeout; a
+retry that gets an answer means the first attempt was dropped, which the
+adaptive timing counts as loss along with the OS running out of sockets.
+Without retries the timing still asks for one now and then, on hosts that
+have answered before, so loss is noticed either way.
+"""
+import asyncio
+import socket
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from .host_discovery import default_concurrency
+from .scan_stats import ScanStats
+from .scan_timing import ScanTiming
+
+
+class PortSweeper:
+    """Sweep many hosts and ports concurrently from one event loop"""
+
+    def __init__(self, timeout: float = 0.2, max_concurrency: Optional[int] = None,
+                 per_host_limit: int = 16, stats: Optional[ScanStats] = None,
+                 timing: Optional[ScanTiming] = None, retries: int = 0):
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency or default_concurrency()
+        # Keeps a single slow or rate-limiting host from being hammered
+        self.per_host_limit = per_host_limit
+        self.stats = stats or ScanStats()
+        self.timing = timing or ScanTiming(self.max_concurrency, timeout, adaptive=False)
+        self.retries = retries
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def scan(self, hosts: Iterable[str], ports: List[int]) -> Dict[str, List[int]]:
+        """Blocking helper returning the open ports per host"""
+        async def collect():
+            open_ports = {}
+            async for host, port in self.sweep(hosts, ports):
+                open_ports.setdefault(host, []).append(port)
+            return open_ports
+
+        return asyncio.run(collect())
+
+    async def sweep(self, hosts: Iterable[str], ports: List[int]) -> AsyncIterator[Tuple[str, int]]:
+        """Yield (host, port) for every open port, in the order they answer"""
+        found: asyncio.Queue = asyncio.Queue()
+
+        async def probe(host: str, port: int):
+            if await self.probe(host, port):
+                await found.put((host, port))
+
+        tasks = [
+            asyncio.ensure_future(probe(host, port))
+            for host in hosts for port in ports
+        ]
+
+        done = asyncio.ensure_future(asyncio.gather(*tasks))
+        try:
+            while not (done.done() and found.empty()):
+                getter = asyncio.ensure_future(found.get())
+                await asyncio.wait([getter, done], return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                else:
+                    getter.cancel()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def probe(self, host: str, port: int) -> bool:
+        """Check one port within the global and per-host limits"""
+        host_limit = self._host_limits.get(host)
+        if host_limit is None:
+            host_limit = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+
+        async with self.timing.slot(), host_limit:
+            is_open = await self.is_port_open(host, port)
+        self.stats.record_port(is_open)
+        return is_open
+
+    async def is_port_open(self, host: str, port: int) -> bool:
+        """Non-blocking connect with the host's timeout, retried on timeout"""
+        timeout = self.timing.timeout_for(host, default=self.timeout)
+        result = await self._connect(host, port, timeout)
+        retries = self.retries
+        if result is None and self.timing.check_for_loss(host):
+            retries = max(retries, 1)
+        for _ in range(retries):
+            if result is not None:
+                break
+            # Back off like TCP does before trying again
+            timeout *= 2
+            result = await self._connect(host, port, timeout)
+            if result is not None:
+                self.timing.record_loss()
+        return bool(result)
+
+    async def _connect(self, host: str, port: int, timeout: float) -> Optional[bool]:
+        """True if open, False if refused or unreachable, None if nothing came back"""
+        loop = asyncio.get_running_loop()
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, (host, port)), timeout)
+            self.timing.record_rtt(host, time.monotonic() - started)
+            return True
+        except ConnectionRefusedError:
+            self.timing.record_rtt(host, time.monotonic() - started)
+            return False
+        except asyncio.TimeoutError:
+            return None
+        except OSError as e:
+            # Running short of sockets is worth a retry; other errors are final
+            return None if self.timing.record_error(e) else False
+        finally:
+            sock.close()
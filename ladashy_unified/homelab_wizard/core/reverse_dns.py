@@ -0,0 +1,120 @@
+"""
+Reverse DNS lookups that never hold up a scan
+
+``gethostbyaddr`` blocks, and on networks without PTR records it can take
+seconds to fail. Lookups here run on their own small thread pool, a
+bounded number at a time and each with a timeout, so a slow resolver
+delays hostnames only, never discovery or the port sweep. Answers are
+kept for a TTL, and failures for a shorter one, in a cache that can be
+shared across scans.
+"""
+import asyncio
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+UNKNOWN = "Unknown"
+
+
+def reverse_lookup(ip: str) -> str:
+    """Blocking PTR lookup; ``UNKNOWN`` if there is no name"""
+    try:
+        return socket.gethostbyaddr(ip)[0]
+    except (socket.herror, socket.gaierror, OSError):
+        return UNKNOWN
+
+
+class HostnameCache:
+    """Hostnames by address, expiring after ``ttl`` (``negative_ttl`` for failed lookups)"""
+
+    def __init__(self, ttl: float = 3600, negative_ttl: float = 300, max_entries: int = 4096):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, ip: str) -> Optional[str]:
+        """The cached hostname (possibly ``UNKNOWN``), or None if not cached"""
+        with self._lock:
+            entry = self._entries.get(ip)
+            if entry is None:
+                return None
+            hostname, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[ip]
+                return None
+            self._entries.move_to_end(ip)
+            return hostname
+
+    def put(self, ip: str, hostname: str):
+        ttl = self.negative_ttl if hostname == UNKNOWN else self.ttl
+        with self._lock:
+            self._entries[ip] = (hostname, time.monotonic() + ttl)
+            self._entries.move_to_end(ip)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class ReverseResolver:
+    """Asynchronous, cached reverse lookups with at most ``max_concurrency`` in flight
+
+    A lookup taking longer than ``timeout`` once started counts as failed,
+    but keeps its thread (and slot) until the resolver gives up, and its
+    answer is cached if one comes. Concurrent lookups of the same address
+    share one query.
+    """
+
+    def __init__(self, cache: Optional[HostnameCache] = None,
+                 lookup: Callable[[str], str] = reverse_lookup,
+                 max_concurrency: int = 16, timeout: float = 2.0):
+        self.cache = cache if cache is not None else HostnameCache()
+        self.lookup = lookup
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="reverse-dns")
+
+    async def resolve(self, ip: str) -> str:
+        """Hostname of ``ip``, or ``UNKNOWN``"""
+        hostname = self.cache.get(ip)
+        if hostname is not None:
+            return hostname
+        if ip not in self._pending:
+            self._pending[ip] = asyncio.ensure_future(self._query(ip))
+        return await asyncio.shield(self._pending[ip])
+
+    async def _query(self, ip: str) -> str:
+        try:
+            # A slot is a free lookup thread, so the timeout below only runs
+            # once the lookup has actually started
+            await self._slots.acquire()
+            lookup = asyncio.get_running_loop().run_in_executor(self._executor, self.lookup, ip)
+            lookup.add_done_callback(lambda future: self._finished(ip, future))
+            try:
+                return await asyncio.wait_for(asyncio.shield(lookup), self.timeout)
+            except asyncio.TimeoutError:
+                # Reported as unknown now; the answer is still cached if it comes
+                self.cache.put(ip, UNKNOWN)
+                return UNKNOWN
+        finally:
+            del self._pending[ip]
+
+    def _finished(self, ip: str, lookup: asyncio.Future):
+        """The thread is free again; keep whatever it found"""
+        self._slots.release()
+        if not lookup.cancelled() and lookup.exception() is None:
+            self.cache.put(ip, lookup.result())
+
+    def close(self):
+        """Stop without waiting for lookups still stuck in the resolver"""
+        for query in self._pending.values():
+            query.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,154 @@
+"""
+Checkpoints that let an interrupted scan resume where it stopped
+
+A checkpoint records, per network, which ranges of host offsets have been
+fully probed, the live hosts whose sweep and fingerprinting finished (with
+their results), and live hosts found but not finished yet. Finished ranges
+are merged as they complete, so a checkpoint stays small however large the
+network is.
+"""
+import bisect
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.paths import data_path
+
+CHECKPOINT_DIR = data_path("checkpoints")
+
+
+class RangeSet:
+    """Sorted, merged set of half-open integer ranges"""
+
+    def __init__(self, ranges: Iterable[Tuple[int, int]] = ()):
+        self.ranges: List[List[int]] = []
+        for start, end in ranges:
+            self.add(start, end)
+
+    def add(self, start: int, end: int):
+        if start >= end:
+            return
+        index = bisect.bisect_left(self.ranges, [start, start])
+        # Merge with a neighbour on the left that touches or overlaps
+        if index and self.ranges[index - 1][1] >= start:
+            index -= 1
+            start = self.ranges[index][0]
+        stop = index
+        while stop < len(self.ranges) and self.ranges[stop][0] <= end:
+            end = max(end, self.ranges[stop][1])
+            stop += 1
+        self.ranges[index:stop] = [[start, max(end, start)]]
+
+    def gaps(self, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        """Sub-ranges of [start, end) not in the set"""
+        position = start
+        for low, high in self.ranges:
+            if high <= position:
+                continue
+            if low >= end:
+                break
+            if low > position:
+                yield position, low
+            position = max(position, high)
+        if position < end:
+            yield position, end
+
+    @property
+    def covered(self) -> int:
+        return sum(high - low for low, high in self.ranges)
+
+
+class ScanCheckpoint:
+    """Progress of one scan, saved to ``path`` so it can be resumed"""
+
+    def __init__(self, networks: Iterable[str], path: Optional[str] = None):
+        self.networks = list(networks)
+        self.path = path
+        self.done: Dict[str, RangeSet] = {network: RangeSet() for network in self.networks}
+        self.pending = set()
+        # Finished hosts: hostname, open ports, banner hashes and detections
+        self.hosts: Dict[str, Dict] = {}
+        # Finished hosts' discovered_services entries
+        self.services: Dict[str, Dict] = {}
+        self.resumed = False
+
+    @classmethod
+    def for_job(cls, job_id: str, networks: Iterable[str]) -> "ScanCheckpoint":
+        """The saved checkpoint of a scan job if there is one, else a new one"""
+        path = os.path.join(CHECKPOINT_DIR, f"{job_id}.json")
+        return cls.load(path, networks) or cls(networks, path)
+
+    @staticmethod
+    def saved_jobs() -> List[str]:
+        """Ids of the scan jobs that have a saved checkpoint"""
+        if not os.path.isdir(CHECKPOINT_DIR):
+            return []
+        return [name[:-len(".json")] for name in os.listdir(CHECKPOINT_DIR) if name.endswith(".json")]
+
+    @staticmethod
+    def remove(job_id: str):
+        """Remove a scan job's saved checkpoint, e.g. once the job is gone"""
+        path = os.path.join(CHECKPOINT_DIR, f"{job_id}.json")
+        if os.path.exists(path):
+            os.remove(path)
+
+    def mark_found(self, ip: str):
+        self.pending.add(ip)
+
+    def mark_finished(self, ip: str, host: Dict, services: Optional[Dict]):
+        self.pending.discard(ip)
+        self.hosts[ip] = host
+        if services:
+            self.services[ip] = services
+
+    def mark_done(self, network: str, start: int, end: int):
+        """Every address in [start, end) of ``network`` has been probed"""
+        self.done[network].add(start, end)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Write and rename, so a crash mid-save leaves the previous checkpoint
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({
+                "networks": self.networks,
+                "done": {network: ranges.ranges for network, ranges in self.done.items()},
+                "pending": sorted(self.pending),
+                "hosts": self.hosts,
+                "services": self.services,
+            }, f)
+        os.replace(temp_path, self.path)
+
+    @classmethod
+    def load(cls, path: str, networks: Iterable[str]) -> Optional["ScanCheckpoint"]:
+        """A saved checkpoint, or None if missing, unreadable or for other networks"""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("networks") != list(networks):
+            return None
+
+        checkpoint = cls(networks, path)
+        checkpoint.resumed = True
+        for network, ranges in data.get("done", {}).items():
+            checkpoint.done[network] = RangeSet(ranges)
+        checkpoint.pending = set(data.get("pending", []))
+        checkpoint.services = data.get("services", {})
+        for ip, host in data.get("hosts", {}).items():
+            # JSON object keys are strings; ports are ints everywhere else
+            checkpoint.hosts[ip] = {
+                "hostname": host.get("hostname", "Unknown"),
+                "open_ports": host.get("open_ports", []),
+                "banners": {int(p): h for p, h in host.get("banners", {}).items()},
+                "detected": {int(p): tuple(d) for p, d in host.get("detected", {}).items()},
+            }
+        return checkpoint
+
+    def discard(self):
+        """Remove the saved checkpoint once the scan is complete"""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
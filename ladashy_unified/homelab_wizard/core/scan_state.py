@@ -0,0 +1,129 @@
+"""
+Scan state kept between runs for incremental rescans
+"""
+import ipaddress
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..utils.paths import data_path
+
+SCAN_STATE_FILE = data_path("scan_state.json")
+
+
+class ScanState:
+    """Per-host open ports, banner hashes and detector results from one scan"""
+
+    def __init__(self, networks: Optional[List[str]] = None):
+        self.networks = list(networks or [])
+        self.hosts: Dict[str, Dict] = {}
+        self.services: Dict[str, Dict] = {}
+        self.timestamp = datetime.now().isoformat()
+
+    def record_host(self, ip: str, hostname: str, open_ports: Iterable[int],
+                    banners: Dict[int, Optional[str]],
+                    detected: Dict[int, Tuple[str, float]]):
+        self.hosts[ip] = {
+            "hostname": hostname,
+            "open_ports": sorted(open_ports),
+            "banners": dict(banners),
+            "detected": dict(detected),
+        }
+
+    def unchanged(self, ip: str, port: int, open_ports: Iterable[int], banner: Optional[str]) -> bool:
+        """True when a port answers exactly as it did last scan"""
+        host = self.hosts.get(ip)
+        if not host or banner is None:
+            return False
+        return (host["open_ports"] == sorted(open_ports)
+                and host["banners"].get(port) == banner)
+
+    def detection(self, ip: str, port: int) -> Optional[Tuple[str, float]]:
+        """Detector result recorded for a port last scan, if any"""
+        return self.hosts.get(ip, {}).get("detected", {}).get(port)
+
+    def carry_over(self, previous: "ScanState", partial: bool = False):
+        """Keep hosts from a previous scan that this scan's networks did not cover
+
+        A ``partial`` scan didn't look at every address of its networks, so
+        every host it didn't see is kept.
+        """
+        for ip, host in previous.hosts.items():
+            if ip not in self.hosts and (partial or not _in_networks(ip, self.networks)):
+                self.hosts[ip] = host
+                if ip in previous.services:
+                    self.services[ip] = previous.services[ip]
+
+    def save(self, path: str = SCAN_STATE_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({
+                "timestamp": self.timestamp,
+                "networks": self.networks,
+                "hosts": self.hosts,
+                "services": self.services,
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str = SCAN_STATE_FILE) -> Optional["ScanState"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        state = cls(data.get("networks", []))
+        state.timestamp = data.get("timestamp", state.timestamp)
+        state.services = data.get("services", {})
+        for ip, host in data.get("hosts", {}).items():
+            # JSON object keys are strings; ports are ints everywhere else
+            state.hosts[ip] = {
+                "hostname": host.get("hostname", "Unknown"),
+                "open_ports": sorted(host.get("open_ports", [])),
+                "banners": {int(p): h for p, h in host.get("banners", {}).items()},
+                "detected": {int(p): tuple(d) for p, d in host.get("detected", {}).items()},
+            }
+        return state
+
+
+def _in_networks(ip: str, networks: Iterable[str]) -> bool:
+    address = ipaddress.ip_address(ip)
+    for network in networks:
+        try:
+            if address in ipaddress.ip_network(network):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def diff_services(old: Dict[str, Dict], new: Dict[str, Dict],
+                  networks: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+    """Compare two discovered_services maps service by service
+
+    When ``networks`` is given, old hosts outside them are ignored so a scan
+    of one subnet does not report every other subnet as removed.
+    """
+    def index(services, restrict):
+        return {
+            (ip, svc["name"]): svc
+            for ip, host in services.items()
+            if not restrict or _in_networks(ip, networks)
+            for svc in host.get("services", [])
+        }
+
+    before = index(old, bool(networks))
+    after = index(new, False)
+
+    return {
+        "added": [after[key] for key in sorted(after.keys() - before.keys())],
+        "removed": [before[key] for key in sorted(before.keys() - after.keys())],
+        "changed": [
+            {"before": before[key], "after": after[key]}
+            for key in sorted(before.keys() & after.keys())
+            if before[key] != after[key]
+        ],
+    }
@@ -0,0 +1,59 @@
+"""
+Live counters for scan progress reporting
+"""
+import threading
+import time
+from typing import Any, Dict
+
+
+class ScanStats:
+    """Thread-safe scan counters, written by the scanner and read by the API"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start a new measurement window"""
+        with self._lock:
+            self.started = time.monotonic()
+            self.ports_scanned = 0
+            self.ports_open = 0
+            self.fingerprints_run = 0
+            self.fingerprints_reused = 0
+            self.timing = None  # The scan's ScanTiming, once it starts
+
+    def record_port(self, is_open: bool):
+        """Count one finished port probe"""
+        with self._lock:
+            self.ports_scanned += 1
+            if is_open:
+                self.ports_open += 1
+
+    def record_fingerprint(self, reused: bool):
+        """Count one identified port, and whether a stored result was reused"""
+        with self._lock:
+            if reused:
+                self.fingerprints_reused += 1
+            else:
+                self.fingerprints_run += 1
+
+    @property
+    def ports_per_sec(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.ports_scanned / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Snapshot suitable for JSON responses"""
+        with self._lock:
+            stats = {
+                "ports_scanned": self.ports_scanned,
+                "ports_open": self.ports_open,
+                "ports_per_sec": round(self.ports_per_sec, 1),
+                "fingerprints_run": self.fingerprints_run,
+                "fingerprints_reused": self.fingerprints_reused,
+            }
+            timing = self.timing
+        if timing is not None:
+            stats.update(timing.as_dict())
+        return stats
@@ -0,0 +1,254 @@
+"""
+Adaptive probe timeouts and concurrency
+
+Timeouts come from the round-trip times of probes that answered, smoothed
+per subnet the way TCP does it (SRTT/RTTVAR, RFC 6298), so a LAN is probed
+with short timeouts while a VPN link to a remote site gets what it needs.
+The number of probes in flight starts below its ceiling and follows the
+observed loss rate like a TCP congestion window: it doubles while probes
+finish without loss until the first loss, then grows additively and halves
+when too many are lost. Loss is seen when the OS runs short of sockets, and when a probe that
+timed out against a host known to be up answers on a retry; a small share
+of such timeouts is retried for that alone.
+"""
+import asyncio
+import errno
+import ipaddress
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+# Connect errors that mean this machine ran short of sockets or buffers,
+# i.e. too much in flight rather than anything about the target
+LOCAL_PRESSURE_ERRORS = {errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.EAGAIN}
+
+
+class RttEstimator:
+    """Smoothed round-trip time and its variation, as in TCP"""
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+
+    def __init__(self):
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.samples = 0
+
+    def sample(self, rtt: float):
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.samples += 1
+
+    @property
+    def rto(self) -> float:
+        """Retransmission timeout: SRTT + 4 * RTTVAR"""
+        return self.srtt + 4 * self.rttvar
+
+
+class AdaptiveLimiter:
+    """Asyncio semaphore whose limit can change while it is in use
+
+    Waiters are woken in order; a cancelled waiter is skipped when its turn
+    comes instead of being searched for, so cancelling many is cheap.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # The slot was handed over just before the cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._wake()
+
+    def set_limit(self, limit: int):
+        self.limit = limit
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.active < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+
+class ScanTiming:
+    """Per-subnet timeouts and a shared in-flight limit for one scan
+
+    Until a subnet has ``min_samples`` answers its probes use the caller's
+    default (``initial_timeout`` unless given); after that they use the
+    subnet's RTO, clamped to [``min_timeout``, ``max_timeout``]. Only
+    answers are sampled - a timeout says nothing about the path to a dead
+    address. The limit starts at ``initial_concurrency`` (a quarter of
+    ``max_concurrency`` unless given); every ``window`` finished probes it
+    is halved if more than ``loss_threshold`` of them were lost, and otherwise doubled until the first loss and raised by
+    ``increase`` after it (up to ``max_concurrency``). At most
+    ``loss_sample`` of probes are retried to look for loss. With
+    ``adaptive=False`` the timeout stays at its default and the limit at
+    ``max_concurrency``.
+    """
+
+    def __init__(self, max_concurrency: int = 512, initial_timeout: float = 1.0,
+                 min_timeout: float = 0.1, max_timeout: float = 5.0, min_samples: int = 4,
+                 min_concurrency: int = 16, initial_concurrency: Optional[int] = None,
+                 increase: int = 16, window: int = 64,
+                 loss_threshold: float = 0.02, loss_sample: float = 0.05, adaptive: bool = True):
+        self.max_concurrency = max_concurrency
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.increase = increase
+        self.window = window
+        self.loss_threshold = loss_threshold
+        self.loss_sample = loss_sample
+        self.adaptive = adaptive
+        if initial_concurrency is None:
+            initial_concurrency = max_concurrency // 4
+        initial_concurrency = min(max_concurrency, max(self.min_concurrency, initial_concurrency))
+        self.limiter = AdaptiveLimiter(initial_concurrency if adaptive else max_concurrency)
+        self.answered = 0
+        self.lost = 0
+        self.timed_out = 0
+        self.loss_checks = 0
+        self._slow_start = True
+        self._live_hosts = set()
+        self._window_quiet = 0
+        self._window_lost = 0
+        self._subnets: Dict[str, RttEstimator] = {}
+        # Detector threads read timeouts while the event loop records samples
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def subnet(ip: str) -> str:
+        """The /24 (IPv4) or /64 (IPv6) an address belongs to"""
+        if ":" in ip:
+            return str(ipaddress.ip_network(f"{ip}/64", strict=False))
+        # Called for every probe, so skip the ipaddress round trip
+        return f"{ip.rsplit('.', 1)[0]}.0/24"
+
+    def timeout_for(self, ip: str, default: Optional[float] = None) -> float:
+        """Connect timeout for a probe to ``ip``"""
+        if default is None:
+            default = self.initial_timeout
+        if not self.adaptive:
+            return default
+        with self._lock:
+            estimator = self._subnets.get(self.subnet(ip))
+            if estimator is None or estimator.samples < self.min_samples:
+                return default
+            return min(self.max_timeout, max(self.min_timeout, estimator.rto))
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the in-flight probe slots"""
+        await self.limiter.acquire()
+        try:
+            yield
+        finally:
+            self.limiter.release()
+
+    def record_rtt(self, ip: str, rtt: float):
+        """A probe to ``ip`` got an answer (a handshake or a reset) after ``rtt`` seconds"""
+        with self._lock:
+            self._subnets.setdefault(self.subnet(ip), RttEstimator()).sample(rtt)
+            self._live_hosts.add(ip)
+            self.answered += 1
+            self._window_quiet += 1
+        self._adjust()
+
+    def record_loss(self):
+        """A probe was dropped: it timed out but its retry answered, or the OS ran short"""
+        with self._lock:
+            self.lost += 1
+            self._window_lost += 1
+        self._adjust()
+
+    def check_for_loss(self, ip: str) -> bool:
+        """A probe to ``ip`` timed out; returns whether to retry it once to look for loss
+
+        Only hosts that have answered before are worth it: there a timeout
+        is a filtered port or a dropped probe, and an answered retry tells
+        which. A dead address would only time out again.
+        """
+        self.record_timeout()
+        if not self.adaptive:
+            return False
+        with self._lock:
+            if ip not in self._live_hosts:
+                return False
+            if self.loss_checks >= self.loss_sample * (self.answered + self.timed_out):
+                return False
+            self.loss_checks += 1
+            return True
+
+    def record_timeout(self):
+        """A probe got no answer: not loss as such, but a slot freed without trouble"""
+        with self._lock:
+            self.timed_out += 1
+            self._window_quiet += 1
+        self._adjust()
+
+    def record_error(self, error: OSError) -> bool:
+        """Count a connect error as loss if it came from local pressure; returns whether it did"""
+        if error.errno in LOCAL_PRESSURE_ERRORS:
+            self.record_loss()
+            return True
+        return False
+
+    @property
+    def loss_rate(self) -> float:
+        total = self.answered + self.lost
+        return self.lost / total if total else 0.0
+
+    def _adjust(self):
+        """Additive increase, multiplicative decrease, once per window"""
+        if not self.adaptive:
+            return
+        with self._lock:
+            total = self._window_quiet + self._window_lost
+            if total < self.window:
+                return
+            if self._window_lost / total > self.loss_threshold:
+                self._slow_start = False
+                limit = max(self.min_concurrency, self.limiter.limit // 2)
+            elif self._slow_start:
+                limit = min(self.max_concurrency, self.limiter.limit * 2)
+            else:
+                limit = min(self.max_concurrency, self.limiter.limit + self.increase)
+            self._window_quiet = self._window_lost = 0
+        self.limiter.set_limit(limit)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Snapshot suitable for JSON responses"""
+        with self._lock:
+            timeouts = {
+                subnet: round(min(self.max_timeout, max(self.min_timeout, estimator.rto)) * 1000, 1)
+                for subnet, estimator in self._subnets.items()
+                if estimator.samples >= self.min_samples
+            }
+        return {
+            "concurrency": self.limiter.limit,
+            "probe_loss_rate": round(self.loss_rate, 4),
+            "timeouts_ms": timeouts,
+        }
@@ -15,9 +15,27 @@ import subprocess
 import platform
 import ipaddress
 import threading
-from typing import List, Dict, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 from .service_detector import ServiceDetector
+from .host_discovery import HostDiscovery, DEFAULT_PROBE_PORTS, default_concurrency
+from .port_sweep import PortSweeper
+from .scan_stats import ScanStats
+from .scan_state import ScanState
+from .scan_checkpoint import RangeSet, ScanCheckpoint
+from .scan_timing import ScanTiming
+from .address_space import address_codec, host_span, iter_hosts
+from .docker_inventory import DockerInventory
+from .passive_discovery import PassiveDiscovery, hosts_in
+from .reverse_dns import HostnameCache, ReverseResolver, reverse_lookup
+from .port_profiles import DEFAULT_PROFILE, count_hits, order_by_hits, profile_ports
+from ..utils.http import create_session
+
+class ScanCancelled(Exception):
+    """The scan was stopped with ``NetworkScanner.cancel()``"""
+
 
 class NetworkScanner:
     def __init__(self):
@@ -25,7 +43,57 @@ class NetworkScanner:
         self.discovered_hosts = []
         self.scan_timeout = 1
         self.max_threads = 50
-        
+        self.probe_ports = list(DEFAULT_PROBE_PORTS)
+        self.max_concurrency = default_concurrency()
+        self.use_icmp = True
+        self.port_timeout = 0.2
+        # Timeouts learned per subnet from measured round trips, within these
+        # bounds, and in-flight probes adjusted to the loss rate; the fixed
+        # timeouts above are used until a subnet has answered a few probes
+        self.adaptive_timing = True
+        self.min_timeout = 0.1
+        self.max_timeout = 5.0
+        # Retries of timed-out ports. Off by default: filtered ports on every
+        # firewalled host would each cost three timeouts. Worth turning on
+        # for lossy links; without them adaptive timing still retries a few
+        # timeouts on live hosts to notice loss
+        self.port_retries = 0
+        # Ports swept on every live host: a profile name (quick, standard,
+        # full) or a list of ports, swept most-often-open first according to
+        # port_hits (port -> hosts it was open on in earlier scans)
+        self.port_profile = DEFAULT_PROFILE
+        self.port_hits = {}
+        self.last_port_hits = {}  # The same counts for the last scan alone
+        self.per_host_limit = 16
+        # Docker daemons (addresses or tcp:// / unix:// URLs) whose containers
+        # are read from their APIs; the hosts they report skip the port sweep
+        self.docker_hosts = []
+        self.docker_inventory = None  # Optional DockerInventory shared across scans
+        # Hosts known to be live without a sweep (ARP table, mDNS and SSDP
+        # responders) are swept first; the full address sweep then finds
+        # the rest, or is skipped with full_sweep off
+        self.passive_discovery = True
+        self.listen_window = 2.0
+        self.full_sweep = True
+        # Reverse lookups run beside the sweep, at most dns_concurrency at a
+        # time; names are cached across this scanner's scans, or across
+        # scanners by sharing one HostnameCache
+        self.hostname_cache = HostnameCache()
+        self.dns_concurrency = 16
+        self.dns_timeout = 2.0
+        self.queue_size = 256  # Backpressure between pipeline stages
+        self.http_connections_per_host = 4
+        self.stats = ScanStats()
+        self.timing = None  # ScanTiming of the current or last scan
+        self.last_state = None
+        self.fingerprint_cache = None  # Optional FingerprintCache shared across scans
+        self.block_size = 256  # Addresses per checkpointed range
+        self.checkpoint_interval = 15.0  # Seconds between checkpoint saves
+        # Optional callable polled (off the event loop) while a scan runs;
+        # returning True stops it like cancel() does
+        self.should_cancel = None
+        self._cancel = threading.Event()
+
     def add_network(self, network: str) -> bool:
         """Add a network to scan list"""
         try:
@@ -37,6 +105,10 @@ class NetworkScanner:
         except ValueError:
             return False
     
+    def cancel(self):
+        """Stop a running ``discover_all_services`` (from any thread)"""
+        self._cancel.set()
+    
     def remove_network(self, network: str):
         """Remove a network from scan list"""
         if network in self.networks:
@@ -60,57 +132,128 @@ class NetworkScanner:
         return all_hosts
     
     def _scan_network(self, network: str, progress_callback=None) -> Dict[str, str]:
-        """Scan a specific network"""
+        """Scan a specific network
+        
+        Addresses are generated arithmetically and probed through the
+        discovery engine's bounded window, and hostname lookups start as
+        hosts answer with a bounded number queued, so memory depends on the
+        number of live hosts rather than the size of the network.
+        """
         hosts = {}
         
         try:
-            net = ipaddress.ip_network(network)
-            total_hosts = sum(1 for _ in net.hosts())
-            
-            if progress_callback:
-                progress_callback(f"Scanning {total_hosts} hosts in {network}")
-            
-            # Use thread pool for parallel scanning
-            with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-                # Submit all ping tasks
-                future_to_ip = {
-                    executor.submit(self._check_host, str(ip)): str(ip) 
-                    for ip in net.hosts()
-                }
-                
-                # Process results as they complete
-                completed = 0
-                for future in as_completed(future_to_ip):
-                    ip = future_to_ip[future]
-                    completed += 1
-                    
-                    if progress_callback and completed % 10 == 0:
-                        progress_callback(f"Progress: {completed}/{total_hosts} hosts")
-                    
-                    try:
-                        hostname = future.result()
-                        if hostname:
-                            hosts[ip] = hostname
-                            if progress_callback:
-                                progress_callback(f"Found: {ip} ({hostname})")
-                    except Exception as e:
-                        pass
-                        
-        except ValueError as e:
+            _, total_hosts = host_span(network)
+        except ValueError:
             if progress_callback:
                 progress_callback(f"Invalid network: {network}")
-                
+            return hosts
+        
+        if progress_callback:
+            progress_callback(f"Scanning {total_hosts} hosts in {network}")
+        
+        completed = 0
+        
+        def on_result(ip, alive):
+            nonlocal completed
+            completed += 1
+            if progress_callback and completed % 10 == 0:
+                progress_callback(f"Progress: {completed}/{total_hosts} hosts")
+        
+        # Probe every address from one event loop instead of one ping
+        # process per address, resolving hostnames of the live ones meanwhile
+        async def discover_and_resolve():
+            resolver = self._create_resolver()
+            lookups = set()
+            
+            async def resolve(ip):
+                hosts[ip] = await resolver.resolve(ip)
+                if progress_callback:
+                    progress_callback(f"Found: {ip} ({hosts[ip]})")
+            
+            try:
+                discovery = self._create_discovery(self._create_timing())
+                async for ip in discovery.iter_alive(iter_hosts(network), on_result):
+                    if len(lookups) >= self.max_threads * 2:
+                        _, lookups = await asyncio.wait(lookups, return_when=asyncio.FIRST_COMPLETED)
+                    lookups.add(asyncio.ensure_future(resolve(ip)))
+                if lookups:
+                    await asyncio.gather(*lookups)
+            finally:
+                resolver.close()
+        
+        asyncio.run(discover_and_resolve())
+        
         return hosts
-    
+
+    def _create_timing(self) -> ScanTiming:
+        """Fresh adaptive timeouts and concurrency from the scanner settings"""
+        return ScanTiming(
+            max_concurrency=self.max_concurrency,
+            initial_timeout=self.scan_timeout,
+            min_timeout=self.min_timeout,
+            max_timeout=self.max_timeout,
+            adaptive=self.adaptive_timing,
+        )
+
+    def _create_sweeper(self, timing: Optional[ScanTiming] = None) -> PortSweeper:
+        """Build the port sweeper from the scanner settings"""
+        return PortSweeper(
+            timeout=self.port_timeout,
+            max_concurrency=self.max_concurrency,
+            per_host_limit=self.per_host_limit,
+            stats=self.stats,
+            timing=timing,
+            retries=self.port_retries,
+        )
+
+    def _create_discovery(self, timing: Optional[ScanTiming] = None) -> HostDiscovery:
+        """Build the asyncio discovery engine from the scanner settings"""
+        return HostDiscovery(
+            probe_ports=self.probe_ports,
+            timeout=self.scan_timeout,
+            max_concurrency=self.max_concurrency,
+            use_icmp=self.use_icmp,
+            timing=timing,
+        )
+
+    @property
+    def partial(self) -> bool:
+        """Whether a scan only visits hosts found passively, not every address"""
+        return self.passive_discovery and not self.full_sweep
+
+    def _discovery_ports(self) -> List[int]:
+        """The profile's ports, most often open first"""
+        return order_by_hits(profile_ports(self.port_profile), self.port_hits)
+
+    def _create_passive_discovery(self) -> PassiveDiscovery:
+        """Build the passive discovery source from the scanner settings"""
+        return PassiveDiscovery(listen_window=self.listen_window)
+
+    def _create_docker_inventory(self) -> DockerInventory:
+        """Build a one-scan Docker inventory, for when none is shared"""
+        return DockerInventory(timeout=self.max_timeout)
+
+    def _create_resolver(self) -> ReverseResolver:
+        """Build the reverse-DNS stage of one scan, on the shared hostname cache"""
+        return ReverseResolver(
+            cache=self.hostname_cache,
+            lookup=self._resolve_hostname,
+            max_concurrency=self.dns_concurrency,
+            timeout=self.dns_timeout,
+        )
+
+    def _resolve_hostname(self, ip: str) -> str:
+        """Reverse lookup for a live host (blocking)"""
+        return reverse_lookup(ip)
+
     def _check_host(self, ip: str) -> str:
         """Check if host is alive and get hostname"""
         if self._ping_host(ip):
-            # Try to get hostname
-            try:
-                hostname = socket.gethostbyaddr(ip)[0]
-                return hostname
-            except:
-                return "Unknown"
+            hostname = self.hostname_cache.get(ip)
+            if hostname is None:
+                hostname = self._resolve_hostname(ip)
+                self.hostname_cache.put(ip, hostname)
+            return hostname
         return None
     
     def _ping_host(self, ip: str) -> bool:
@@ -174,134 +317,486 @@ class NetworkScanner:
                 
         return open_ports
     
-    def discover_all_services(self, progress_callback=None) -> Dict[str, List[Dict]]:
-        """Discover all services on all networks with comprehensive port scanning"""
+    def discover_all_services(self, progress_callback=None, result_callback=None,
+                              previous_state: Optional[ScanState] = None,
+                              checkpoint: Optional[ScanCheckpoint] = None) -> Dict[str, List[Dict]]:
+        """Discover all services on all networks with comprehensive port scanning
+        
+        Discovery, port sweep and fingerprinting run as a pipeline, so a host
+        is swept as soon as it answers and each open port is identified as
+        soon as it is seen. ``result_callback(ip, host_entry)`` is called every
+        time a host's entry changes, for publishing partial results.
+        
+        With ``previous_state`` the scan is incremental: the detector only
+        runs on ports whose host's open-port set or banner hash changed, and
+        earlier results are reused for the rest. The state of this scan is
+        left in ``self.last_state`` either way.
+        
+        Each host is swept on the ports of ``port_profile``, those most often
+        open in earlier scans (``port_hits``) first; this scan's counts are
+        left in ``self.last_port_hits``.
+        
+        Hosts found passively (``passive_discovery``) are swept before the
+        address sweep gets to them.
+        
+        Containers on ``docker_hosts`` are read from the Docker API before
+        discovery starts. Containers' own addresses are reported from that
+        alone; a daemon's address is still swept, but not on the ports its
+        containers publish.
+        
+        Progress goes into ``checkpoint`` and is saved every
+        ``checkpoint_interval`` seconds and when the scan stops early; a
+        loaded checkpoint makes the scan skip the address ranges and hosts
+        it already finished. ``cancel()`` stops the scan with
+        ``ScanCancelled``.
+        """
+        self.stats.reset()
+        self.timing = self._create_timing()
+        self.stats.timing = self.timing
+        self._cancel.clear()
+        checkpoint = checkpoint or ScanCheckpoint(self.networks)
+        return asyncio.run(self._run_pipeline(progress_callback, result_callback, previous_state, checkpoint))
+
+    async def _run_pipeline(self, progress_callback=None, result_callback=None,
+                            previous_state: Optional[ScanState] = None,
+                            checkpoint: Optional[ScanCheckpoint] = None) -> Dict[str, Dict]:
+        """Discovery -> port sweep -> fingerprint, joined by bounded queues"""
+        checkpoint = checkpoint or ScanCheckpoint(self.networks)
+        loop = asyncio.get_running_loop()
+        host_queue = asyncio.Queue(maxsize=self.queue_size)
+        port_queue = asyncio.Queue(maxsize=self.queue_size)
+        host_slots = asyncio.Semaphore(self.queue_size)
+        # One timing for every stage, so they share the in-flight limit
+        timing = self.timing or self._create_timing()
+        sweeper = self._create_sweeper(timing)
+        detector = ServiceDetector(create_session(
+            max_hosts=self.queue_size,
+            per_host_connections=self.http_connections_per_host,
+        ), timing=timing)
+        resolver = self._create_resolver()
+        ports = self._discovery_ports()
+        fingerprint_workers = self.max_threads
+        
+        hostnames = {}
+        open_ports = {}
+        banners = {}
+        detected = {}
         all_services = {}
+        # Outstanding work per host: its sweep and hostname lookup, plus
+        # each port to fingerprint
+        remaining = {}
+        queued = set()
+        lookups = set()
+        # Services of Docker daemons' addresses read from their APIs, and
+        # the ports those account for, which their sweep skips
+        docker_services = {}
+        docker_ports = {}
         
-        # First, find all hosts
-        hosts = self.scan_networks(progress_callback)
+        # Start from what an earlier run of this scan already finished
+        for ip, host in checkpoint.hosts.items():
+            hostnames[ip] = host["hostname"]
+            open_ports[ip] = list(host["open_ports"])
+            banners[ip] = dict(host["banners"])
+            detected[ip] = dict(host["detected"])
+            queued.add(ip)
+        all_services.update(checkpoint.services)
         
-        # Import what we need
-        from ..services.definitions import get_all_services
-        all_service_definitions = get_all_services()
+        def publish(ip):
+            hostname = hostnames.get(ip, "Unknown")
+            found_services = docker_services.get(ip, []) + self._build_host_services(
+                ip, hostname, sorted(open_ports.get(ip, [])), detected.get(ip, {})
+            )
+            if found_services:
+                all_services[ip] = {
+                    "hostname": hostname,
+                    "services": found_services
+                }
+                if result_callback:
+                    result_callback(ip, all_services[ip])
         
-        # Then scan each host for services
-        for ip, hostname in hosts.items():
-            if progress_callback:
-                progress_callback(f"Deep scanning {ip} ({hostname})")
-            
-            # Comprehensive port list
-            ports_to_check = [
-                # Web services
-                80, 443, 8080, 8443, 8081, 8090, 8000, 3000, 5000, 5001,
-                # Media services
-                32400,  # Plex
-                8096,   # Jellyfin/Emby
-                7878,   # Radarr
-                8989,   # Sonarr
-                9696,   # Prowlarr
-                6767,   # Bazarr
-                8686,   # Lidarr
-                8787,   # Readarr
-                8181,   # Tautulli
-                5055,   # Overseerr
-                3579,   # Ombi
-                # Download clients
-                8112,   # Deluge
-                9091,   # Transmission
-                6881,   # qBittorrent
-                # Management
-                9000,   # Portainer
-                9090,   # Cockpit/Prometheus
-                81,     # Nginx Proxy Manager
-                # Network services
-                53, 22, 21, 445,
-                # Databases
-                3306, 5432, 27017, 6379,
-            ]
+        def finish_work(ip):
+            remaining[ip] -= 1
+            if remaining[ip] == 0:
+                del remaining[ip]
+                checkpoint.mark_finished(ip, {
+                    "hostname": hostnames.get(ip, "Unknown"),
+                    "open_ports": sorted(open_ports.get(ip, [])),
+                    "banners": banners.get(ip, {}),
+                    "detected": detected.get(ip, {}),
+                }, all_services.get(ip))
+        
+        async def inventory_docker_hosts():
+            """Containers straight from the Docker APIs, one listing per daemon"""
+            # A shared inventory already has (and may be watching) daemons
+            # seen before; only new ones are listed
+            inventory = self.docker_inventory or self._create_docker_inventory()
+            try:
+                await loop.run_in_executor(executor, inventory.add_hosts, self.docker_hosts)
+                inventories = [(inventory.address(host), inventory.host_entries(host))
+                               for host in self.docker_hosts]
+            finally:
+                if inventory is not self.docker_inventory:
+                    inventory.close()
+            for host, (address, entries) in zip(self.docker_hosts, inventories):
+                if progress_callback:
+                    found = sum(len(entry["services"]) for entry in entries.values())
+                    progress_callback(f"Docker host {host}: {found} container services")
+                for ip, entry in entries.items():
+                    if ip in queued and ip != address:
+                        continue
+                    if ip == address:
+                        # The daemon's host may serve more than its containers:
+                        # it is still swept, on the ports they don't account for
+                        docker_services.setdefault(ip, []).extend(entry["services"])
+                        docker_ports.setdefault(ip, set()).update(
+                            port for service in entry["services"] for port in service["ports"])
+                        hostnames.setdefault(ip, entry["hostname"])
+                        publish(ip)
+                        continue
+                    # A container's own address: everything it serves is known
+                    queued.add(ip)
+                    hostnames[ip] = entry["hostname"]
+                    open_ports[ip] = sorted({port for service in entry["services"] for port in service["ports"]})
+                    all_services[ip] = entry
+                    checkpoint.mark_finished(ip, {
+                        "hostname": hostnames[ip],
+                        "open_ports": open_ports[ip],
+                        "banners": {},
+                        "detected": {},
+                    }, entry)
+                    if result_callback:
+                        result_callback(ip, entry)
+                if address:
+                    for ip in hosts_in([address], self.networks):
+                        await seed(ip)
+        
+        async def seed(ip):
+            if ip not in queued:
+                queued.add(ip)
+                checkpoint.mark_found(ip)
+                await host_queue.put(ip)
+        
+        async def listen_for_hosts(passive):
+            """Seed mDNS/SSDP responders as they answer"""
+            heard = asyncio.Queue()
             
-            # Find open ports
-            open_ports = []
-            for port in ports_to_check:
-                if self._is_port_open(ip, port):
-                    open_ports.append(port)
-                    if progress_callback:
-                        progress_callback(f"Found open port {port} on {ip}")
+            async def listen():
+                try:
+                    await passive.listen(heard.put_nowait)
+                finally:
+                    heard.put_nowait(None)
             
-            if not open_ports:
-                continue
+            async def forward():
+                while (ip := await heard.get()) is not None:
+                    for host in hosts_in([ip], self.networks):
+                        await seed(host)
             
-            # Try smart detection if available
-            detected_services = {}
+            await asyncio.gather(listen(), forward())
+        
+        async def discover_hosts():
+            if self.docker_hosts:
+                await inventory_docker_hosts()
+            # Hosts found but not finished before the scan stopped go first
+            for ip in sorted(checkpoint.pending - queued):
+                queued.add(ip)
+                await host_queue.put(ip)
+            listening = None
+            if self.passive_discovery:
+                passive = self._create_passive_discovery()
+                known = hosts_in(passive.neighbors(), self.networks)
+                if progress_callback:
+                    progress_callback(f"{len(known)} hosts known from the neighbor table")
+                for ip in known:
+                    await seed(ip)
+                listening = asyncio.ensure_future(listen_for_hosts(passive))
             try:
-                from .service_detector import ServiceDetector
-                detector = ServiceDetector()
+                if self.full_sweep or not self.passive_discovery:
+                    for network in self.networks:
+                        if progress_callback:
+                            progress_callback(f"Scanning network: {network}")
+                        # Closed explicitly so a cancelled scan stops its probes at once
+                        async with contextlib.aclosing(
+                                self._iter_live_hosts(network, progress_callback, checkpoint, timing)) as live_hosts:
+                            async for ip in live_hosts:
+                                if ip not in queued:
+                                    queued.add(ip)
+                                    await host_queue.put(ip)
+                if listening:
+                    await listening
+            finally:
+                if listening:
+                    listening.cancel()
+            await host_queue.put(None)
+        
+        async def resolve_hostname(ip):
+            hostnames[ip] = await resolver.resolve(ip)
+            if progress_callback:
+                progress_callback(f"Found: {ip} ({hostnames[ip]})")
+            if open_ports.get(ip):
+                publish(ip)
+            finish_work(ip)
+        
+        async def probe_port(ip, port):
+            if await sweeper.probe(ip, port):
+                open_ports.setdefault(ip, []).append(port)
+                if progress_callback:
+                    progress_callback(f"Found open port {port} on {ip}")
+                publish(ip)
+                if previous_state is None:
+                    remaining[ip] += 1
+                    await port_queue.put((ip, port))
+        
+        async def sweep_host(ip):
+            # The sweep and the hostname lookup; the lookup runs on its own so
+            # a slow resolver doesn't keep the host's sweep slot
+            remaining[ip] = 2
+            lookup = asyncio.ensure_future(resolve_hostname(ip))
+            lookups.add(lookup)
+            lookup.add_done_callback(lookups.discard)
+            probes = set()
+            try:
+                # Ports start in order, a window at a time, so the likeliest
+                # are probed first and a full profile isn't 65535 tasks per host
+                known = docker_ports.get(ip, ())
+                for port in ports:
+                    if port in known:
+                        continue
+                    if len(probes) >= self.per_host_limit:
+                        done, probes = await asyncio.wait(probes, return_when=asyncio.FIRST_COMPLETED)
+                        for probe in done:
+                            probe.result()
+                    probes.add(asyncio.ensure_future(probe_port(ip, port)))
+                await asyncio.gather(*probes)
+                # Incremental scans need the host's full open-port set before
+                # deciding which ports to fingerprint again
+                if previous_state is not None:
+                    for port in sorted(open_ports.get(ip, [])):
+                        remaining[ip] += 1
+                        await port_queue.put((ip, port))
+                finish_work(ip)
+            finally:
+                for probe in probes:
+                    probe.cancel()
+                host_slots.release()
+        
+        async def sweep_hosts():
+            active = set()
+            try:
+                while (ip := await host_queue.get()) is not None:
+                    # Stop pulling hosts while too many are being swept, so the
+                    # host queue fills up and discovery waits
+                    await host_slots.acquire()
+                    task = asyncio.ensure_future(sweep_host(ip))
+                    active.add(task)
+                    task.add_done_callback(active.discard)
+                await asyncio.gather(*active)
+                await asyncio.gather(*lookups)
+            except asyncio.CancelledError:
+                for task in active | lookups:
+                    task.cancel()
+                raise
+            for _ in range(fingerprint_workers):
+                await port_queue.put(None)
+        
+        async def fingerprint():
+            while (item := await port_queue.get()) is not None:
+                ip, port = item
+                banner, service_name, confidence = await loop.run_in_executor(
+                    executor, self._identify_port, detector, previous_state,
+                    ip, port, list(open_ports[ip])
+                )
+                # Its fetched pages aren't needed again; keeps memory flat
+                detector.forget(ip, port)
+                banners.setdefault(ip, {})[port] = banner
                 
-                for port in open_ports:
-                    service_name, confidence = detector.identify_service(ip, port)
-                    if service_name:
-                        detected_services[port] = (service_name, confidence)
-            except:
-                pass
-            
-            # Match services based on ports
-            found_services = []
+                if service_name:
+                    detected.setdefault(ip, {})[port] = (service_name, confidence)
+                    publish(ip)
+                finish_work(ip)
+        
+        async def supervise():
+            """Save the checkpoint periodically; return once the scan is cancelled"""
+            last_save = loop.time()
+            while not self._cancel.is_set():
+                await asyncio.sleep(0.2)
+                # Noticed even while no stage is reporting progress
+                if self.should_cancel and await asyncio.to_thread(self.should_cancel):
+                    self._cancel.set()
+                if loop.time() - last_save >= self.checkpoint_interval:
+                    checkpoint.save()
+                    last_save = loop.time()
+        
+        executor = ThreadPoolExecutor(max_workers=self.max_threads)
+        finished = False
+        try:
+            pipeline = asyncio.ensure_future(asyncio.gather(
+                discover_hosts(),
+                sweep_hosts(),
+                *(fingerprint() for _ in range(fingerprint_workers)),
+            ))
+            supervisor = asyncio.ensure_future(supervise())
+            done, _ = await asyncio.wait([pipeline, supervisor], return_when=asyncio.FIRST_COMPLETED)
+            supervisor.cancel()
+            if pipeline not in done:
+                # Cancelled: stop every stage before reporting it
+                pipeline.cancel()
+                await asyncio.gather(pipeline, return_exceptions=True)
+                raise ScanCancelled()
+            pipeline.result()
+            finished = True
+        except BaseException:
+            # Keep what was finished so the scan can resume from here
+            checkpoint.save()
+            raise
+        finally:
+            # A stopped scan doesn't wait for lookups and fingerprints still queued
+            executor.shutdown(wait=finished, cancel_futures=True)
+            resolver.close()
+            detector.close()
+        
+        self.last_port_hits = count_hits(open_ports.values())
+        self.last_state = ScanState(self.networks)
+        for ip, host_ports in open_ports.items():
+            self.last_state.record_host(
+                ip, hostnames.get(ip, "Unknown"), host_ports,
+                banners.get(ip, {}), detected.get(ip, {})
+            )
+        self.last_state.services = dict(all_services)
+        if previous_state:
+            self.last_state.carry_over(previous_state, partial=self.partial)
+        
+        return all_services
+
+    def _identify_port(self, detector: ServiceDetector, previous_state: Optional[ScanState],
+                       ip: str, port: int, host_ports: List[int]):
+        """Fingerprint one open port, reusing earlier results when the banner matches
+        
+        Returns (banner_hash, service_name, confidence).
+        """
+        banner = detector.banner_hash(ip, port)
+        
+        if previous_state and previous_state.unchanged(ip, port, host_ports, banner):
+            service_name, confidence = previous_state.detection(ip, port) or (None, 0)
+            self.stats.record_fingerprint(reused=True)
+            return banner, service_name, confidence
+        
+        if self.fingerprint_cache and banner:
+            cached = self.fingerprint_cache.get(ip, port, banner)
+            if cached is not None:
+                self.stats.record_fingerprint(reused=True)
+                return (banner, *cached)
+        
+        service_name, confidence = detector.identify_service_safe(ip, port)
+        self.stats.record_fingerprint(reused=False)
+        if self.fingerprint_cache and banner:
+            self.fingerprint_cache.put(ip, port, banner, service_name, confidence)
+        return banner, service_name, confidence
+
+    async def _iter_live_hosts(self, network: str, progress_callback=None,
+                               checkpoint: Optional[ScanCheckpoint] = None,
+                               timing: Optional[ScanTiming] = None):
+        """Yield live hosts of one network as they answer
+        
+        Addresses are generated lazily, block by block, skipping blocks the
+        checkpoint has as done. A block is marked done in the checkpoint once
+        every address in it has answered or timed out; live hosts are marked
+        found before that, so a saved checkpoint never loses one.
+        """
+        try:
+            first, total_hosts = host_span(network)
+        except ValueError:
+            if progress_callback:
+                progress_callback(f"Invalid network: {network}")
+            return
+        
+        checkpoint = checkpoint or ScanCheckpoint([network])
+        done = checkpoint.done.setdefault(network, RangeSet())
+        completed = done.covered
+        block_size = self.block_size
+        _, parse_address = address_codec(network)
+        blocks = {}  # block index -> [start, end, addresses still unanswered]
+        
+        def addresses():
+            for gap_start, gap_end in list(done.gaps(0, total_hosts)):
+                start = gap_start
+                while start < gap_end:
+                    end = min(gap_end, (start // block_size + 1) * block_size)
+                    blocks[start // block_size] = [start, end, end - start]
+                    yield from iter_hosts(network, start, end)
+                    start = end
+        
+        def on_result(ip, alive):
+            nonlocal completed
+            completed += 1
+            if alive:
+                checkpoint.mark_found(ip)
+            index = (parse_address(ip) - first) // block_size
+            block = blocks[index]
+            block[2] -= 1
+            if block[2] == 0:
+                del blocks[index]
+                checkpoint.mark_done(network, block[0], block[1])
+            if progress_callback and completed % 10 == 0:
+                progress_callback(f"Progress: {completed}/{total_hosts} hosts")
+        
+        discovery = self._create_discovery(timing)
+        async for ip in discovery.iter_alive(addresses(), on_result):
+            yield ip
+
+    def _build_host_services(self, ip: str, hostname: str, open_ports: List[int],
+                             detected_services: Dict[int, Tuple[str, float]]) -> List[Dict]:
+        """Match open ports and detector results against the service definitions"""
+        from ..services.definitions import get_all_services
+        
+        found_services = []
+        
+        # Check each service definition
+        for service_def in get_all_services():
+            service_ports = service_def.get("ports", [])
+            matched_ports = [p for p in service_ports if p in open_ports]
             
-            # Check each service definition
-            for service_def in all_service_definitions:
-                service_ports = service_def.get("ports", [])
-                matched_ports = [p for p in service_ports if p in open_ports]
+            if matched_ports:
+                # Calculate confidence
+                confidence = 0.6  # Base confidence from port match
                 
-                if matched_ports:
-                    # Calculate confidence
-                    confidence = 0.6  # Base confidence from port match
-                    
-                    # Check if smart detection agrees
-                    for port in matched_ports:
-                        if port in detected_services:
-                            detected_name, detected_conf = detected_services[port]
-                            if service_def["name"].lower() in detected_name.lower():
-                                confidence = max(confidence, detected_conf)
-                    
-                    found_services.append({
-                        "name": service_def["name"],
-                        "host": ip,
-                        "ports": matched_ports,
-                        "description": service_def.get("description", ""),
-                        "confidence": confidence,
-                        "device_type": "docker" if hostname == "Unknown" else "host"
-                    })
-            
-            # Add any services detected but not in our definitions
-            for port, (service_name, confidence) in detected_services.items():
-                # Check if we already added this service
-                already_added = any(
-                    service_name.lower() in s["name"].lower() 
-                    for s in found_services
-                )
-                if not already_added and confidence > 0.7:
-                    found_services.append({
-                        "name": service_name.replace('_', ' ').title(),
-                        "host": ip,
-                        "ports": [port],
-                        "confidence": confidence,
-                        "device_type": "detected"
-                    })
-            
-            if found_services:
-                all_services[ip] = {
-                    "hostname": hostname,
-                    "services": found_services
-                }
+                # Check if smart detection agrees
+                for port in matched_ports:
+                    if port in detected_services:
+                        detected_name, detected_conf = detected_services[port]
+                        if service_def["name"].lower() in detected_name.lower():
+                            confidence = max(confidence, detected_conf)
+                
+                found_services.append({
+                    "name": service_def["name"],
+                    "host": ip,
+                    "ports": matched_ports,
+                    "description": service_def.get("description", ""),
+                    "confidence": confidence,
+                    "device_type": "docker" if hostname == "Unknown" else "host"
+                })
         
-        return all_services
+        # Add any services detected but not in our definitions
+        for port, (service_name, confidence) in detected_services.items():
+            # Check if we already added this service
+            already_added = any(
+                service_name.lower() in s["name"].lower() 
+                for s in found_services
+            )
+            if not already_added and confidence > 0.7:
+                found_services.append({
+                    "name": service_name.replace('_', ' ').title(),
+                    "host": ip,
+                    "ports": [port],
+                    "confidence": confidence,
+                    "device_type": "detected"
+                })
+        
+        return found_services
 
     def _is_port_open(self, host: str, port: int) -> bool:
         """Quick check if port is open"""
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(0.2)  # Very fast timeout
+        sock.settimeout(self.port_timeout)  # Very fast timeout
         result = sock.connect_ex((host, port))
         sock.close()
         return result == 0
-
-    
\ No newline at end of file
@@ -2,14 +2,120 @@
 Advanced service detection with multiple identification methods
 """
 import socket
+import hashlib
+import threading
 import requests
 import json
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from ..utils.http import create_session
+from .fingerprints import load_fingerprints, favicon_hash
+from .scan_timing import ScanTiming
+
+# Response lines that change on every request and must not affect banner hashes
+VOLATILE_BANNER_LINES = (b'date:', b'set-cookie:', b'expires:', b'last-modified:',
+                         b'etag:', b'age:', b'content-length:', b'x-request-id:')
 
 class ServiceDetector:
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None, timing: Optional[ScanTiming] = None):
         self.timeout = 2
+        # Measured round-trip times set connect timeouts when available
+        self.timing = timing
+        self.fingerprints = load_fingerprints()
+        # One keep-alive session for the whole scan, and each URL is only
+        # fetched once no matter how many checks look at it. Responses are
+        # kept per "host:port" until that port is identified (``forget``),
+        # and only for the most recent ``max_cached_ports`` ports
+        self.session = session or create_session()
+        self.max_cached_ports = 64
+        self._responses: "OrderedDict[str, Dict[str, Optional[requests.Response]]]" = OrderedDict()
+        self._port_locks = {}
+        self._cache_lock = threading.Lock()
+    
+    def fetch(self, url: str) -> Optional[requests.Response]:
+        """GET a URL through the shared session, reusing earlier responses"""
+        netloc = urlsplit(url).netloc
+        with self._cache_lock:
+            lock = self._port_locks.setdefault(netloc, threading.Lock())
+        
+        with lock:
+            with self._cache_lock:
+                cached = self._responses.get(netloc, {})
+                if url in cached:
+                    self._responses.move_to_end(netloc)
+                    return cached[url]
+            try:
+                response = self.session.get(
+                    url, timeout=self.timeouts(urlsplit(url).hostname), allow_redirects=True
+                )
+            except requests.RequestException:
+                response = None
+            with self._cache_lock:
+                self._responses.setdefault(netloc, {})[url] = response
+                self._responses.move_to_end(netloc)
+                while len(self._responses) > self.max_cached_ports:
+                    evicted, _ = self._responses.popitem(last=False)
+                    self._port_locks.pop(evicted, None)
+            return response
+    
+    def forget(self, host: str, port: int):
+        """Drop responses fetched from one port, once it has been identified"""
+        netloc = f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+        with self._cache_lock:
+            self._responses.pop(netloc, None)
+            self._port_locks.pop(netloc, None)
+    
+    def timeouts(self, host: str) -> Tuple[float, float]:
+        """(connect, read) timeouts for a host
+        
+        Connecting takes a round trip, so it gets the host's measured
+        timeout; reading also waits for the server, so it gets ``timeout``
+        on top of that.
+        """
+        connect = self.timing.timeout_for(host) if self.timing else self.timeout
+        return connect, self.timeout + (connect if self.timing else 0)
+    
+    def clear_cache(self):
+        """Forget fetched responses, e.g. between scans"""
+        with self._cache_lock:
+            self._responses.clear()
+            self._port_locks.clear()
+    
+    def close(self):
+        """Release pooled connections"""
+        self.clear_cache()
+        self.session.close()
         
+    def banner_hash(self, host: str, port: int) -> Optional[str]:
+        """Cheap hash of what a port answers with, used to spot changed services
+        
+        Reads whatever the server sends first (SSH, FTP, databases), or the
+        reply to a HEAD request for servers that wait for the client.
+        """
+        connect_timeout, read_timeout = self.timeouts(host)
+        try:
+            with socket.create_connection((host, port), timeout=connect_timeout) as sock:
+                sock.settimeout(0.3)
+                try:
+                    data = sock.recv(512)
+                except socket.timeout:
+                    data = b''
+                if not data:
+                    sock.settimeout(read_timeout)
+                    sock.sendall(b"HEAD / HTTP/1.0\r\n\r\n")
+                    data = sock.recv(1024)
+        except OSError:
+            return None
+        
+        # Binary greetings carry session ids and salts after the first NUL
+        data = data.split(b'\x00', 1)[0]
+        lines = [
+            line.strip() for line in data.splitlines()
+            if not line.lower().startswith(VOLATILE_BANNER_LINES)
+        ]
+        return hashlib.sha1(b'\n'.join(lines)).hexdigest()
+    
     def identify_service(self, host: str, port: int) -> Tuple[str, float]:
         """
         Identify service on host:port
@@ -59,8 +165,8 @@ class ServiceDetector:
             try:
                 # UniFi typically runs on 8443
                 if 8443 in open_ports:
-                    response = requests.get(f"https://{host}:8443", verify=False, timeout=2)
-                    if 'unifi' in response.text.lower():
+                    response = self.fetch(f"https://{host}:8443")
+                    if response is not None and 'unifi' in response.text.lower():
                         return 'unifi_gateway', 0.95
             except:
                 pass
@@ -68,8 +174,8 @@ class ServiceDetector:
             # Check for pfSense
             try:
                 if 443 in open_ports:
-                    response = requests.get(f"https://{host}", verify=False, timeout=2)
-                    if 'pfsense' in response.text.lower():
+                    response = self.fetch(f"https://{host}:443")
+                    if response is not None and 'pfsense' in response.text.lower():
                         return 'pfsense', 0.95
             except:
                 pass
@@ -126,93 +232,37 @@ class ServiceDetector:
         return base_service, base_confidence
     
     def _check_http_response(self, host: str, port: int) -> Tuple[str, float]:
-        """Check HTTP/HTTPS response headers and content"""
+        """Score HTTP/HTTPS headers, title and body against the fingerprint database"""
         protocols = ['http', 'https'] if port == 443 else ['http']
         
         for protocol in protocols:
-            try:
-                url = f"{protocol}://{host}:{port}"
-                response = requests.get(url, timeout=self.timeout, verify=False, allow_redirects=True)
-                
-                # Check headers
-                headers = response.headers
-                content = response.text.lower()
-                
-                # Service-specific identifications
-                checks = [
-                    # Plex
-                    ('plex', 0.9, [
-                        lambda: 'plex' in headers.get('X-Plex-Protocol', '').lower(),
-                        lambda: 'x-plex-version' in headers,
-                        lambda: 'plex media server' in content,
-                    ]),
-                    
-                    # Jellyfin
-                    ('jellyfin', 0.9, [
-                        lambda: 'jellyfin' in headers.get('Server', '').lower(),
-                        lambda: 'jellyfin' in content,
-                        lambda: '/web/index.html' in content and 'jellyfin' in content,
-                    ]),
-                    
-                    # Radarr
-                    ('radarr', 0.95, [
-                        lambda: 'radarr' in content,
-                        lambda: '<title>radarr</title>' in content,
-                        lambda: port == 7878,
-                    ]),
-                    
-                    # Sonarr
-                    ('sonarr', 0.95, [
-                        lambda: 'sonarr' in content,
-                        lambda: '<title>sonarr</title>' in content,
-                        lambda: port == 8989,
-                    ]),
-                    
-                    # Prowlarr
-                    ('prowlarr', 0.95, [
-                        lambda: 'prowlarr' in content,
-                        lambda: '<title>prowlarr</title>' in content,
-                        lambda: port == 9696,
-                    ]),
-                    
-                    # Pi-hole
-                    ('pihole', 0.95, [
-                        lambda: 'pi-hole' in content,
-                        lambda: '/admin/api.php' in content,
-                        lambda: 'x-pi-hole' in headers,
-                    ]),
-                    
-                    # Portainer
-                    ('portainer', 0.95, [
-                        lambda: 'portainer' in content,
-                        lambda: port == 9000,
-                    ]),
-                    
-                    # UniFi Controller
-                    ('unifi', 0.9, [
-                        lambda: 'unifi' in content,
-                        lambda: port == 8443,
-                    ]),
-                ]
-                
-                # Check each service
-                for service_name, base_confidence, checks_list in checks:
-                    matches = sum(1 for check in checks_list if self._safe_check(check))
-                    if matches > 0:
-                        confidence = base_confidence * (matches / len(checks_list))
-                        return service_name, confidence
-                        
-            except Exception as e:
-                pass
+            base_url = f"{protocol}://{host}:{port}"
+            response = self.fetch(base_url)
+            if response is None:
+                continue
+            
+            favicon = None
+            if self.fingerprints.favicons:
+                icon = self.fetch(f"{base_url}/favicon.ico")
+                if icon is not None and icon.status_code == 200:
+                    favicon = favicon_hash(icon.content)
+            
+            service_name, confidence = self.fingerprints.match(
+                port, response.headers, response.text, favicon
+            )
+            if service_name:
+                return service_name, confidence
         
         return None, 0
     
     def _check_banner(self, host: str, port: int) -> Tuple[str, float]:
         """Check service banner"""
         try:
+            connect_timeout, read_timeout = self.timeouts(host)
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(self.timeout)
+            sock.settimeout(connect_timeout)
             sock.connect((host, port))
+            sock.settimeout(read_timeout)
             
             # For some services, we need to send data first
             if port in [80, 8080, 8096, 32400]:
@@ -238,30 +288,11 @@ class ServiceDetector:
         return None, 0
     
     def _check_specific_endpoints(self, host: str, port: int) -> Tuple[str, float]:
-        """Check specific API endpoints"""
-        endpoint_checks = [
-            # Plex
-            ('plex', '/identity', lambda r: 'machineidentifier' in r.text.lower(), 32400),
-            
-            # Radarr
-            ('radarr', '/api/v3/config/ui', lambda r: True, 7878),
-            
-            # Sonarr  
-            ('sonarr', '/api/v3/config/ui', lambda r: True, 8989),
-            
-            # Prowlarr
-            ('prowlarr', '/api/v1/config/ui', lambda r: True, 9696),
-        ]
-        
-        for service, endpoint, check_func, expected_port in endpoint_checks:
-            if port == expected_port:
-                try:
-                    url = f"http://{host}:{port}{endpoint}"
-                    response = requests.get(url, timeout=self.timeout)
-                    if response.status_code == 200 and check_func(response):
-                        return service, 0.95
-                except:
-                    pass
+        """Check the API endpoints the fingerprint database lists for this port"""
+        for rule in self.fingerprints.endpoints_for_port(port):
+            response = self.fetch(f"http://{host}:{port}{rule.path}")
+            if response is not None and rule.matches(response.status_code, response.text):
+                return rule.service, rule.confidence
         
         return None, 0
     
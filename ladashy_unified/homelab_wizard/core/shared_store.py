@@ -0,0 +1,216 @@
+"""
+State shared by every server worker process
+
+When the API runs under a multi-worker server, each worker is its own
+process, so scan status, the inventory and pushed events have to live
+somewhere all of them can see. This is a small SQLite (WAL) store: JSON
+values under string keys, each with a revision number so readers can tell
+cheaply whether anything changed, collections of items versioned one by
+one so readers fetch only what changed, plus an append-only event log.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..utils.paths import data_path
+
+try:
+    import fcntl
+except ImportError:  # Windows; only single-process servers run there
+    fcntl = None
+
+STATE_DB_FILE = data_path("state.db")
+
+
+class SharedStore:
+    """SQLite key/value store and event log safe to use from many processes"""
+
+    def __init__(self, path: str = STATE_DB_FILE, event_history: int = 2000):
+        self.path = path
+        self.event_history = event_history
+        self._lock = threading.RLock()
+        self._depth = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit mode; transactions are opened explicitly below
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                rev INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS items (
+                collection TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT,
+                version INTEGER NOT NULL,
+                PRIMARY KEY (collection, key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_items_version ON items (collection, version);
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created REAL NOT NULL
+            );
+        """)
+
+    @contextmanager
+    def transaction(self):
+        """Hold the database write lock, across processes, for a read-modify-write"""
+        with self._lock:
+            outermost = self._depth == 0
+            if outermost:
+                self._db.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if outermost:
+                    self._db.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if outermost:
+                self._db.execute("COMMIT")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def get_with_revision(self, key: str) -> Tuple[int, Any]:
+        """(revision, value) of a key; revision 0 if it was never set"""
+        with self._lock:
+            row = self._db.execute("SELECT rev, value FROM state WHERE key = ?", (key,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else (0, None)
+
+    def revisions(self, keys: Iterable[str]) -> Dict[str, int]:
+        """Current revision of each key, 0 for keys never set"""
+        keys = list(keys)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT key, rev FROM state WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).fetchall()
+        found = dict(rows)
+        return {key: found.get(key, 0) for key in keys}
+
+    def set(self, key: str, value: Any) -> int:
+        """Store a value; returns its new revision"""
+        with self.transaction():
+            self._db.execute(
+                "INSERT INTO state VALUES (?, ?, 1) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, rev = rev + 1",
+                (key, json.dumps(value))
+            )
+            return self._db.execute("SELECT rev FROM state WHERE key = ?", (key,)).fetchone()[0]
+
+    def update(self, key: str, func: Callable[[Any], Any], default: Any = None) -> Any:
+        """Atomically replace a value with ``func(current)``; returns the new value"""
+        with self.transaction():
+            value = func(self.get(key, default))
+            self.set(key, value)
+            return value
+
+    def put_items(self, collection: str, items: Dict[str, Any], version: int):
+        """Store items of a collection at ``version``; a None value marks the item removed"""
+        with self.transaction():
+            self._db.executemany(
+                "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?)",
+                [(collection, key, None if value is None else json.dumps(value), version)
+                 for key, value in items.items()]
+            )
+
+    def items_since(self, collection: str, version: Optional[int] = None) -> List[Tuple[str, Any, int]]:
+        """(key, value, version) of items changed after ``version`` (all if None), removed ones as None"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, value, version FROM items WHERE collection = ? AND version > ?",
+                (collection, -1 if version is None else version)
+            ).fetchall()
+        return [(key, None if value is None else json.loads(value), v) for key, value, v in rows]
+
+    def delete_items(self, collection: str, removed_through: Optional[int] = None):
+        """Forget removed items up to a version, or the whole collection if None"""
+        with self.transaction():
+            if removed_through is None:
+                self._db.execute("DELETE FROM items WHERE collection = ?", (collection,))
+            else:
+                self._db.execute(
+                    "DELETE FROM items WHERE collection = ? AND value IS NULL AND version <= ?",
+                    (collection, removed_through)
+                )
+
+    def append_event(self, event: str, data: Any) -> int:
+        """Add an event to the shared log; returns its id"""
+        with self.transaction():
+            cursor = self._db.execute(
+                "INSERT INTO events (event, data, created) VALUES (?, ?, ?)",
+                (event, json.dumps(data), time.time())
+            )
+            event_id = cursor.lastrowid
+            if event_id % 100 == 0:
+                self._db.execute("DELETE FROM events WHERE id <= ?", (event_id - self.event_history,))
+            return event_id
+
+    def events_after(self, event_id: int, limit: int = 1000) -> List[Tuple[int, str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, event, data FROM events WHERE id > ? ORDER BY id LIMIT ?", (event_id, limit)
+            ).fetchall()
+        return [(row[0], row[1], json.loads(row[2])) for row in rows]
+
+    def event_bounds(self) -> Tuple[int, int]:
+        """(oldest, newest) event id still in the log; (0, 0) when empty"""
+        with self._lock:
+            low, high = self._db.execute("SELECT MIN(id), MAX(id) FROM events").fetchone()
+        return (low or 0, high or 0)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class LeaderLock:
+    """Non-blocking, process-wide lock so only one worker runs a singleton job
+
+    The lock is released automatically if the holding process dies.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        if self._file:
+            return True
+        if fcntl is None:
+            self._file = True
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        handle = open(self.path, "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._file = handle
+        return True
+
+    def release(self):
+        if self._file and self._file is not True:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
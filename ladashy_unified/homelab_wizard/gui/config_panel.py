@@ -7,6 +7,7 @@ import json
 from ..gui.service_info_panel import ServiceInfoPanel
 from ..collectors.manager import CollectorManager
 from ..core.connection_tester import ConnectionTester
+from ..utils.paths import data_dir, data_path
 import os
 
 class ServiceConfigPanel:
@@ -66,7 +67,7 @@ class ServiceConfigPanel:
         
     def load_configs(self):
         """Load saved configurations"""
-        config_file = os.path.expanduser("~/.ladashy/service_configs.json")
+        config_file = data_path("service_configs.json")
         if os.path.exists(config_file):
             with open(config_file, 'r') as f:
                 return json.load(f)
@@ -74,7 +75,7 @@ class ServiceConfigPanel:
         
     def save_configs(self):
         """Save configurations to file"""
-        config_dir = os.path.expanduser("~/.ladashy")
+        config_dir = data_dir()
         os.makedirs(config_dir, exist_ok=True)
         
         config_file = os.path.join(config_dir, "service_configs.json")
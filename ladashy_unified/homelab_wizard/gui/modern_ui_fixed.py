@@ -5,6 +5,7 @@ import customtkinter as ctk
 import tkinter as tk
 from PIL import Image, ImageTk
 import os
+from ..utils.paths import data_path
 
 # Set the appearance mode and color theme
 ctk.set_appearance_mode("dark")
@@ -299,7 +300,7 @@ class ModernConfigPanel(ctk.CTkFrame):
         import os
         import json
         
-        config_file = os.path.expanduser("~/.ladashy/service_configs.json")
+        config_file = data_path("service_configs.json")
         if os.path.exists(config_file):
             try:
                 with open(config_file, 'r') as f:
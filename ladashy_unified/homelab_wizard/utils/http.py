@@ -0,0 +1,25 @@
+"""
+Shared HTTP session helpers
+"""
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def create_session(max_hosts: int = 64, per_host_connections: int = 4,
+                   verify: bool = False) -> requests.Session:
+    """Build a keep-alive session with bounded connection pools
+
+    ``max_hosts`` is how many host:port pools are kept open at once and
+    ``per_host_connections`` caps the connections to any one of them;
+    callers block rather than open more.
+    """
+    session = requests.Session()
+    session.verify = verify
+    adapter = HTTPAdapter(
+        pool_connections=max_hosts,
+        pool_maxsize=per_host_connections,
+        pool_block=True,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,89 @@
+"""
+Incremental parsing of large JSON array responses
+"""
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+import requests
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# What can still follow the part of a number already in the buffer
+_NUMBER_TAIL = re.compile(r"[0-9+\-.eE]*\Z")
+
+
+def iter_json_array(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[Any]:
+    """Yield the items of a top-level JSON array one at a time
+
+    Only the item being decoded is held in memory, so peak memory follows
+    the size of the largest item rather than the whole document.
+    """
+    text_decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    buffer = ""
+    pos = 0
+    started = False
+    chunks = iter(chunks)
+    exhausted = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, exhausted
+        if exhausted:
+            return False
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            exhausted = True
+            buffer = buffer[pos:] + text_decoder.decode(b"", final=True)
+            pos = 0
+            return False
+        buffer = buffer[pos:] + text_decoder.decode(chunk)
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buffer):
+            if fill():
+                continue
+            raise ValueError("Unexpected end of JSON array")
+
+        char = buffer[pos]
+        if not started:
+            if char != "[":
+                raise ValueError("Response is not a JSON array")
+            started = True
+            pos += 1
+            continue
+        if char == "]":
+            return
+        if char == ",":
+            pos += 1
+            continue
+
+        try:
+            item, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Item spans past the end of the buffer; read more and retry
+            if fill():
+                continue
+            raise
+        if (not exhausted and isinstance(item, (int, float)) and not isinstance(item, bool)
+                and _NUMBER_TAIL.match(buffer, end)):
+            # A number reaching the buffer edge ("23", "1.", "1e") may go
+            # on in the next chunk
+            fill()
+            continue
+        pos = end
+        yield item
+
+
+def stream_json_array(response: requests.Response, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """Iterate the items of a streamed (``stream=True``) JSON array response"""
+    encoding = response.encoding or "utf-8"
+    try:
+        yield from iter_json_array(response.iter_content(chunk_size=chunk_size), encoding)
+    finally:
+        response.close()
@@ -0,0 +1,18 @@
+"""
+Where LaDashy keeps its files
+
+Databases, locks, checkpoints, saved configs and exports all live in one
+data directory: ``LADASHY_DATA_DIR`` if set (e.g. a mounted volume in a
+container), otherwise ``~/.ladashy``.
+"""
+import os
+
+
+def data_dir() -> str:
+    """The data directory, from the environment or the user's home"""
+    return os.environ.get("LADASHY_DATA_DIR") or os.path.expanduser("~/.ladashy")
+
+
+def data_path(*parts: str) -> str:
+    """A path inside the data directory"""
+    return os.path.join(data_dir(), *parts)
@@ -13,6 +13,33 @@ def launch_web():
     print("Starting LaDashy Web Interface...")
     subprocess.run([sys.executable, "backend/api.py"])
 
+def launch_server():
+    """Serve the API with a production WSGI server"""
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        gunicorn = None
+    
+    if gunicorn:
+        print("Starting LaDashy API (gunicorn)...")
+        subprocess.run([sys.executable, "-m", "gunicorn", "-c", "backend/gunicorn.conf.py"])
+        return
+    
+    try:
+        import waitress  # noqa: F401
+    except ImportError:
+        print("Neither gunicorn nor waitress is installed; using the development server")
+        launch_web()
+        return
+    
+    # Waitress is single-process, so the scheduler runs in it directly
+    print("Starting LaDashy API (waitress)...")
+    subprocess.run([
+        sys.executable, "-c",
+        "import api, waitress; api.start_background_services(); "
+        "waitress.serve(api.app, host='0.0.0.0', port=5000, threads=32)"
+    ], cwd="backend")
+
 def launch_desktop():
     """Launch desktop interface"""
     system = platform.system()
@@ -41,18 +68,20 @@ if __name__ == "__main__":
         mode = sys.argv[1].lower()
         if mode == "web":
             launch_web()
+        elif mode == "serve":
+            launch_server()
         elif mode == "desktop":
             launch_desktop()
         elif mode == "docker":
             launch_docker()
         else:
             print(f"Unknown mode: {mode}")
-            print("Usage: python launch.py [web|desktop|docker]")
+            print("Usage: python launch.py [web|serve|desktop|docker]")
     else:
         # Auto-detect best mode
         if os.path.exists("/.dockerenv"):
             print("Running in Docker container")
-            launch_web()
+            launch_server()
         elif platform.system() == "Windows":
             launch_desktop()
         else:
@@ -40,8 +40,9 @@ case "$1" in
         grep -E "\".*\": .*Collector" homelab_wizard/collectors/manager.py | sed 's/[",:]//g' | awk '{print "  ✅", $1}'
         echo ""
         echo "Saved Configurations:"
-        if [ -f ~/.ladashy/service_configs.json ]; then
-            echo "  $(cat ~/.ladashy/service_configs.json | grep -o '"[^"]*":' | wc -l) services configured"
+        data_dir="${LADASHY_DATA_DIR:-$HOME/.ladashy}"
+        if [ -f "$data_dir/service_configs.json" ]; then
+            echo "  $(cat "$data_dir/service_configs.json" | grep -o '"[^"]*":' | wc -l) services configured"
         else
             echo "  No configurations saved"
         fi
@@ -52,7 +53,7 @@ case "$1" in
         timestamp=$(date +%Y%m%d_%H%M%S)
         backup_dir="backups/backup_$timestamp"
         mkdir -p $backup_dir
-        cp -r ~/.ladashy $backup_dir/
+        cp -r "${LADASHY_DATA_DIR:-$HOME/.ladashy}" $backup_dir/
         cp backend/api.py $backup_dir/
         cp -r homelab_wizard/collectors $backup_dir/
         echo "✅ Backup created: $backup_dir"
@@ -2,13 +2,20 @@
 """
 LaDashy Project Status Checker
 Verifies what's actually working vs what documentation says
+
+Usage: python status-check.py [--watch]
+  --watch  follow live scan events from the API instead of reporting
 """
 import os
+import sys
 import json
 import subprocess
 import requests
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from homelab_wizard.core.events import parse_sse
+
 class ProjectStatusChecker:
     def __init__(self):
         self.project_root = "/home/zach/homelab-documentation/ladashy_unified"
@@ -204,9 +211,47 @@ class ProjectStatusChecker:
             json.dump(self.results, f, indent=2)
         print(f"\n💾 Detailed results saved to: project_status.json")
         print("=" * 60)
+    
+    def watch_scan_events(self):
+        """Print scan progress and found hosts as the API pushes them"""
+        last_event_id = None
+        while True:
+            headers = {"Last-Event-ID": str(last_event_id)} if last_event_id else {}
+            try:
+                with requests.get(f"{self.api_url}/events", headers=headers,
+                                  stream=True, timeout=(2, 60)) as response:
+                    for message in parse_sse(response.iter_lines(decode_unicode=True)):
+                        last_event_id = message.get("id", last_event_id)
+                        event, data = message["event"], message["data"]
+                        if event in ("status", "progress"):
+                            print(f"⏳ {data['progress'] or 'Idle'} "
+                                  f"({data['hosts_found']} hosts, {data['services_found']} services)")
+                        elif event == "host":
+                            names = ", ".join(s["name"] for s in data["host"].get("services", []))
+                            print(f"  🖥️  {data['ip']}: {names}")
+                        elif event == "scan_started":
+                            print(f"🔍 Scan started: {', '.join(data['networks'])}")
+                        elif event == "job":
+                            print(f"📋 {data['kind']} job {data['id']}: {data['state']}")
+                        elif event == "scan_complete":
+                            print(f"✅ Scan complete: {data['hosts_found']} hosts, "
+                                  f"{data['services_found']} services" +
+                                  (f" (error: {data['error']})" if data["error"] else ""))
+            except requests.exceptions.ReadTimeout:
+                # Keep-alives stopped; reconnect and resume after the last event
+                continue
+            except requests.exceptions.ConnectionError:
+                print("❌ API Server: NOT RUNNING")
+                return
 
 if __name__ == "__main__":
     checker = ProjectStatusChecker()
+    if "--watch" in sys.argv:
+        try:
+            checker.watch_scan_events()
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
     checker.check_backend_running()
     checker.check_api_endpoints()
     checker.check_frontend_files()
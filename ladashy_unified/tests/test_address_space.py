@@ -0,0 +1,18 @@
+"""Tests for arithmetic host address generation"""
+import ipaddress
+
+from homelab_wizard.core.address_space import host_span, iter_hosts
+
+
+def test_host_span_matches_hosts():
+    for network in ["10.0.0.0/24", "10.0.0.0/31", "10.0.0.7/32", "fd00::/124"]:
+        hosts = list(ipaddress.ip_network(network).hosts())
+        assert host_span(network) == (int(hosts[0]), len(hosts))
+
+
+def test_iter_hosts_yields_offsets_in_order():
+    expected = [str(ip) for ip in ipaddress.ip_network("192.168.1.0/24").hosts()]
+
+    assert list(iter_hosts("192.168.1.0/24")) == expected
+    assert list(iter_hosts("192.168.1.0/24", 10, 14)) == expected[10:14]
+    assert list(iter_hosts("192.168.1.0/24", 250, 1000)) == expected[250:]
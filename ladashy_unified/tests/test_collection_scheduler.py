@@ -0,0 +1,72 @@
+"""Tests for the background collection scheduler"""
+import time
+
+from homelab_wizard.collectors.base_collector import BaseCollector
+from homelab_wizard.collectors.manager import CollectorManager
+from homelab_wizard.collectors.scheduler import CollectionScheduler
+from homelab_wizard.core.shared_store import SharedStore
+
+
+class FakeCollector(BaseCollector):
+    def test_connection(self):
+        if self.config.get("fail"):
+            return False, "refused"
+        return True, "ok"
+
+    def collect_basic_info(self):
+        return {"host": self.config["host"]}
+
+    def collect_detailed_info(self):
+        return {}
+
+
+def _target(key, **config):
+    return {"key": key, "service": "Fake", "host": "10.0.0.2", "port": 80, "config": config}
+
+
+def test_healthy_services_refresh_and_failing_ones_back_off():
+    manager = CollectorManager()
+    manager.collectors = {"Fake": FakeCollector}
+    targets = [_target("ok", interval=0.1), _target("bad", interval=0.1, fail=True)]
+    results = []
+    scheduler = CollectionScheduler(lambda: targets, lambda key, data: results.append(key),
+                                    manager=manager, jitter=0)
+
+    scheduler.start()
+    try:
+        time.sleep(1.0)
+    finally:
+        scheduler.stop()
+    state = scheduler.state()
+
+    assert results.count("ok") >= 5
+    assert "bad" not in results
+    assert state["ok"]["last_error"] is None and state["ok"]["failures"] == 0
+    assert state["bad"]["last_error"] == "refused"
+    # 0.2s, 0.4s, 0.8s backoff: only a few attempts fit in a second
+    assert 1 <= state["bad"]["failures"] <= 3
+    assert state["bad"]["next_run"] > state["ok"]["next_run"]
+
+
+def test_workers_without_the_scheduler_read_state_and_trigger_through_the_store(tmp_path):
+    manager = CollectorManager()
+    manager.collectors = {"Fake": FakeCollector}
+    targets = [_target("ok", interval=60)]
+    results = []
+    path = str(tmp_path / "state.db")
+    leader = CollectionScheduler(lambda: targets, lambda key, data: results.append(key),
+                                 manager=manager, jitter=0, store=SharedStore(path), poll_interval=0.05)
+    follower = CollectionScheduler(lambda: targets, lambda key, data: None,
+                                   manager=manager, store=SharedStore(path))
+
+    leader.start()
+    try:
+        time.sleep(0.3)
+        assert follower.state()["ok"]["failures"] == 0
+        assert follower.state()["ok"]["last_run"] is not None
+        follower.trigger("ok")
+        time.sleep(0.3)
+    finally:
+        leader.stop()
+
+    assert results == ["ok", "ok"]
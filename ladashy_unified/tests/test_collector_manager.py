@@ -0,0 +1,68 @@
+"""Tests for concurrent collection in CollectorManager"""
+import time
+
+from homelab_wizard.collectors.base_collector import BaseCollector
+from homelab_wizard.collectors.manager import CollectorManager
+
+
+class FakeCollector(BaseCollector):
+    def test_connection(self):
+        if self.config.get("fail"):
+            return False, "refused"
+        return True, "ok"
+
+    def collect_basic_info(self):
+        time.sleep(float(self.config.get("delay", 0)))
+        return {"host": self.config["host"]}
+
+    def collect_detailed_info(self):
+        return {"port": self.config["port"]}
+
+
+def _target(key, **config):
+    return {"key": key, "service": "Fake", "host": "10.0.0.2", "port": 80, "config": config}
+
+
+def test_collect_many_runs_in_parallel_and_isolates_failures():
+    manager = CollectorManager()
+    manager.collectors = {"Fake": FakeCollector}
+    targets = [_target(f"ok{i}", delay=0.3) for i in range(5)]
+    targets.append(_target("broken", fail=True))
+    targets.append(_target("slow", delay=5, timeout=0.5))
+    progress = []
+
+    start = time.monotonic()
+    outcomes = manager.collect_many(targets, max_workers=8, timeout=2,
+                                    progress_callback=lambda key, _: progress.append(key))
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 1.5
+    assert all(outcomes[f"ok{i}"]["status"] == "success" for i in range(5))
+    assert outcomes["ok0"]["data"]["port"] == 80
+    assert outcomes["broken"] == {"status": "error", "error": "refused",
+                                  "duration": outcomes["broken"]["duration"]}
+    assert outcomes["slow"]["status"] == "timeout"
+    assert sorted(progress) == sorted(t["key"] for t in targets)
+
+
+def test_unknown_service_is_reported_as_error():
+    outcomes = CollectorManager().collect_many([dict(_target("x"), service="Nope")])
+
+    assert outcomes["x"]["status"] == "error"
+
+
+def test_collectors_are_closed_after_use():
+    closed = []
+
+    class ClosingCollector(FakeCollector):
+        def close(self):
+            closed.append(self.config.get("fail", False))
+            super().close()
+
+    manager = CollectorManager()
+    manager.collectors = {"Fake": ClosingCollector}
+    outcomes = manager.collect_many([_target("ok"), _target("broken", fail=True)])
+
+    assert outcomes["broken"]["status"] == "error"
+    # Failed connection tests close theirs too
+    assert sorted(closed) == [False, True]
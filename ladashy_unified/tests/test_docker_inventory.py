@@ -0,0 +1,158 @@
+"""Tests for the live Docker inventory, against a fake Docker Engine API"""
+import json
+import queue
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from homelab_wizard.core.docker_inventory import DockerInventory
+
+
+def _container(name, image, port, state="running"):
+    return {
+        "Id": (name.encode().hex() * 64)[:64], "Names": [f"/{name}"], "Image": image,
+        "State": state, "HostConfig": {"NetworkMode": "bridge"},
+        "Ports": [{"IP": "0.0.0.0", "PrivatePort": port, "PublicPort": port, "Type": "tcp"}],
+        "NetworkSettings": {"Networks": {"bridge": {"IPAddress": "172.17.0.2"}}},
+    }
+
+
+class _FakeDocker(ThreadingHTTPServer):
+    """Just enough of the Docker Engine API: version, container listing, events"""
+
+    daemon_threads = True
+
+    def __init__(self, containers):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.containers = {c["Id"]: c for c in containers}
+        self.listings = []  # filters of every /containers/json request
+        self.subscribers = []
+        self.closing = threading.Event()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"tcp://127.0.0.1:{self.server_address[1]}"
+
+    def emit(self, action, container):
+        for subscriber in list(self.subscribers):
+            subscriber.put({"Type": "container", "Action": action, "id": container["Id"],
+                            "Actor": {"ID": container["Id"]}, "time": int(time.time())})
+
+    def close(self):
+        self.closing.set()
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = re.sub(r"^/v[\d.]+", "", url.path)
+        query = parse_qs(url.query)
+        if path == "/version":
+            self._json({"ApiVersion": "1.43", "Version": "24.0.0"})
+        elif path == "/containers/json":
+            filters = json.loads(query.get("filters", ["{}"])[0])
+            self.server.listings.append(filters)
+            ids = filters.get("id")
+            self._json([c for cid, c in self.server.containers.items()
+                        if not ids or any(cid.startswith(i) for i in ids)])
+        elif path == "/images/json":
+            self._json([])
+        elif path == "/events":
+            self._events()
+        else:
+            self.send_error(404)
+
+    def _events(self):
+        events = queue.Queue()
+        self.server.subscribers.append(events)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.wfile.flush()
+        try:
+            while not self.server.closing.is_set():
+                try:
+                    event = events.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                data = json.dumps(event).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+        finally:
+            self.server.subscribers.remove(events)
+        self.close_connection = True
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_daemons_are_listed_concurrently_and_kept_current_from_events():
+    plex = _container("plex", "linuxserver/plex", 32400)
+    grafana = _container("grafana", "grafana/grafana", 3000, state="exited")
+    first, second = _FakeDocker([plex]), _FakeDocker([grafana])
+    changes = []
+    inventory = DockerInventory(watch=True, timeout=2, reconnect_interval=0.1,
+                                on_change=lambda ip, entry: changes.append((ip, entry)))
+    try:
+        inventory.add_hosts([first.url, second.url])
+
+        assert [s["name"] for s in inventory.services()["127.0.0.1"]["services"]] == ["Plex"]
+        assert _wait_for(lambda: second.subscribers)
+
+        # A start re-reads only that container; the daemon isn't listed again
+        grafana["State"] = "running"
+        second.emit("start", grafana)
+        assert _wait_for(lambda: len(inventory.services()["127.0.0.1"]["services"]) == 2)
+        assert second.listings[-1] == {"id": [grafana["Id"][:12]]}
+        assert [f for f in first.listings + second.listings if not f] == [{}, {}]
+
+        # Removing the last container service empties the address
+        assert _wait_for(lambda: first.subscribers)
+        del first.containers[plex["Id"]]
+        first.emit("destroy", plex)
+        second.containers.clear()
+        second.emit("destroy", grafana)
+        assert _wait_for(lambda: changes and changes[-1] == ("127.0.0.1", None))
+        assert inventory.services() == {}
+    finally:
+        inventory.close()
+        first.close()
+        second.close()
+
+
+def test_unreachable_daemon_is_reported_without_blocking_the_others():
+    server = _FakeDocker([_container("plex", "linuxserver/plex", 32400)])
+    inventory = DockerInventory(timeout=0.5)
+    try:
+        inventory.add_hosts([server.url, "tcp://127.0.0.1:1"])
+
+        assert inventory.containers(server.url)[0]["name"] == "plex"
+        assert list(inventory.errors()) == ["tcp://127.0.0.1:1"]
+    finally:
+        inventory.close()
+        server.close()
@@ -0,0 +1,116 @@
+"""Tests for discovery through the Docker API"""
+from homelab_wizard.core.docker_inventory import DockerInventory
+from homelab_wizard.core.docker_scanner import DockerScanner
+from homelab_wizard.core.port_sweep import PortSweeper
+from homelab_wizard.core.scanner import NetworkScanner
+
+DAEMON = "tcp://127.0.0.1:2375"
+
+CONTAINERS = [
+    {
+        "Id": "a" * 64, "Names": ["/plex"], "Image": "lscr.io/linuxserver/plex:latest",
+        "State": "running", "HostConfig": {"NetworkMode": "bridge"},
+        "Ports": [{"IP": "0.0.0.0", "PrivatePort": 32400, "PublicPort": 32400, "Type": "tcp"}],
+        "NetworkSettings": {"Networks": {"bridge": {"IPAddress": "172.17.0.2"}}},
+    },
+    {
+        # Untagged: named from the image listing
+        "Id": "b" * 64, "Names": ["/grafana"], "Image": "sha256:" + "c" * 64,
+        "State": "running", "HostConfig": {"NetworkMode": "bridge"},
+        "Ports": [{"PrivatePort": 3000, "Type": "tcp"}],
+        "NetworkSettings": {"Networks": {"bridge": {"IPAddress": "172.17.0.3"}}},
+    },
+    {
+        # Not a known service, but something answers on its published port
+        "Id": "e" * 64, "Names": ["/billing"], "Image": "acme/billing:1.4",
+        "State": "running", "HostConfig": {"NetworkMode": "bridge"},
+        "Ports": [{"IP": "0.0.0.0", "PrivatePort": 8000, "PublicPort": 18000, "Type": "tcp"}],
+        "NetworkSettings": {"Networks": {"bridge": {"IPAddress": "172.17.0.4"}}},
+    },
+    {
+        "Id": "d" * 64, "Names": ["/old-redis"], "Image": "redis:7",
+        "State": "exited", "HostConfig": {"NetworkMode": "bridge"}, "Ports": [],
+        "NetworkSettings": {"Networks": {"bridge": {"IPAddress": ""}}},
+    },
+]
+
+
+class _FakeApi:
+    def __init__(self):
+        self.calls = []
+
+    def containers(self, all=False, filters=None):
+        self.calls.append("containers")
+        return CONTAINERS
+
+    def images(self):
+        self.calls.append("images")
+        return [{"Id": "sha256:" + "c" * 64, "RepoTags": ["grafana/grafana:10.2.0"]}]
+
+
+class _FakeClient:
+    def __init__(self):
+        self.api = _FakeApi()
+
+    def close(self):
+        pass
+
+
+def _docker_scanner():
+    docker_scanner = DockerScanner()
+    docker_scanner.docker_clients[DAEMON] = _FakeClient()
+    return docker_scanner
+
+
+def test_one_listing_per_daemon_maps_containers_to_services():
+    docker_scanner = _docker_scanner()
+    api = docker_scanner.docker_clients[DAEMON].api
+
+    entries = docker_scanner.discover_services(DAEMON)
+
+    assert api.calls == ["containers", "images"]
+    plex, billing = entries["127.0.0.1"]["services"]
+    assert (plex["name"], plex["ports"], plex["container"]) == ("Plex", [32400], "plex")
+    assert (billing["name"], billing["ports"], billing["device_type"]) == ("billing", [18000], "docker")
+    assert billing["confidence"] < plex["confidence"]
+    grafana = entries["172.17.0.3"]["services"][0]
+    assert (grafana["name"], grafana["ports"], grafana["image"]) == ("Grafana", [3000], "grafana/grafana:10.2.0")
+    # Stopped containers serve nothing
+    assert len(entries) == 2
+
+
+def test_docker_hosts_skip_the_ports_their_containers_publish():
+    swept = []
+
+    class Sweeper(PortSweeper):
+        async def probe(self, host, port):
+            swept.append((host, port))
+            return port in (22, 32400)
+
+    scanner = NetworkScanner()
+    scanner.passive_discovery = False
+    scanner.docker_hosts = [DAEMON]
+    scanner._create_docker_inventory = lambda: DockerInventory(client_factory=lambda base_url: _FakeApi())
+    scanner._create_sweeper = lambda timing=None: Sweeper()
+    scanner._resolve_hostname = lambda ip: "Unknown"
+    scanner._identify_port = lambda detector, previous_state, ip, port, host_ports: (None, None, 0)
+    scanner.add_network("127.0.0.0/30")
+
+    async def live_hosts(network, progress_callback=None, checkpoint=None, timing=None):
+        for ip in ("127.0.0.1", "127.0.0.2"):
+            yield ip
+
+    scanner._iter_live_hosts = live_hosts
+    published = []
+    services = scanner.discover_all_services(result_callback=lambda ip, entry: published.append(ip))
+
+    # The daemon's host is still swept, for what runs beside its containers
+    assert {host for host, _ in swept} == {"127.0.0.1", "127.0.0.2"}
+    assert ("127.0.0.1", 32400) not in swept and ("127.0.0.1", 18000) not in swept
+    assert ("127.0.0.2", 32400) in swept
+    # Container addresses are not
+    assert published[:2] == ["127.0.0.1", "172.17.0.3"]
+    daemon_services = services["127.0.0.1"]["services"]
+    assert [service["name"] for service in daemon_services[:2]] == ["Plex", "billing"]
+    assert "127.0.0.2" in services
+    assert scanner.last_state.hosts["127.0.0.1"]["open_ports"] == [22]
@@ -0,0 +1,29 @@
+"""Tests for the scan event broker"""
+from homelab_wizard.core.events import EventBroker, parse_sse
+
+
+def test_every_subscriber_gets_each_event_and_reconnects_replay():
+    broker = EventBroker()
+    first, second = broker.subscribe(), broker.subscribe()
+    broker.publish("progress", {"progress": "Scanning"})
+    last_seen = broker.publish("host", {"ip": "10.0.0.2"})
+    broker.publish("scan_complete", {"hosts_found": 1})
+
+    assert [first.get(0)[1] for _ in range(3)] == ["progress", "host", "scan_complete"]
+    assert second.get(0)[2] == {"progress": "Scanning"}
+
+    resumed = broker.subscribe(last_event_id=last_seen)
+    assert resumed.get(0)[1] == "scan_complete"
+    assert resumed.get(0) is None
+
+
+def test_slow_subscriber_is_dropped_and_told_to_reload():
+    broker = EventBroker(history=4, max_pending=2)
+    slow = broker.subscribe()
+    for n in range(5):
+        broker.publish("host", {"n": n})
+
+    assert broker.subscriber_count == 0
+    events = list(parse_sse("".join(broker.stream(slow, keepalive=0)).split("\n")))
+    assert [e["event"] for e in events] == ["host", "host", "reset"]
+    assert broker.subscribe(last_event_id=0).get(0)[1] == "reset"
@@ -0,0 +1,43 @@
+"""Tests for the persistent fingerprint cache"""
+from homelab_wizard.core.fingerprint_cache import FingerprintCache
+
+
+def test_hit_miss_and_negative_results(tmp_path):
+    cache = FingerprintCache(str(tmp_path / "cache.db"))
+    cache.put("10.0.0.2", 80, "abc", "pihole", 0.95)
+    cache.put("10.0.0.2", 22, "ssh", None, 0)
+
+    assert cache.get("10.0.0.2", 80, "abc") == ("pihole", 0.95)
+    assert cache.get("10.0.0.2", 22, "ssh") == (None, 0)
+    assert cache.get("10.0.0.2", 80, "changed") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 2)
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = FingerprintCache(str(tmp_path / "cache.db"), ttl=-1)
+    cache.put("10.0.0.2", 80, "abc", "pihole", 0.95)
+
+    assert cache.get("10.0.0.2", 80, "abc") is None
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = FingerprintCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.put("10.0.0.1", 80, "a", "one", 0.9)
+    cache.put("10.0.0.2", 80, "b", "two", 0.9)
+    cache.get("10.0.0.1", 80, "a")
+    cache.put("10.0.0.3", 80, "c", "three", 0.9)
+
+    assert cache.get("10.0.0.2", 80, "b") is None
+    assert cache.get("10.0.0.1", 80, "a") == ("one", 0.9)
+    assert cache.get("10.0.0.3", 80, "c") == ("three", 0.9)
+
+
+def test_cache_survives_reopen(tmp_path):
+    path = str(tmp_path / "cache.db")
+    FingerprintCache(path).put("10.0.0.2", 8096, "x", "jellyfin", 0.9)
+
+    assert FingerprintCache(path).get("10.0.0.2", 8096, "x") == ("jellyfin", 0.9)
@@ -0,0 +1,60 @@
+"""Tests for the compiled fingerprint database"""
+from homelab_wizard.core.fingerprints import FingerprintDatabase, load_fingerprints
+
+DEFINITIONS = {
+    "services": [
+        {"name": "generic", "confidence": 0.9, "body": ["media"]},
+        {"name": "radarr", "confidence": 0.95, "ports": [7878],
+         "title": ["^radarr$"], "body": ["radarr"]},
+        {"name": "plex", "confidence": 0.9, "ports": [32400],
+         "headers": [{"name": "X-Plex-Protocol", "pattern": "plex"}, {"name": "X-Plex-Version"}],
+         "endpoints": [{"path": "/identity", "body": "machineidentifier"}]},
+    ]
+}
+
+
+def test_best_match_wins_over_first_match():
+    db = FingerprintDatabase(DEFINITIONS)
+    body = "<html><title>Radarr</title>media radarr</html>"
+
+    assert db.match(7878, {}, body) == ("radarr", 0.95)
+
+
+def test_overlapping_patterns_all_count():
+    db = FingerprintDatabase({"services": [
+        {"name": "a", "body": ["jelly"]},
+        {"name": "jellyfin", "body": ["jellyfin"]},
+    ]})
+
+    # Both match in full; the longer, more specific match wins
+    assert db.match(80, {}, "jellyfin") == ("jellyfin", 0.9)
+    assert db.match(80, {}, "jelly") == ("a", 0.9)
+
+
+def test_open_port_alone_is_not_a_fingerprint():
+    db = FingerprintDatabase(DEFINITIONS)
+
+    assert db.match(7878, {"Server": "nginx"}, "<html></html>") == (None, 0.0)
+
+
+def test_header_rules_are_case_insensitive():
+    db = FingerprintDatabase(DEFINITIONS)
+    name, confidence = db.match(32400, {"x-plex-version": "1.40"}, "")
+
+    assert name == "plex"
+    assert round(confidence, 2) == 0.6
+
+
+def test_endpoint_rules_are_indexed_by_port():
+    db = FingerprintDatabase(DEFINITIONS)
+    rules = db.endpoints_for_port(32400)
+
+    assert [r.path for r in rules] == ["/identity"]
+    assert rules[0].matches(200, "<MediaContainer machineIdentifier='x'/>")
+    assert db.endpoints_for_port(80) == []
+
+
+def test_shipped_database_compiles():
+    db = load_fingerprints()
+
+    assert db.match(8989, {}, "<title>Sonarr</title>")[0] == "sonarr"
@@ -0,0 +1,43 @@
+"""Tests for the asyncio host discovery engine"""
+import asyncio
+import socket
+
+from homelab_wizard.core.host_discovery import HostDiscovery
+from homelab_wizard.core.scanner import NetworkScanner
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_sweep_finds_listening_hosts_only():
+    port = _free_port()
+
+    async def run():
+        server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", port)
+        try:
+            discovery = HostDiscovery(probe_ports=[port], timeout=0.5,
+                                      use_icmp=False, refused_is_alive=False)
+            return await discovery.sweep(["127.0.0.1", "127.0.0.2", "127.0.0.3"])
+        finally:
+            server.close()
+
+    assert asyncio.run(run()) == ["127.0.0.1"]
+
+
+def test_refused_connection_counts_as_alive():
+    discovery = HostDiscovery(probe_ports=[_free_port()], timeout=0.5, use_icmp=False)
+    assert discovery.discover(["127.0.0.1"]) == ["127.0.0.1"]
+
+
+def test_scan_networks_uses_discovery_engine():
+    scanner = NetworkScanner()
+    scanner.use_icmp = False
+    scanner.probe_ports = [_free_port()]
+    scanner.add_network("127.0.0.0/30")
+
+    hosts = scanner.scan_networks()
+
+    assert set(hosts) == {"127.0.0.1", "127.0.0.2"}
@@ -0,0 +1,70 @@
+"""Tests for the indexed inventory store"""
+from homelab_wizard.core.inventory import Inventory
+
+
+def _host(ip, *services):
+    return {"ip": ip, "hostname": "Unknown",
+            "services": [{"name": name, "host": ip, "ports": ports} for name, ports in services]}
+
+
+def test_indexed_lookups_and_filters():
+    inventory = Inventory()
+    inventory.replace_hosts({
+        "10.0.0.2": _host("10.0.0.2", ("Plex", [32400]), ("Radarr", [7878])),
+        "10.0.0.3": _host("10.0.0.3", ("Sonarr", [8989]), ("Pi-hole", [80, 53])),
+    })
+    snapshot = inventory.snapshot()
+
+    assert snapshot.find_service("plex", "10.0.0.2")["ports"] == [32400]
+    assert snapshot.find_service("Plex", "10.0.0.3") is None
+    assert {s["name"] for s in snapshot.services(category="Media Management")} == {"Radarr", "Sonarr"}
+    assert [s["name"] for s in snapshot.services(port=53)] == ["Pi-hole"]
+    assert [s["name"] for s in snapshot.services(host="10.0.0.2", category="media servers")] == ["Plex"]
+    assert (snapshot.host_count, snapshot.service_count) == (2, 4)
+
+
+def test_updates_never_change_a_snapshot_already_handed_out():
+    inventory = Inventory()
+    inventory.update_host("10.0.0.2", _host("10.0.0.2", ("Plex", [32400])))
+    before = inventory.snapshot()
+
+    inventory.update_host("10.0.0.2", _host("10.0.0.2", ("Jellyfin", [8096])))
+    inventory.set_config("Jellyfin_10.0.0.2", {"api_key": "k"})
+    after = inventory.snapshot()
+
+    assert before.find_service("Plex", "10.0.0.2") is not None
+    assert before.configs == {}
+    assert after.find_service("Plex", "10.0.0.2") is None
+    assert after.services(port=32400) == []
+    assert [s["name"] for s in after.services(host="10.0.0.2")] == ["Jellyfin"]
+    assert after.service_count == 1
+    assert after.configs["Jellyfin_10.0.0.2"] == {"api_key": "k"}
+
+
+def test_changes_since_returns_only_changed_and_removed_hosts():
+    inventory = Inventory()
+    inventory.replace_hosts({"10.0.0.2": _host("10.0.0.2", ("Plex", [32400])),
+                             "10.0.0.3": _host("10.0.0.3", ("Sonarr", [8989]))})
+    seen = inventory.snapshot().version
+
+    inventory.update_host("10.0.0.3", _host("10.0.0.3", ("Sonarr", [8989])))  # unchanged
+    assert inventory.snapshot().version == seen
+
+    inventory.replace_hosts({"10.0.0.3": _host("10.0.0.3", ("Sonarr", [8989])),
+                             "10.0.0.4": _host("10.0.0.4", ("Radarr", [7878]))})
+    delta = inventory.snapshot().changes_since(seen)
+
+    assert delta["full"] is False
+    assert list(delta["hosts"]) == ["10.0.0.4"]
+    assert delta["removed"] == ["10.0.0.2"]
+    assert inventory.snapshot().changes_since(0)["full"] is True
+
+
+def test_replacing_one_network_keeps_hosts_in_others():
+    inventory = Inventory()
+    inventory.replace_hosts({"10.0.0.2": _host("10.0.0.2", ("Plex", [32400])),
+                             "10.0.1.2": _host("10.0.1.2", ("Sonarr", [8989]))})
+
+    inventory.replace_hosts({"10.0.1.3": _host("10.0.1.3", ("Radarr", [7878]))}, networks=["10.0.1.0/24"])
+
+    assert sorted(inventory.snapshot().hosts) == ["10.0.0.2", "10.0.1.3"]
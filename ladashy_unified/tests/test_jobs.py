@@ -0,0 +1,141 @@
+"""Tests for the durable job queue"""
+import os
+import threading
+import time
+
+import pytest
+
+from homelab_wizard.core.address_space import networks_overlap
+from homelab_wizard.core.jobs import JobConflict, JobQueue, ThrottledReporter
+
+
+def _wait_for(queue, job_id, *states):
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job.state in states:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job stayed {job.state}")
+
+
+def test_jobs_run_report_progress_and_keep_their_result(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=2, poll_interval=0.01)
+
+    def double(job):
+        job.progress(step="doubling")
+        return job.params["n"] * 2
+
+    queue.register("double", double)
+    queue.register("fail", lambda job: 1 / 0)
+    queue.start()
+    ok, bad = queue.submit("double", {"n": 21}), queue.submit("fail")
+
+    done = _wait_for(queue, ok.id, "succeeded")
+    assert (done.result, done.progress) == (42, {"step": "doubling"})
+    assert _wait_for(queue, bad.id, "failed").error == "division by zero"
+    assert [job.id for job in queue.list(kind="double")] == [ok.id]
+    queue.close()
+
+
+def test_cancel_stops_queued_and_running_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=1, poll_interval=0.01)
+    started = threading.Event()
+
+    def wait_for_cancel(job):
+        started.set()
+        while True:
+            job.check_cancelled()
+            time.sleep(0.01)
+
+    queue.register("loop", wait_for_cancel)
+    queue.start()
+    running, queued = queue.submit("loop"), queue.submit("loop")
+    assert started.wait(5)
+
+    assert queue.cancel(queued.id).state == "cancelled"
+    queue.cancel(running.id)
+    assert _wait_for(queue, running.id, "cancelled").cancel_requested
+    queue.close()
+
+
+def test_jobs_of_a_dead_process_are_requeued(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    # The dead leader's queue had the PID this process has now
+    dead = JobQueue(path, max_attempts=2)
+    job = dead.submit("scan")
+    dead._update(job.id, state="running", owner=dead.owner, attempts=1)
+    worn_out = dead.submit("scan")
+    dead._update(worn_out.id, state="running", owner=f"{os.getpid() + 1_000_000}-x", attempts=2)
+    queue = JobQueue(path, max_attempts=2)
+
+    assert sorted(queue.recover()) == sorted([job.id, worn_out.id])
+    assert queue.get(job.id).state == "queued"
+    assert queue.get(worn_out.id).state == "failed"
+
+
+def test_conflicting_submissions_from_two_processes_cannot_both_queue(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first, second = JobQueue(path), JobQueue(path)
+
+    def overlapping(networks):
+        return lambda job: networks_overlap(job.params["networks"], networks)
+
+    running = first.submit("scan", {"networks": ["192.168.0.0/16"]}, conflicts=overlapping(["192.168.0.0/16"]))
+    with pytest.raises(JobConflict) as conflict:
+        second.submit("scan", {"networks": ["192.168.1.0/24"]}, conflicts=overlapping(["192.168.1.0/24"]))
+    other = second.submit("scan", {"networks": ["10.0.0.0/24"]}, conflicts=overlapping(["10.0.0.0/24"]))
+
+    assert conflict.value.job.id == running.id
+    assert [job.id for job in first.list(kind="scan")] == [other.id, running.id]
+
+
+def test_resuming_a_job_checks_for_conflicts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    stopped = queue.submit("scan", {"networks": ["192.168.1.0/24"]})
+    queue.cancel(stopped.id)
+    running = queue.submit("scan", {"networks": ["192.168.0.0/16"]})
+    overlapping = lambda job: networks_overlap(job.params["networks"], ["192.168.1.0/24"])
+
+    with pytest.raises(JobConflict) as conflict:
+        queue.requeue(stopped.id, conflicts=overlapping)
+    assert conflict.value.job.id == running.id
+    assert queue.get(stopped.id).state == "cancelled"
+
+    queue.cancel(running.id)
+    assert queue.requeue(stopped.id, conflicts=overlapping).state == "queued"
+
+
+def test_progress_is_coalesced_off_the_callers_thread():
+    reports = []
+    threads = set()
+
+    def report(message):
+        threads.add(threading.current_thread())
+        reports.append(message)
+        time.sleep(0.01)
+
+    reporter = ThrottledReporter(report, interval=0.1)
+    for i in range(1000):
+        reporter(f"step {i}")
+    time.sleep(0.15)
+    for i in range(1000, 2000):
+        reporter(f"step {i}")
+    reporter.close()
+
+    assert len(reports) < 10
+    # The last update is always reported
+    assert reports[-1] == "step 1999"
+    assert threading.current_thread() not in threads
+
+
+def test_pruned_jobs_are_reported(tmp_path):
+    pruned = []
+    queue = JobQueue(str(tmp_path / "jobs.db"), retention_days=1, on_prune=pruned.append)
+    old, recent = queue.submit("scan"), queue.submit("scan")
+    queue._update(old.id, state="cancelled", finished=time.time() - 2 * 86400)
+    queue._update(recent.id, state="cancelled", finished=time.time())
+
+    assert queue.prune() == [old.id]
+    assert pruned == [old.id]
+    assert queue.get(old.id) is None and queue.get(recent.id) is not None
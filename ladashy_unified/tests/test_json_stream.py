@@ -0,0 +1,34 @@
+"""Tests for incremental JSON array parsing"""
+import json
+
+import pytest
+
+from homelab_wizard.utils.json_stream import iter_json_array
+
+
+def _chunked(data, size):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+def test_items_split_across_chunks_are_reassembled():
+    items = [{"id": i, "title": f"Fïlm {i}", "tags": [1, {"x": "]"}]} for i in range(50)]
+    data = json.dumps(items, indent=1).encode()
+
+    for size in (1, 7, 64, len(data)):
+        assert list(iter_json_array(_chunked(data, size))) == items
+
+
+def test_scalars_split_at_a_chunk_boundary_are_not_cut_short():
+    assert list(iter_json_array([b'[1, 23', b'45, 6]'])) == [1, 2345, 6]
+    assert list(iter_json_array([b'[1.5', b'e3, null', b', "a', b'b"]'])) == [1500.0, None, "ab"]
+    data = json.dumps([12345, -0.25, True, "x", 67]).encode()
+    for size in (1, 2, 3):
+        assert list(iter_json_array(_chunked(data, size))) == [12345, -0.25, True, "x", 67]
+
+
+def test_empty_array_and_truncated_body():
+    assert list(iter_json_array([b" [ ] "])) == []
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'[{"id": 1}, {"id"']))
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"id": 1}']))
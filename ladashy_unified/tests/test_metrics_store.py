@@ -0,0 +1,71 @@
+"""Tests for the metrics time-series store"""
+from homelab_wizard.core.metrics_store import MetricsStore, flatten_metrics
+
+DAY = 86400
+START = 1_700_000_000 - 1_700_000_000 % DAY
+
+
+def test_flatten_keeps_numbers_and_labels_list_items():
+    data = {
+        "queue_count": 3,
+        "version": "5.1",
+        "healthy": True,
+        "root_folders": [{"path": "/movies", "free_space": 10, "total_space": 20}],
+        "stats": {"ads_percentage_today": 12.5},
+    }
+
+    assert dict(flatten_metrics(data)) == {
+        "queue_count": 3.0,
+        "root_folders[/movies].free_space": 10.0,
+        "root_folders[/movies].total_space": 20.0,
+        "stats.ads_percentage_today": 12.5,
+    }
+
+
+def test_rollups_and_resolution_choice(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics.db"))
+    for minute in range(120):
+        store.record("Pi-hole_10.0.0.2", {"dns_queries_today": minute}, START + minute * 60)
+
+    now = START + 120 * 60
+    hourly = store.query("Pi-hole_10.0.0.2", "dns_queries_today", START, now, resolution="1h")
+    assert [(p["ts"], p["count"], p["min"], p["max"], p["avg"]) for p in hourly["points"]] == [
+        (START, 60, 0, 59, 29.5),
+        (START + 3600, 60, 60, 119, 89.5),
+    ]
+
+    summary = store.aggregate("Pi-hole_10.0.0.2", "dns_queries_today", START, now)
+    assert (summary["count"], summary["min"], summary["max"], summary["last"]) == (120, 0, 119, 119)
+
+    assert store.choose_resolution(now - 3600, now, now=now) == "raw"
+    assert store.choose_resolution(now - 14 * DAY, now, now=now) == "1h"
+    assert store.choose_resolution(now - 365 * DAY, now, now=now) == "1d"
+
+
+def test_retention_drops_old_samples_but_keeps_daily_rollups(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics.db"))
+    store.record("Radarr_10.0.0.3", {"queue_count": 4}, START)
+    store.apply_retention(START + 30 * DAY)
+
+    raw = store.query("Radarr_10.0.0.3", "queue_count", START, START + 60, resolution="raw")
+    daily = store.query("Radarr_10.0.0.3", "queue_count", START, START + DAY, resolution="1d")
+    assert raw["points"] == []
+    assert daily["points"][0]["last"] == 4
+
+
+def test_series_written_by_another_process_are_visible(tmp_path):
+    path = str(tmp_path / "metrics.db")
+    reader = MetricsStore(path)
+    MetricsStore(path).record("Radarr_10.0.0.3", {"queue_count": 4}, START)
+
+    assert reader.list_series() == [{"service": "Radarr_10.0.0.3", "metric": "queue_count"}]
+    assert reader.aggregate("Radarr_10.0.0.3", "queue_count", START, START + 60)["count"] == 1
+
+
+def test_second_record_in_the_same_second_replaces_the_sample(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics.db"))
+    store.record("Radarr_10.0.0.3", {"queue_count": 2}, START)
+    store.record("Radarr_10.0.0.3", {"queue_count": 6}, START + 0.5)
+
+    summary = store.aggregate("Radarr_10.0.0.3", "queue_count", START, START + 7 * DAY)
+    assert (summary["count"], summary["avg"], summary["last"]) == (1, 6, 6)
@@ -0,0 +1,70 @@
+"""Tests for passive host discovery and how it seeds the scan"""
+import pytest
+
+from homelab_wizard.core.passive_discovery import PassiveDiscovery, hosts_in, read_arp_table
+from homelab_wizard.core.port_sweep import PortSweeper
+from homelab_wizard.core.scanner import NetworkScanner
+
+ARP_TABLE = """\
+IP address       HW type     Flags       HW address            Mask     Device
+10.0.0.7         0x1         0x2         02:42:0a:00:00:07     *        eth0
+10.0.0.8         0x1         0x0         00:00:00:00:00:00     *        eth0
+192.0.2.1        0x1         0x2         02:fc:00:00:00:05     *        eth0
+"""
+
+
+def test_arp_table_lists_only_complete_entries(tmp_path):
+    table = tmp_path / "arp"
+    table.write_text(ARP_TABLE)
+
+    assert read_arp_table(str(table)) == ["10.0.0.7", "192.0.2.1"]
+    assert read_arp_table(str(tmp_path / "missing")) == []
+
+
+def test_only_hosts_of_the_scanned_networks_are_kept():
+    addresses = ["10.0.0.0", "10.0.0.7", "10.0.0.255", "192.0.2.1", "10.0.0.7", "fe80::1"]
+
+    assert hosts_in(addresses, ["10.0.0.0/24"]) == ["10.0.0.7"]
+
+
+class _FakePassive(PassiveDiscovery):
+    def neighbors(self):
+        return ["10.0.0.7", "192.0.2.1"]
+
+    async def listen(self, on_host):
+        on_host("10.0.0.9")
+        on_host("198.51.100.4")
+
+
+def _scanner(full_sweep, swept):
+    class Sweeper(PortSweeper):
+        async def probe(self, host, port):
+            if host not in swept:
+                swept.append(host)
+            return False
+
+    scanner = NetworkScanner()
+    scanner.full_sweep = full_sweep
+    scanner._create_passive_discovery = lambda: _FakePassive()
+    scanner._create_sweeper = lambda timing=None: Sweeper()
+    scanner._resolve_hostname = lambda ip: "Unknown"
+    scanner.add_network("10.0.0.0/24")
+    return scanner
+
+
+@pytest.mark.parametrize("full_sweep", [False, True])
+def test_passive_hosts_are_swept_first_and_the_full_sweep_is_optional(full_sweep):
+    swept = []
+    scanner = _scanner(full_sweep, swept)
+
+    async def live_hosts(network, progress_callback=None, checkpoint=None, timing=None):
+        assert full_sweep, "the address sweep should be skipped"
+        for ip in ("10.0.0.1", "10.0.0.7", "10.0.0.2"):
+            yield ip
+
+    scanner._iter_live_hosts = live_hosts
+    scanner.discover_all_services()
+
+    assert swept[0] == "10.0.0.7"
+    expected = {"10.0.0.7", "10.0.0.9"} | ({"10.0.0.1", "10.0.0.2"} if full_sweep else set())
+    assert set(swept) == expected
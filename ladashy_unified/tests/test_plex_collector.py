@@ -0,0 +1,61 @@
+"""Tests for the Plex collector against a local fake server"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from homelab_wizard.collectors.plex_collector import PlexCollector
+
+LIBRARIES = [{"key": str(k), "title": f"Library {k}", "type": "movie"} for k in range(1, 15)]
+
+
+class FakePlex(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        self.requests_seen.append(self.path)
+        if path == "/identity":
+            body = {"MediaContainer": {"machineIdentifier": "abc", "version": "1.40"}}
+        elif path == "/:/prefs":
+            body = {"MediaContainer": {"FriendlyName": "lab"}}
+        elif path == "/library/sections":
+            body = {"MediaContainer": {"Directory": LIBRARIES}}
+        elif path.startswith("/library/sections/"):
+            body = {"MediaContainer": {"totalSize": int(path.split("/")[3]) * 100, "size": 0}}
+        elif path == "/status/sessions":
+            body = {"MediaContainer": {"size": 2}}
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_collect_cycle_reuses_identity_and_counts_every_library():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakePlex)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    FakePlex.requests_seen = []
+    try:
+        collector = PlexCollector({"host": "127.0.0.1", "port": server.server_port, "token": "t"})
+        assert collector.test_connection() == (True, "Connected to Plex")
+        basic = collector.collect_basic_info()
+        detailed = collector.collect_detailed_info()
+    finally:
+        server.shutdown()
+
+    assert basic["server_name"] == "abc"
+    assert basic["friendly_name"] == "lab"
+    assert [lib["item_count"] for lib in detailed["libraries"]] == [k * 100 for k in range(1, 15)]
+    assert detailed["active_sessions"] == 2
+    assert sum(1 for path in FakePlex.requests_seen if path.startswith("/identity")) == 1
+    assert all("X-Plex-Container-Size=0" in path
+               for path in FakePlex.requests_seen if path.startswith("/library/sections/"))
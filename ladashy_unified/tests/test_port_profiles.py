@@ -0,0 +1,56 @@
+"""Tests for port profiles and hit-ordered sweeping"""
+import pytest
+
+from homelab_wizard.core.port_profiles import (
+    count_hits, load_hits, merge_hits, order_by_hits, profile_ports, service_ports,
+)
+from homelab_wizard.core.port_sweep import PortSweeper
+from homelab_wizard.core.scanner import NetworkScanner
+
+
+def test_profiles_grow_from_the_service_definitions_to_every_port():
+    quick, standard, full = (profile_ports(name) for name in ("quick", "standard", "full"))
+
+    assert set(service_ports()) <= set(quick) < set(standard) < set(full)
+    assert 32400 in quick and 443 in quick
+    assert sorted(full) == list(range(1, 65536))
+    assert full[:len(standard)] == standard
+    assert profile_ports([22, 80, 22]) == [22, 80]
+    with pytest.raises(ValueError):
+        profile_ports("everything")
+
+
+def test_ports_most_often_open_go_first():
+    history = merge_hits({}, count_hits([[22, 8096], [8096]]))
+    history = merge_hits(history, count_hits([[443]]))
+
+    assert history == {"22": 1, "8096": 2, "443": 1}
+    assert order_by_hits([80, 443, 22, 8096], load_hits(history)) == [8096, 443, 22, 80]
+
+
+def test_sweep_follows_the_profile_in_hit_order():
+    probed = []
+
+    class Sweeper(PortSweeper):
+        async def probe(self, host, port):
+            probed.append(port)
+            return port in (8096, 22)
+
+    scanner = NetworkScanner()
+    scanner.passive_discovery = False
+    scanner.per_host_limit = 1
+    scanner.port_profile = [80, 443, 22, 8096]
+    scanner.port_hits = {8096: 5, 22: 2}
+    scanner._create_sweeper = lambda timing=None: Sweeper()
+    scanner._resolve_hostname = lambda ip: "Unknown"
+    scanner._identify_port = lambda detector, previous_state, ip, port, host_ports: (None, None, 0)
+    scanner.add_network("10.0.0.0/30")
+
+    async def live_hosts(network, progress_callback=None, checkpoint=None, timing=None):
+        yield "10.0.0.1"
+
+    scanner._iter_live_hosts = live_hosts
+    scanner.discover_all_services()
+
+    assert probed == [8096, 22, 80, 443]
+    assert scanner.last_port_hits == {8096: 1, 22: 1}
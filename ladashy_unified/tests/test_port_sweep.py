@@ -0,0 +1,31 @@
+"""Tests for the concurrent port sweep"""
+import asyncio
+import socket
+
+from homelab_wizard.core.port_sweep import PortSweeper
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_sweep_yields_open_ports_and_counts_probes():
+    open_port, closed_port = _free_port(), _free_port()
+
+    async def run():
+        server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", open_port)
+        try:
+            sweeper = PortSweeper(timeout=0.5, per_host_limit=1)
+            found = [pair async for pair in sweeper.sweep(["127.0.0.1", "127.0.0.2"],
+                                                          [open_port, closed_port])]
+            return found, sweeper.stats.as_dict()
+        finally:
+            server.close()
+
+    found, stats = asyncio.run(run())
+
+    assert found == [("127.0.0.1", open_port)]
+    assert stats["ports_scanned"] == 4
+    assert stats["ports_open"] == 1
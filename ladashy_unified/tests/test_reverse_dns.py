@@ -0,0 +1,120 @@
+"""Tests for the asynchronous, cached reverse-DNS stage"""
+import asyncio
+import threading
+import time
+
+from homelab_wizard.core.port_sweep import PortSweeper
+from homelab_wizard.core.reverse_dns import UNKNOWN, HostnameCache, ReverseResolver
+from homelab_wizard.core.scanner import NetworkScanner
+
+
+class _Lookup:
+    """Counts calls and how many run at once"""
+
+    def __init__(self, delay=0.05, names=None):
+        self.delay = delay
+        self.names = names or {}
+        self.calls = []
+        self.running = 0
+        self.most_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, ip):
+        with self._lock:
+            self.calls.append(ip)
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return self.names.get(ip, UNKNOWN)
+
+
+def test_lookups_are_bounded_shared_and_cached():
+    lookup = _Lookup(names={"10.0.0.1": "nas.lan"})
+    cache = HostnameCache()
+
+    async def run():
+        resolver = ReverseResolver(cache=cache, lookup=lookup, max_concurrency=2)
+        try:
+            ips = [f"10.0.0.{i}" for i in range(1, 7)]
+            first = await asyncio.gather(*(resolver.resolve(ip) for ip in ips + ips))
+            again = await resolver.resolve("10.0.0.1")
+            return first, again
+        finally:
+            resolver.close()
+
+    first, again = asyncio.run(run())
+
+    assert first[0] == again == "nas.lan"
+    assert first[1] == UNKNOWN
+    assert sorted(lookup.calls) == sorted(f"10.0.0.{i}" for i in range(1, 7))
+    assert lookup.most_running == 2
+    # A second scan with the same cache asks nothing
+    assert cache.get("10.0.0.1") == "nas.lan" and cache.get("10.0.0.2") == UNKNOWN
+
+
+def test_slow_and_failed_lookups_are_cached_for_less_time():
+    lookup = _Lookup(delay=0.5)
+    cache = HostnameCache(ttl=60, negative_ttl=0)
+
+    async def run():
+        resolver = ReverseResolver(cache=cache, lookup=lookup, timeout=0.05)
+        try:
+            return await resolver.resolve("10.0.0.9")
+        finally:
+            resolver.close()
+
+    assert asyncio.run(run()) == UNKNOWN
+    # Expired at once, so the next scan asks again
+    assert cache.get("10.0.0.9") is None
+
+
+def test_slow_lookups_do_not_hold_up_the_sweep():
+    hosts = [f"10.0.0.{i}" for i in range(1, 9)]
+    lookup = _Lookup(delay=0.3)
+
+    class Sweeper(PortSweeper):
+        async def probe(self, host, port):
+            return False
+
+    scanner = NetworkScanner()
+    scanner.passive_discovery = False
+    scanner.queue_size = 1
+    scanner._create_sweeper = lambda timing=None: Sweeper()
+    scanner._resolve_hostname = lookup
+    scanner.add_network("10.0.0.0/28")
+
+    async def live_hosts(network, progress_callback=None, checkpoint=None, timing=None):
+        for ip in hosts:
+            yield ip
+
+    scanner._iter_live_hosts = live_hosts
+    started = time.monotonic()
+    scanner.discover_all_services()
+
+    # One host swept at a time, but lookups overlap instead of 8 x 0.3s
+    assert time.monotonic() - started < 1.5
+    assert sorted(lookup.calls) == hosts
+    assert lookup.most_running > 1
+
+
+def test_lookups_waiting_behind_slow_ones_still_run():
+    class Lookup(_Lookup):
+        def __call__(self, ip):
+            self.delay = 0.6 if ip in ("10.0.0.1", "10.0.0.2") else 0.01
+            return super().__call__(ip)
+
+    lookup = Lookup(names={f"10.0.0.{i}": f"host{i}" for i in range(1, 7)})
+
+    async def run():
+        resolver = ReverseResolver(lookup=lookup, max_concurrency=2, timeout=0.3)
+        try:
+            return await asyncio.gather(*(resolver.resolve(f"10.0.0.{i}") for i in range(1, 7)))
+        finally:
+            resolver.close()
+
+    names = asyncio.run(run())
+
+    assert names == [UNKNOWN, UNKNOWN, "host3", "host4", "host5", "host6"]
+    assert lookup.most_running == 2
@@ -0,0 +1,90 @@
+"""Tests for checkpointed, resumable scans"""
+import asyncio
+
+import pytest
+
+from homelab_wizard.core.host_discovery import HostDiscovery
+from homelab_wizard.core.scan_checkpoint import RangeSet, ScanCheckpoint
+from homelab_wizard.core.scanner import NetworkScanner, ScanCancelled
+
+
+class _FakeDiscovery(HostDiscovery):
+    def __init__(self, alive, probed, on_probe=None):
+        super().__init__(use_icmp=False)
+        self.alive, self.probed, self.on_probe = alive, probed, on_probe
+
+    async def is_alive(self, ip):
+        self.probed.append(ip)
+        if self.on_probe:
+            await self.on_probe(ip)
+        return ip in self.alive
+
+
+def _scanner(discovery):
+    scanner = NetworkScanner()
+    scanner.passive_discovery = False
+    scanner.block_size = 4
+    scanner._create_discovery = lambda timing=None: discovery
+    scanner._resolve_hostname = lambda ip: "Unknown"
+    scanner.add_network("127.0.0.0/28")
+    return scanner
+
+
+def test_range_set_merges_and_reports_gaps():
+    ranges = RangeSet([(8, 12), (0, 4)])
+    ranges.add(4, 6)
+    assert ranges.ranges == [[0, 6], [8, 12]]
+    assert list(ranges.gaps(0, 14)) == [(6, 8), (12, 14)]
+    ranges.add(5, 9)
+    assert (ranges.ranges, ranges.covered) == ([[0, 12]], 12)
+
+
+def test_resumed_scan_skips_finished_ranges_and_finishes_pending_hosts(tmp_path):
+    checkpoint = ScanCheckpoint(["127.0.0.0/28"], str(tmp_path / "scan.json"))
+    checkpoint.mark_done("127.0.0.0/28", 0, 8)
+    checkpoint.mark_found("127.0.0.3")
+    checkpoint.save()
+    probed = []
+
+    resumed = ScanCheckpoint.load(checkpoint.path, ["127.0.0.0/28"])
+    _scanner(_FakeDiscovery({"127.0.0.10"}, probed)).discover_all_services(checkpoint=resumed)
+
+    assert probed == [f"127.0.0.{n}" for n in range(9, 15)]
+    assert resumed.done["127.0.0.0/28"].ranges == [[0, 14]]
+    assert not resumed.pending
+    assert set(resumed.hosts) == {"127.0.0.3", "127.0.0.10"}
+
+
+def test_cancelled_scan_saves_a_checkpoint_to_resume_from(tmp_path):
+    probed = []
+    scanner = None
+
+    async def cancel_halfway(ip):
+        if ip == "127.0.0.9":
+            scanner.cancel()
+            await asyncio.sleep(5)
+
+    scanner = _scanner(_FakeDiscovery({"127.0.0.2"}, probed, cancel_halfway))
+    checkpoint = ScanCheckpoint(["127.0.0.0/28"], str(tmp_path / "scan.json"))
+    with pytest.raises(ScanCancelled):
+        scanner.discover_all_services(checkpoint=checkpoint)
+
+    saved = ScanCheckpoint.load(checkpoint.path, ["127.0.0.0/28"])
+    # Only the block with the address still being probed is left to do
+    assert list(saved.done["127.0.0.0/28"].gaps(0, 14)) == [(8, 12)]
+    assert "127.0.0.2" in saved.pending | set(saved.hosts)
+
+
+def test_cancel_is_noticed_while_nothing_reports_progress(tmp_path):
+    async def stall(ip):
+        await asyncio.sleep(30)
+
+    scanner = _scanner(_FakeDiscovery(set(), [], stall))
+    polls = []
+    # Cancelled from elsewhere, e.g. another server process
+    scanner.should_cancel = lambda: polls.append(1) or len(polls) >= 3
+    checkpoint = ScanCheckpoint(["127.0.0.0/28"], str(tmp_path / "scan.json"))
+
+    with pytest.raises(ScanCancelled):
+        scanner.discover_all_services(checkpoint=checkpoint)
+    assert len(polls) == 3
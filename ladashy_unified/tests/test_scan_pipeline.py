@@ -0,0 +1,63 @@
+"""Tests for the discovery -> port sweep -> fingerprint pipeline"""
+import asyncio
+
+from homelab_wizard.core.port_sweep import PortSweeper
+from homelab_wizard.core.scanner import NetworkScanner
+
+PLEX_PORT = 32400
+
+
+class _FakeSweeper(PortSweeper):
+    """Only the Plex port is open; tracks how many hosts are swept at once"""
+
+    def __init__(self):
+        super().__init__()
+        self.active = {}
+        self.most_active_hosts = 0
+
+    async def probe(self, host, port):
+        self.active[host] = self.active.get(host, 0) + 1
+        self.most_active_hosts = max(self.most_active_hosts, len(self.active))
+        try:
+            await asyncio.sleep(0.001)
+            return port == PLEX_PORT
+        finally:
+            self.active[host] -= 1
+            if not self.active[host]:
+                del self.active[host]
+
+
+def _scanner(hosts, sweeper, published, seen_before_discovery_finished):
+    scanner = NetworkScanner()
+    scanner.passive_discovery = False
+    scanner.queue_size = 3
+    scanner._create_sweeper = lambda timing=None: sweeper
+    scanner._resolve_hostname = lambda ip: "Unknown"
+    scanner._identify_port = lambda detector, previous_state, ip, port, host_ports: (None, None, 0)
+    scanner.add_network("10.0.0.0/24")
+
+    async def live_hosts(network, progress_callback=None, checkpoint=None, timing=None):
+        for ip in hosts:
+            yield ip
+        # Give the first hosts time to come out the other end before finishing
+        for _ in range(200):
+            if published:
+                break
+            await asyncio.sleep(0.01)
+        seen_before_discovery_finished.append(bool(published))
+
+    scanner._iter_live_hosts = live_hosts
+    return scanner
+
+
+def test_results_stream_out_while_discovery_runs_and_hosts_in_flight_are_bounded():
+    hosts = [f"10.0.0.{i}" for i in range(1, 21)]
+    sweeper, published, seen_early = _FakeSweeper(), [], []
+    scanner = _scanner(hosts, sweeper, published, seen_early)
+
+    services = scanner.discover_all_services(result_callback=lambda ip, entry: published.append(ip))
+
+    assert seen_early == [True]
+    assert sorted(services) == sorted(hosts)
+    assert services["10.0.0.1"]["services"][0]["name"] == "Plex"
+    assert 1 < sweeper.most_active_hosts <= scanner.queue_size
@@ -0,0 +1,62 @@
+"""Tests for incremental scan state and service diffs"""
+from homelab_wizard.core.scan_state import ScanState, diff_services
+
+
+def _host(*services):
+    return {"hostname": "Unknown", "services": list(services)}
+
+
+def test_diff_reports_added_removed_and_changed():
+    old = {
+        "10.0.0.2": _host({"name": "Plex", "ports": [32400], "confidence": 0.6}),
+        "10.0.0.3": _host({"name": "Radarr", "ports": [7878], "confidence": 0.95}),
+    }
+    new = {
+        "10.0.0.2": _host({"name": "Plex", "ports": [32400], "confidence": 0.9}),
+        "10.0.0.4": _host({"name": "Sonarr", "ports": [8989], "confidence": 0.95}),
+    }
+
+    diff = diff_services(old, new)
+
+    assert [s["name"] for s in diff["added"]] == ["Sonarr"]
+    assert [s["name"] for s in diff["removed"]] == ["Radarr"]
+    assert diff["changed"][0]["after"]["confidence"] == 0.9
+
+
+def test_diff_ignores_hosts_outside_scanned_networks():
+    old = {"10.0.1.5": _host({"name": "Plex", "ports": [32400]})}
+
+    diff = diff_services(old, {}, ["10.0.0.0/24"])
+
+    assert diff["removed"] == []
+
+
+def test_state_round_trip_and_unchanged_check(tmp_path):
+    state = ScanState(["10.0.0.0/24"])
+    state.record_host("10.0.0.2", "nas", [443, 80], {80: "abc", 443: None}, {80: ("pihole", 0.95)})
+    path = str(tmp_path / "scan_state.json")
+    state.save(path)
+
+    loaded = ScanState.load(path)
+
+    assert loaded.unchanged("10.0.0.2", 80, [80, 443], "abc")
+    assert not loaded.unchanged("10.0.0.2", 80, [80], "abc")
+    assert not loaded.unchanged("10.0.0.2", 80, [80, 443], "def")
+    assert not loaded.unchanged("10.0.0.2", 443, [80, 443], None)
+    assert loaded.detection("10.0.0.2", 80) == ("pihole", 0.95)
+
+
+def test_partial_scan_keeps_hosts_it_did_not_see():
+    previous = ScanState(["10.0.0.0/24"])
+    previous.record_host("10.0.0.2", "nas", [80], {}, {})
+    previous.record_host("10.0.1.5", "tv", [8008], {}, {})
+    previous.services["10.0.0.2"] = _host({"name": "Pi-hole", "ports": [80]})
+
+    full = ScanState(["10.0.0.0/24"])
+    full.carry_over(previous)
+    partial = ScanState(["10.0.0.0/24"])
+    partial.carry_over(previous, partial=True)
+
+    assert set(full.hosts) == {"10.0.1.5"}
+    assert set(partial.hosts) == {"10.0.0.2", "10.0.1.5"}
+    assert "10.0.0.2" in partial.services
@@ -0,0 +1,91 @@
+"""Tests for adaptive probe timeouts and concurrency"""
+import asyncio
+
+from homelab_wizard.core.port_sweep import PortSweeper
+from homelab_wizard.core.scan_timing import ScanTiming
+
+
+def test_timeouts_follow_measured_rtt_per_subnet():
+    timing = ScanTiming(initial_timeout=1.0, min_timeout=0.01, max_timeout=3.0, min_samples=4)
+
+    for _ in range(3):
+        timing.record_rtt("192.168.1.10", 0.002)
+    assert timing.timeout_for("192.168.1.20") == 1.0
+    timing.record_rtt("192.168.1.10", 0.002)
+    assert 0.01 <= timing.timeout_for("192.168.1.20") < 0.02
+
+    for rtt in (0.4, 0.9, 0.5, 1.2, 0.6):
+        timing.record_rtt("10.8.0.5", rtt)
+    assert 1.0 < timing.timeout_for("10.8.0.9") <= 3.0
+    # Other subnets keep the caller's default until they answer
+    assert timing.timeout_for("172.16.0.1", default=0.2) == 0.2
+
+
+def test_concurrency_starts_low_halves_on_loss_and_grows_back():
+    timing = ScanTiming(max_concurrency=256, min_concurrency=16, increase=16, window=10)
+    assert timing.limiter.limit == 64
+
+    # Doubling until the first loss; timeouts free slots without loss too
+    for _ in range(10):
+        timing.record_rtt("10.0.0.1", 0.01)
+    for _ in range(10):
+        timing.record_timeout()
+    assert timing.limiter.limit == 256
+
+    for _ in range(8):
+        timing.record_rtt("10.0.0.1", 0.01)
+    timing.record_loss()
+    timing.record_loss()
+    assert timing.limiter.limit == 128
+
+    for _ in range(10):
+        timing.record_rtt("10.0.0.1", 0.01)
+    assert timing.limiter.limit == 144
+    assert timing.as_dict()["probe_loss_rate"] == round(2 / 30, 4)
+
+
+def test_answered_retry_counts_as_loss():
+    class DroppingSweeper(PortSweeper):
+        attempts = 0
+
+        async def _connect(self, host, port, timeout):
+            self.attempts += 1
+            return None if self.attempts == 1 else True
+
+    timing = ScanTiming(window=1000)
+    sweeper = DroppingSweeper(timing=timing, retries=1)
+
+    assert asyncio.run(sweeper.probe("10.0.0.1", 80))
+    assert timing.lost == 1
+
+
+def test_timeouts_on_live_hosts_are_sometimes_retried_to_find_loss():
+    class DroppingSweeper(PortSweeper):
+        async def _connect(self, host, port, timeout):
+            # 10.0.0.2 never answers; 10.0.0.1 answers port 22 and drops
+            # every other first attempt
+            if host == "10.0.0.2":
+                return None
+            if port == 22:
+                self.timing.record_rtt(host, 0.01)
+                return True
+            self.seen = getattr(self, "seen", set())
+            if port in self.seen:
+                return False
+            self.seen.add(port)
+            return None
+
+    timing = ScanTiming(window=1000, loss_sample=0.5)
+    sweeper = DroppingSweeper(timing=timing)
+
+    async def run():
+        await sweeper.probe("10.0.0.2", 80)
+        await sweeper.probe("10.0.0.1", 22)
+        for port in range(1000, 1010):
+            await sweeper.probe("10.0.0.1", port)
+
+    asyncio.run(run())
+
+    # Dead addresses are never retried; live ones up to the sample budget
+    assert 0 < timing.loss_checks < 10
+    assert timing.lost == timing.loss_checks
@@ -0,0 +1,30 @@
+"""Tests for the service detector's response memo"""
+from homelab_wizard.core.service_detector import ServiceDetector
+
+
+class _CountingSession:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        return object()
+
+    def close(self):
+        pass
+
+
+def test_responses_are_reused_until_the_port_is_forgotten_and_stay_bounded():
+    session = _CountingSession()
+    detector = ServiceDetector(session)
+    detector.max_cached_ports = 2
+
+    first = detector.fetch("http://10.0.0.2:8096")
+    assert detector.fetch("http://10.0.0.2:8096") is first
+    detector.forget("10.0.0.2", 8096)
+    detector.fetch("http://10.0.0.2:8096")
+    for port in (80, 81, 82):
+        detector.fetch(f"http://10.0.0.3:{port}/favicon.ico")
+
+    assert session.urls.count("http://10.0.0.2:8096") == 2
+    assert list(detector._responses) == ["10.0.0.3:81", "10.0.0.3:82"]
@@ -0,0 +1,56 @@
+"""Tests for state shared between server worker processes"""
+from homelab_wizard.core.events import SharedEventBroker
+from homelab_wizard.core.inventory import Inventory
+from homelab_wizard.core.shared_store import SharedStore
+
+
+def test_inventories_on_one_store_see_each_others_writes(tmp_path):
+    path = str(tmp_path / "state.db")
+    first, second = Inventory(store=SharedStore(path)), Inventory(store=SharedStore(path))
+
+    first.update_host("10.0.0.2", {"ip": "10.0.0.2", "services": [{"name": "Plex", "ports": [32400]}]})
+    second.set_config("Plex_10.0.0.2", {"token": "t"})
+    seen = second.snapshot()
+
+    assert seen.find_service("plex", "10.0.0.2")["ports"] == [32400]
+    assert first.snapshot().configs == {"Plex_10.0.0.2": {"token": "t"}}
+    assert first.snapshot().version == seen.version
+
+
+def test_events_published_in_one_worker_reach_subscribers_in_another(tmp_path):
+    path = str(tmp_path / "state.db")
+    publisher = SharedEventBroker(SharedStore(path))
+    reader = SharedEventBroker(SharedStore(path), poll_interval=0.01)
+    subscription = reader.subscribe()
+
+    first = publisher.publish("progress", {"progress": "Scanning"})
+    publisher.publish("host", {"ip": "10.0.0.2"})
+
+    assert subscription.get(2)[1:] == ("progress", {"progress": "Scanning"})
+    assert subscription.get(2)[1] == "host"
+    assert reader.subscribe(last_event_id=first).get(0)[1] == "host"
+    reader.close()
+
+
+def test_host_updates_store_and_load_only_the_changed_host(tmp_path):
+    path = str(tmp_path / "state.db")
+    writer, reader = Inventory(store=SharedStore(path)), Inventory(store=SharedStore(path))
+    writer.replace_hosts({"10.0.0.2": {"services": [{"name": "Plex", "ports": [32400]}]},
+                          "10.0.0.3": {"services": [{"name": "Sonarr", "ports": [8989]}]}})
+    seen = reader.snapshot()
+
+    writer.update_host("10.0.0.3", {"services": [{"name": "Radarr", "ports": [7878]}]})
+    changed = SharedStore(path).items_since("inventory.hosts", seen.version)
+    # The untouched host is neither rewritten nor reloaded
+    assert [ip for ip, _, _ in changed] == ["10.0.0.3"]
+    assert reader.snapshot().hosts["10.0.0.2"] is seen.hosts["10.0.0.2"]
+
+    writer.replace_hosts({"10.0.0.3": writer.snapshot().hosts["10.0.0.3"]})
+    latest = reader.snapshot()
+
+    assert latest.services(port=8989) == [] and latest.service_count == 1
+    assert latest.changes_since(seen.version) == {
+        "version": writer.snapshot().version, "full": False,
+        "hosts": {"10.0.0.3": {"services": [{"name": "Radarr", "ports": [7878]}]}},
+        "removed": ["10.0.0.2"],
+    }